@@ -1,25 +1,50 @@
 import sqlite3
 import random
 
-# Connect to the existing database
-conn = sqlite3.connect("test.db")
-cursor = conn.cursor()
+# Columns generate_test_data fills in, on top of the name column every suppliers table has
+SUPPLIER_TEST_COLUMNS = {
+    "reliability": "INTEGER",
+    "lead_time": "INTEGER",
+    "historical_events": "INTEGER",
+}
 
-# Generate random suppliers
-def generate_test_data(num_suppliers=500):
-    cursor.execute("DELETE FROM suppliers")  # Clear existing data
 
-    for _ in range(num_suppliers):
-        name = f"Supplier_{random.randint(1000, 9999)}"
-        reliability = random.randint(50, 100)  # Reliability score (higher is better)
-        lead_time = random.randint(1, 15)  # Lead time in days
-        historical_events = random.randint(0, 10)  # Number of past issues
+def ensure_supplier_columns(cursor):
+    """Make sure the suppliers table has the columns the test data needs.
+
+    main.create_tables only creates (supplier_id, name), so missing columns are added instead
+    of failing on the first INSERT.
+    """
+    cursor.execute("CREATE TABLE IF NOT EXISTS suppliers (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT)")
+    existing = {row[1] for row in cursor.execute("PRAGMA table_info(suppliers)")}
+    for column, column_type in SUPPLIER_TEST_COLUMNS.items():
+        if column not in existing:
+            cursor.execute(f"ALTER TABLE suppliers ADD COLUMN {column} {column_type}")
 
-        cursor.execute("INSERT INTO suppliers (name, reliability, lead_time, historical_events) VALUES (?, ?, ?, ?)", 
-                       (name, reliability, lead_time, historical_events))
 
-    conn.commit()
+# Generate random suppliers
+def generate_test_data(conn, num_suppliers=500):
+    cursor = conn.cursor()
+    ensure_supplier_columns(cursor)
+
+    rows = [
+        (
+            f"Supplier_{random.randint(1000, 9999)}",
+            random.randint(50, 100),  # Reliability score (higher is better)
+            random.randint(1, 15),  # Lead time in days
+            random.randint(0, 10),  # Number of past issues
+        )
+        for _ in range(num_suppliers)
+    ]
+    with conn:  # One transaction for the delete and all inserts
+        cursor.execute("DELETE FROM suppliers")  # Clear existing data
+        cursor.executemany("INSERT INTO suppliers (name, reliability, lead_time, historical_events) VALUES (?, ?, ?, ?)",
+                           rows)
     print(f"{num_suppliers} test suppliers added successfully!")
 
-generate_test_data()
-conn.close()
+
+if __name__ == "__main__":
+    # Connect to the existing database
+    conn = sqlite3.connect("test.db")
+    generate_test_data(conn)
+    conn.close()
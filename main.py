@@ -1,11 +1,24 @@
+import os
 import sqlite3
+import sys
 import tkinter as tk
+from collections import defaultdict
 from tkinter import ttk, messagebox
 
+# The simulation modules import each other by their bare names
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "stijn"))
+
 # Connect to the SQLite database
 conn = sqlite3.connect('test.db')
 cursor = conn.cursor()
 
+# Sample suppliers and the items they deliver
+SAMPLE_SUPPLIES = {
+    'Supplier A': ['Item 1A', 'Item 2A'],
+    'Supplier B': ['Item 1B', 'Item 2B'],
+    'Supplier C': ['Item 1C', 'Item 2C'],
+}
+
 # Function to create the database tables
 def create_tables():
     # Create Suppliers table
@@ -26,35 +39,27 @@ def create_tables():
     )
     ''')
 
+    # Indexes for the name lookups and joins; both directions of Supplies are covered
+    cursor.execute('CREATE INDEX IF NOT EXISTS suppliers_name ON Suppliers (name)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS supplies_supplier ON Supplies (supplier_id, item_name)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS supplies_item ON Supplies (item_name, supplier_id)')
+
     conn.commit()
     print("Tables created successfully.")
 
 # Function to insert sample suppliers and items into the database
 def insert_sample_data():
-    # Insert suppliers
-    suppliers = [
-        ('Supplier A'),
-        ('Supplier B'),
-        ('Supplier C')
-    ]
-    
-    cursor.executemany('INSERT INTO Suppliers (name) VALUES (?)', [(name,) for name in suppliers])
-
-    # Get the supplier IDs (to associate with items)
-    cursor.execute('SELECT supplier_id FROM Suppliers')
-    supplier_ids = cursor.fetchall()
+    """Insert the sample suppliers and supplies that are not in the database yet, so restarts add nothing."""
+    # Suppliers are joined on rowid: the integer primary key is called supplier_id or id depending on who created the table
+    cursor.executemany('INSERT INTO Suppliers (name) SELECT ? WHERE NOT EXISTS (SELECT 1 FROM Suppliers WHERE name = ?)',
+                       [(name, name) for name in SAMPLE_SUPPLIES])
 
     # Insert supplies (items delivered by each supplier)
-    supplies = [
-        (supplier_ids[0][0], 'Item 1A'),
-        (supplier_ids[0][0], 'Item 2A'),
-        (supplier_ids[1][0], 'Item 1B'),
-        (supplier_ids[1][0], 'Item 2B'),
-        (supplier_ids[2][0], 'Item 1C'),
-        (supplier_ids[2][0], 'Item 2C')
-    ]
-
-    cursor.executemany('INSERT INTO Supplies (supplier_id, item_name) VALUES (?, ?)', supplies)
+    cursor.executemany('''INSERT INTO Supplies (supplier_id, item_name)
+                          SELECT s.rowid, ? FROM Suppliers s
+                          WHERE s.name = ? AND NOT EXISTS (
+                              SELECT 1 FROM Supplies i WHERE i.supplier_id = s.rowid AND i.item_name = ?)''',
+                       [(item, name, item) for name, items in SAMPLE_SUPPLIES.items() for item in items])
 
     # Commit the changes
     conn.commit()
@@ -63,31 +68,84 @@ def insert_sample_data():
 # Function to get all suppliers and their items
 def get_suppliers():
     cursor.execute('''SELECT s.name, i.item_name FROM Suppliers s
-                      JOIN Supplies i ON s.supplier_id = i.supplier_id''')
+                      JOIN Supplies i ON s.rowid = i.supplier_id''')
     return cursor.fetchall()
 
-# Function to exclude a supplier and show impacted items
-def exclude_supplier(supplier_name):
-    # Get all items that depend on the excluded supplier
-    cursor.execute('''SELECT item_name FROM Supplies s
-                      JOIN Suppliers p ON s.supplier_id = p.supplier_id
-                      WHERE p.name = ?''', (supplier_name,))
-    items = cursor.fetchall()
-    
-    if not items:
-        messagebox.showinfo("No Impact", "This supplier is not supplying any items.")
-        return
-    
-    # Show the items that will run out
-    messagebox.showinfo("Exclusion Impact", f"Excluding supplier {supplier_name} will impact the following products:\n" + '\n'.join([item[0] for item in items]))
 
-# Tkinter UI
-root = tk.Tk()
-root.title("Supplier Management")
+class SupplyIndex:
+    """Item -> suppliers and supplier -> items, read once from Supplies so exclusions need no queries."""
+
+    def __init__(self, connection):
+        self.version = self.data_version(connection)
+        self.ids_by_name = defaultdict(set)
+        self.suppliers_by_item = defaultdict(set)
+        self.items_by_supplier = defaultdict(set)
+        for supplier_id, name in connection.execute('SELECT rowid, name FROM Suppliers'):
+            self.ids_by_name[name].add(supplier_id)
+        for supplier_id, item in connection.execute('SELECT supplier_id, item_name FROM Supplies'):
+            self.suppliers_by_item[item].add(supplier_id)
+            self.items_by_supplier[supplier_id].add(item)
+
+    @staticmethod
+    def data_version(connection):
+        # data_version moves on commits by other connections, total_changes on our own
+        return connection.execute('PRAGMA data_version').fetchone()[0], connection.total_changes
+
+    def exclude(self, supplier_names):
+        """(items left without any supplier, items that keep another supplier, unknown names)."""
+        unknown = [name for name in supplier_names if name not in self.ids_by_name]
+        excluded = set().union(*(self.ids_by_name.get(name, ()) for name in supplier_names))
+        affected = set().union(*(self.items_by_supplier.get(supplier_id, ()) for supplier_id in excluded))
+        lost = sorted(item for item in affected if self.suppliers_by_item[item] <= excluded)
+        kept = sorted(affected.difference(lost))
+        return lost, kept, unknown
+
+
+_supply_index = None
+
+def get_supply_index():
+    """The SupplyIndex, rebuilt only when the database changed since it was built."""
+    global _supply_index
+    if _supply_index is None or _supply_index.version != SupplyIndex.data_version(conn):
+        _supply_index = SupplyIndex(conn)
+    return _supply_index
+
+
+def network_shortages(supplier_names):
+    """Hospitals of the simulation network that would run short without these suppliers."""
+    from network_store import load_store_state
+    from supplier_impact import network_impact
+
+    try:
+        return network_impact(supplier_names, load_store_state("hospital"), load_store_state("supplier"))
+    except (FileNotFoundError, sqlite3.Error) as error:
+        print(f"Could not load the simulation network: {error}")
+        return []
+
+
+# Function to exclude one or more suppliers and show the impact
+def exclude_supplier(supplier_names):
+    if isinstance(supplier_names, str):
+        supplier_names = [supplier_names]
+    lost, kept, unknown = get_supply_index().exclude(supplier_names)
+    hospitals = network_shortages(supplier_names)
+
+    if not lost and not kept and not hospitals:
+        messagebox.showinfo("No Impact", "These suppliers are not supplying any items." if not unknown
+                            else f"Unknown supplier(s): {', '.join(unknown)}")
+        return
 
-# Create table and insert sample data if not already done
-create_tables()
-insert_sample_data()
+    lines = [f"Excluding {', '.join(supplier_names)}:"]
+    if lost:
+        lines += ["", "Items that lose their only source:"] + lost
+    if kept:
+        lines += ["", "Items that still have another supplier:"] + kept
+    if hospitals:
+        lines += ["", "Hospitals that would hit shortages:"]
+        lines += [f"{hospital}: {missing} units of {product}" for hospital, product, missing in hospitals]
+    if unknown:
+        lines += ["", f"Unknown supplier(s): {', '.join(unknown)}"]
+    messagebox.showinfo("Exclusion Impact", '\n'.join(lines))
 
 # Display list of suppliers
 def show_suppliers():
@@ -100,23 +158,34 @@ def show_suppliers():
 
 # Add Exclude button
 def exclude_supplier_ui():
-    supplier_name = supplier_name_entry.get()
-    exclude_supplier(supplier_name)
+    supplier_names = [name.strip() for name in supplier_name_entry.get().split(',') if name.strip()]
+    if supplier_names:
+        exclude_supplier(supplier_names)
+
+
+if __name__ == "__main__":
+    # Tkinter UI
+    root = tk.Tk()
+    root.title("Supplier Management")
+
+    # Create table and insert sample data if not already done
+    create_tables()
+    insert_sample_data()
 
-# Input to exclude a supplier
-supplier_name_label = ttk.Label(root, text="Enter Supplier Name to Exclude:")
-supplier_name_label.pack()
-supplier_name_entry = ttk.Entry(root)
-supplier_name_entry.pack()
+    # Input to exclude one or more suppliers
+    supplier_name_label = ttk.Label(root, text="Enter Supplier Name(s) to Exclude, separated by commas:")
+    supplier_name_label.pack()
+    supplier_name_entry = ttk.Entry(root)
+    supplier_name_entry.pack()
 
-exclude_button = ttk.Button(root, text="Exclude Supplier", command=exclude_supplier_ui)
-exclude_button.pack()
+    exclude_button = ttk.Button(root, text="Exclude Supplier", command=exclude_supplier_ui)
+    exclude_button.pack()
 
-# Display suppliers and their items
-show_suppliers()
+    # Display suppliers and their items
+    show_suppliers()
 
-# Start Tkinter main loop
-root.mainloop()
+    # Start Tkinter main loop
+    root.mainloop()
 
-# Close the connection after the Tkinter window is closed
-conn.close()
+    # Close the connection after the Tkinter window is closed
+    conn.close()
@@ -0,0 +1,44 @@
+class Allocation:
+    """One delivery towards a shortage; a record without source carries the units that stay missing.
+
+    Every shortage yields at least one record, and all records of a shortage share `resolved`.
+    """
+
+    __slots__ = ("recipient", "product", "source", "units", "distance_km", "resolved")
+
+    def __init__(self, recipient, product, source, units, distance_km, resolved):
+        self.recipient = recipient
+        self.product = product
+        self.source = source
+        self.units = units
+        self.distance_km = distance_km
+        self.resolved = resolved
+
+    def __repr__(self):
+        return (f"Allocation({self.recipient!r}, {self.product!r}, {self.source!r}, {self.units}, "
+                f"{self.distance_km}, {self.resolved})")
+
+
+def shortage_records(recipient, product, used, remaining_shortage):
+    """Records of one shortage from its [(source name, units, distance km), ...] and the units left short."""
+    resolved = remaining_shortage <= 0
+    records = [Allocation(recipient, product, source, amount, dist, resolved) for source, amount, dist in used]
+    if not resolved:
+        records.append(Allocation(recipient, product, None, remaining_shortage, None, False))
+    return records
+
+
+def solution_lines(records):
+    """The solution text the simulation screen and output.txt have always shown, one shortage at a time."""
+    lines = []
+    previous = None
+    for record in records:
+        shortage = (record.recipient, record.product)
+        if shortage != previous and record.resolved:
+            lines.append(f"✅ {record.recipient} shortage of {record.product} resolved!")
+        previous = shortage
+        if record.source is None:
+            lines.append(f"⚠️ {record.recipient} still has a shortage of {record.units} units of {record.product}!")
+        elif record.resolved:
+            lines.append(f"  - {record.source} supplied {record.units} units at {record.distance_km:.2f} km")
+    return lines
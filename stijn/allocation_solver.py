@@ -0,0 +1,167 @@
+from collections import deque
+
+import numpy as np
+
+# Number of matrix cells priced per simplex iteration (block pricing)
+BLOCK_CELLS = 8192
+
+
+def solve_transportation(supply, demand, cost):
+    """Solve a transportation problem: ship units from sources to recipients at minimum cost.
+
+    supply: units each source can give, demand: units each recipient needs,
+    cost: (sources x recipients) cost per unit, np.inf where a transfer is not allowed.
+    Ships as many units as possible and, among those plans, the one with the lowest
+    total cost. Returns an integer (sources x recipients) matrix of shipped units.
+    """
+    supply = np.asarray(supply, dtype=np.int64)
+    demand = np.asarray(demand, dtype=np.int64)
+    cost = np.asarray(cost, dtype=np.float64)
+    n_sources, n_recipients = cost.shape
+    if n_sources == 0 or n_recipients == 0:
+        return np.zeros((n_sources, n_recipients), dtype=np.int64)
+
+    allowed = np.isfinite(cost)
+    largest = float(cost[allowed].max()) if allowed.any() else 0.0
+    # Costlier than any chain of real transfers, so unmet demand is only left when unavoidable
+    penalty = (n_sources + n_recipients + 1) * (largest + 1)
+    costs = np.where(allowed, cost, 2 * penalty)
+
+    # Balance the problem with a dummy recipient (surplus stays home) or a dummy source (unmet demand)
+    excess = int(supply.sum() - demand.sum())
+    if excess >= 0:
+        costs = np.hstack([costs, np.zeros((n_sources, 1))])
+        demand = np.append(demand, excess)
+    else:
+        costs = np.vstack([costs, np.full((1, n_recipients), penalty)])
+        supply = np.append(supply, -excess)
+
+    flow = _network_simplex(supply, demand, costs)[:n_sources, :n_recipients]
+    flow[~allowed] = 0
+    return flow
+
+
+def _initial_basis(supply, demand, costs):
+    """Least-cost method: a feasible spanning-tree basis to start the simplex from."""
+    m, n = costs.shape
+    supply = supply.copy()
+    demand = demand.copy()
+    flow = np.zeros((m, n), dtype=np.int64)
+    basis = []
+    row_open = np.ones(m, dtype=bool)
+    col_open = np.ones(n, dtype=bool)
+    rows_left, cols_left = m, n
+
+    for cell in np.argsort(costs, axis=None, kind="stable"):
+        i, j = divmod(int(cell), n)
+        if not (row_open[i] and col_open[j]):
+            continue
+        amount = min(supply[i], demand[j])
+        flow[i, j] = amount
+        supply[i] -= amount
+        demand[j] -= amount
+        basis.append((i, j))
+        if rows_left + cols_left == 2:
+            break
+        # Close exactly one line per cell so the basis stays a spanning tree
+        if supply[i] == 0 and rows_left > 1:
+            row_open[i] = False
+            rows_left -= 1
+        else:
+            col_open[j] = False
+            cols_left -= 1
+    return flow, basis
+
+
+def _network_simplex(supply, demand, costs):
+    """Transportation simplex on a balanced problem, starting from the least-cost basis."""
+    m, n = costs.shape
+    flow, basis = _initial_basis(supply, demand, costs)
+
+    # Basis tree over nodes 0..m-1 (sources) and m..m+n-1 (recipients)
+    neighbours = [set() for _ in range(m + n)]
+    for i, j in basis:
+        neighbours[i].add(m + j)
+        neighbours[m + j].add(i)
+    potential = np.zeros(m + n)
+    parent = np.full(m + n, -1)
+    depth = np.zeros(m + n, dtype=np.int64)
+    _hang_subtree(0, -1, neighbours, parent, depth, potential, costs, m)
+
+    tolerance = 1e-9 * (1 + float(np.abs(costs).max()))
+    block = max(1, min(m, BLOCK_CELLS // n))
+    start = 0
+    clean_rows = 0
+    while True:
+        # Price a block of rows and take its most negative reduced cost as the entering cell
+        rows = slice(start, min(start + block, m))
+        reduced = costs[rows] - potential[rows, None] - potential[None, m:]
+        i, j = divmod(int(reduced.argmin()), n)
+        gain = reduced[i, j]
+        i += start
+        start = rows.stop % m
+        if gain >= -tolerance:
+            clean_rows += rows.stop - rows.start
+            if clean_rows >= m:
+                return flow  # A full sweep without improvement: optimal
+            continue
+        clean_rows = 0
+
+        # The tree path from i to j closes a cycle with the entering cell
+        a, b = i, m + j
+        left, right = [a], [b]
+        while a != b:
+            if depth[a] >= depth[b]:
+                a = parent[a]
+                left.append(a)
+            else:
+                b = parent[b]
+                right.append(b)
+        path = left + right[-2::-1]
+
+        # Cells along the path alternately lose and gain units, starting with a loss next to i
+        cells = [(x, y - m) if x < m else (y, x - m) for x, y in zip(path, path[1:])]
+        losing = cells[0::2]
+        leaving = min(range(len(losing)), key=lambda k: flow[losing[k]])
+        amount = flow[losing[leaving]]
+        for k, cell in enumerate(cells):
+            flow[cell] += -amount if k % 2 == 0 else amount
+        flow[i, j] += amount
+
+        x, y = path[2 * leaving], path[2 * leaving + 1]
+        neighbours[x].discard(y)
+        neighbours[y].discard(x)
+        neighbours[i].add(m + j)
+        neighbours[m + j].add(i)
+
+        # Re-hang the subtree that got cut off below the entering cell
+        child = x if parent[x] == y else y
+        node = i
+        while depth[node] > depth[child]:
+            node = parent[node]
+        if node == child:
+            _hang_subtree(i, m + j, neighbours, parent, depth, potential, costs, m)
+        else:
+            _hang_subtree(m + j, i, neighbours, parent, depth, potential, costs, m)
+
+
+def _hang_subtree(start, attach, neighbours, parent, depth, potential, costs, m):
+    """Hang the subtree containing `start` below `attach` and recompute its potentials."""
+    parent[start] = attach
+    depth[start] = 0 if attach < 0 else depth[attach] + 1
+    potential[start] = 0.0 if attach < 0 else _cell_cost(start, attach, costs, m) - potential[attach]
+
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        for other in neighbours[node]:
+            if other == parent[node]:
+                continue
+            parent[other] = node
+            depth[other] = depth[node] + 1
+            potential[other] = _cell_cost(node, other, costs, m) - potential[node]
+            queue.append(other)
+
+
+def _cell_cost(x, y, costs, m):
+    return costs[x, y - m] if x < m else costs[y, x - m]
@@ -0,0 +1,142 @@
+import argparse
+import datetime
+import os
+import sys
+
+from incremental_resolver import IncrementalResolver
+from instrumentation import REPORT_FILE, instrumentation
+from plan_cache import PlanCache
+from result_export import EXPORT_FORMATS, AllocationWriter, export_format
+from simulation_core import SOLVER_MODES, check_hospitals_stock, load_hospitals, load_suppliers, minimum_levels, \
+    resolve_shortages
+from supply_history import HISTORY_DAYS, history_mismatch, load_history_minimums
+
+# Imports neither tkinter nor matplotlib, so it starts fast and runs without a display
+DEFAULT_OUTPUT = "simulation_results.csv"
+INSTRUMENT_MODES = ("timers", "profile", "memory")
+
+
+def scenario_output(output, scenario_csv):
+    """Export path of a scenario run: the scenario's file name inserted before the export's extension."""
+    stem, extension = os.path.splitext(output)
+    return f"{stem}.{os.path.splitext(os.path.basename(scenario_csv))[0]}{extension}"
+
+
+def run_batch(output, hospitals_csv=None, suppliers_csv=None, datamode="normal", mode="greedy", file_format=None,
+              text_output=None, plan_cache=None, resolver=None, minimums=None):
+    """Load the network, find the shortages, resolve them and export the Allocation records to `output`.
+
+    Records are streamed to the export per hospital as they are resolved. Without CSV paths the
+    network store is read, like the GUI does; `datamode` "hypo" reads the hypothetical hospitals.
+    With `text_output`, the readable solution lines of output.txt are written there as well.
+    Mode "incremental" uses `resolver` (an IncrementalResolver) when given, so runs over edited
+    versions of the same network only re-solve what the edits affected. `minimums` (a
+    supply_history.DemandProfile) replaces the static minimums where it has history; when it has
+    none for these hospitals a warning is printed and the static minimums are used.
+    Returns (records written, units still short); raises FileNotFoundError when nothing could be loaded.
+    """
+    hospitals = load_hospitals(datamode, hospitals_csv)
+    suppliers = load_suppliers(suppliers_csv)
+    if not hospitals:
+        raise FileNotFoundError(f"No hospitals loaded from {hospitals_csv or 'the network store'}")
+    warning = history_mismatch(minimums, [hospital.name for hospital in hospitals], hospitals[0].state.products)
+    if warning:
+        print(f"Warning: {warning}")
+        minimums = None
+
+    with instrumentation.run("batch"):
+        insufficient_hospitals = check_hospitals_stock(hospitals, minimums=minimums)
+        short_units = 0
+        lines = []
+        with AllocationWriter(output, file_format) as writer:
+            def on_solution(records):
+                nonlocal short_units
+                writer.write(records)
+                short_units += sum(record.units for record in records if record.source is None)
+
+            if insufficient_hospitals and mode == "incremental":
+                records = []
+                resolver = resolver if resolver is not None else IncrementalResolver()
+                lines = resolver.resolve(hospitals, suppliers, records=records, minimums=minimums)
+                on_solution(records)
+            elif insufficient_hospitals:
+                min_inventory_levels = minimum_levels(hospitals, minimums)
+                lines = resolve_shortages(insufficient_hospitals, hospitals, suppliers, min_inventory_levels,
+                                          mode=mode, on_solution=on_solution, cache=plan_cache, minimums=minimums)
+
+    if text_output is not None:
+        with open(text_output, "w", encoding="utf-8") as file:
+            file.write("\n".join(lines))
+    return writer.rows, short_units
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the supply chain simulation once without a GUI and export "
+                                                 "the allocations.")
+    parser.add_argument("--hospitals", help="hospitals CSV (default: the network store)")
+    parser.add_argument("--suppliers", help="suppliers CSV (default: the network store)")
+    parser.add_argument("--datamode", choices=("normal", "hypo"), default="normal",
+                        help="'hypo' reads the hypothetical hospitals when --hospitals is not given")
+    parser.add_argument("--mode", choices=(*SOLVER_MODES, "incremental"), default="greedy",
+                        help="solver, default %(default)s; optimal falls back to greedy on large networks")
+    parser.add_argument("--scenarios", nargs="+", default=(), metavar="CSV",
+                        help="edited versions of the hospitals CSV, each solved after the base network and exported "
+                             "next to --output; with --mode incremental only what they change is re-solved")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="allocation export, default %(default)s")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, help="export format (default: from the --output extension)")
+    parser.add_argument("--text", help="also write the readable solution lines (as in output.txt) here")
+    parser.add_argument("--history-minimums", action="store_true",
+                        help="replace the static minimums with dynamic ones from the supply_data history")
+    parser.add_argument("--history-days", type=int, default=HISTORY_DAYS,
+                        help="history window for --history-minimums, default %(default)s days")
+    parser.add_argument("--history-end", metavar="DATE",
+                        help="last day of the history window, e.g. the simulated date (default: the last day with "
+                             "history)")
+    parser.add_argument("--history-db", help="history database for --history-minimums (default: supply_chain.db)")
+    parser.add_argument("--plan-cache", help="directory of solved plans shared between runs")
+    parser.add_argument("--instrument", help=f"comma-separated {', '.join(INSTRUMENT_MODES)}; "
+                                             f"writes {REPORT_FILE} next to the export")
+    args = parser.parse_args(argv)
+
+    try:
+        file_format = args.format or export_format(args.output)
+    except ValueError as error:
+        parser.error(str(error))
+    if args.instrument:
+        modes = {mode.strip() for mode in args.instrument.split(",") if mode.strip()}
+        if not modes <= set(INSTRUMENT_MODES):
+            parser.error(f"--instrument takes {', '.join(INSTRUMENT_MODES)}")
+        instrumentation.configure(timers=True, profile="profile" in modes, trace_memory="memory" in modes)
+    if args.history_end:
+        try:
+            datetime.date.fromisoformat(args.history_end)
+        except ValueError:
+            parser.error(f"--history-end takes an ISO date (YYYY-MM-DD), not {args.history_end!r}")
+    plan_cache = PlanCache(directory=args.plan_cache) if args.plan_cache else None
+    resolver = IncrementalResolver() if args.mode == "incremental" else None
+    minimums = None
+    if args.history_minimums:
+        minimums = load_history_minimums(args.history_days, args.history_db, args.history_end)
+        print("No supply_data history found, using the static minimums" if minimums is None
+              else f"Using history minimums for {len(minimums)} hospital x product pairs")
+
+    jobs = [(args.output, args.hospitals, args.text)]
+    jobs += [(scenario_output(args.output, scenario), scenario, None) for scenario in args.scenarios]
+    for output, hospitals_csv, text_output in jobs:
+        try:
+            rows, short_units = run_batch(output, hospitals_csv, args.suppliers, args.datamode, args.mode,
+                                          file_format, text_output, plan_cache, resolver, minimums)
+        except (FileNotFoundError, ImportError, OSError) as error:
+            print(f"Error: {error}", file=sys.stderr)
+            return 1
+        print(f"Wrote {rows} allocation records to {output}"
+              + (f", {short_units} units are still short" if short_units else "")
+              + (f" ({resolver.last_resolved} shortages re-solved)" if resolver is not None else ""))
+    report = instrumentation.write_report(os.path.join(os.path.dirname(os.path.abspath(args.output)), REPORT_FILE))
+    if report:
+        print(f"Wrote the run report to {report}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
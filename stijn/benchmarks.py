@@ -0,0 +1,121 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import tempfile
+import time
+
+import numpy as np
+
+from distance_matrix import distance_matrix
+from network_generator import BENCHMARK_SIZES, write_network
+from snapshot_cache import snapshot_path
+from simulation_core import check_hospitals_stock, generate_combinations, load_hospitals, load_suppliers, \
+    resolve_shortages_with_minimum_distance, surplus_stock
+
+# Untracked (see .gitignore), so running the benchmarks leaves the source tree clean
+RESULTS_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmark_output"))
+RESULTS_FILE = os.path.join(RESULTS_DIR, "benchmark_results.jsonl")
+# generate_combinations tries every subset of its sources, so it gets the nearest few only
+COMBINATION_SOURCES = 12
+
+
+def timed(function, *args):
+    """(result, seconds) of one call."""
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def quietly(function, *args):
+    """Call a loader without its progress prints ending up in the timings' output."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args)
+
+
+def nearest_sources(hospital, product, hospitals, suppliers, min_inventory_levels, count):
+    """The `count` nearest sources with stock to spare, as generate_combinations expects them."""
+    sources = [source for source in hospitals + suppliers
+               if source is not hospital and surplus_stock(source, product, min_inventory_levels) > 0]
+    if not sources:
+        return []
+    distances = distance_matrix.between([hospital], sources)[0]
+    nearest = np.argsort(distances, kind="stable")[:count]
+    return [(sources[index], float(distances[index]), surplus_stock(sources[index], product, min_inventory_levels))
+            for index in nearest.tolist()]
+
+
+def benchmark_size(entities, directory, seed=0):
+    """Time every pipeline stage on a generated network of `entities` rows; returns a result dict."""
+    hospitals_csv, suppliers_csv = write_network(directory, entities, seed)
+    for path in (hospitals_csv, suppliers_csv):
+        if os.path.exists(snapshot_path(path)):
+            os.remove(snapshot_path(path))
+    timings = {}
+
+    hospitals, timings["load_hospitals_cold"] = timed(quietly, load_hospitals, "normal", hospitals_csv)
+    hospitals, timings["load_hospitals_snapshot"] = timed(quietly, load_hospitals, "normal", hospitals_csv)
+    suppliers, timings["load_suppliers"] = timed(quietly, load_suppliers, suppliers_csv)
+    insufficient_hospitals, timings["check_hospitals_stock"] = timed(check_hospitals_stock, hospitals)
+
+    min_inventory_levels = {hospital.name: hospital.min_inventory for hospital in hospitals}
+    combination_input = None
+    if insufficient_hospitals:
+        hospital, ((product, shortage), *_) = insufficient_hospitals[0]
+        sources = nearest_sources(hospital, product, hospitals, suppliers, min_inventory_levels, COMBINATION_SOURCES)
+        combination_input = (sources, shortage)
+
+    _, timings["resolve_shortages_with_minimum_distance"] = timed(
+        resolve_shortages_with_minimum_distance, insufficient_hospitals, hospitals, suppliers, min_inventory_levels)
+    if combination_input is not None:
+        _, timings["generate_combinations"] = timed(generate_combinations, *combination_input)
+
+    return {
+        "entities": entities,
+        "hospitals": len(hospitals),
+        "suppliers": len(suppliers),
+        "shortages": sum(len(shortages) for _, shortages in insufficient_hospitals),
+        "combination_sources": len(combination_input[0]) if combination_input else 0,
+        "seconds": timings,
+    }
+
+
+def run_benchmarks(sizes=BENCHMARK_SIZES, seed=0, results_file=RESULTS_FILE):
+    """Benchmark every size, print the timings and append them to `results_file` (JSON lines)."""
+    run = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "seed": seed,
+    }
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for entities in sizes:
+            result = benchmark_size(entities, os.path.join(directory, str(entities)), seed)
+            results.append(result)
+            print(f"{entities} entities ({result['shortages']} shortages):")
+            for stage, seconds in result["seconds"].items():
+                print(f"  {stage:<40} {seconds:10.4f} s")
+
+            if results_file:
+                os.makedirs(os.path.dirname(os.path.abspath(results_file)), exist_ok=True)
+                with open(results_file, "a", encoding="utf-8") as file:
+                    file.write(json.dumps({**run, **result}) + "\n")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the simulation pipeline on generated networks.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(BENCHMARK_SIZES),
+                        help="network sizes (hospitals + suppliers), default %(default)s")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--results", default=RESULTS_FILE, help="JSON lines file the results are appended to, default %(default)s")
+    args = parser.parse_args()
+    run_benchmarks(args.sizes, args.seed, args.results)
+
+
+if __name__ == "__main__":
+    main()
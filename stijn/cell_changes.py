@@ -0,0 +1,175 @@
+import json
+import os
+
+import numpy as np
+
+# A CSV journal is folded into the CSV once it holds this many changes
+COMPACT_AFTER_CHANGES = 10_000
+JOURNAL_SUFFIX = ".journal"
+TRUE_WORDS = ("true", "yes", "1")
+FALSE_WORDS = ("false", "no", "0")
+
+
+def coerce_value(dtype, value):
+    """`value` (usually typed text) as a value of a column with this dtype; raises ValueError when it does not fit."""
+    # Imported here: the CSV loaders import this module for fold_journal and only need pandas on a miss
+    from pandas.api.types import is_bool_dtype, is_float_dtype, is_integer_dtype
+
+    text = str(value).strip()
+    if is_bool_dtype(dtype):
+        if text.lower() in TRUE_WORDS:
+            return True
+        if text.lower() in FALSE_WORDS:
+            return False
+        raise ValueError(f"{value!r} is not true or false")
+    if is_integer_dtype(dtype):
+        try:
+            return int(text)
+        except ValueError:
+            number = float(text)  # "12.0" is fine, "12.5" or "abc" is not
+            if not number.is_integer():
+                raise ValueError(f"{value!r} is not a whole number") from None
+            return int(number)
+    if is_float_dtype(dtype):
+        return float(text)
+    return value
+
+
+class ChangeSet:
+    """Edited cells of a DataFrame as {(row position, column index): value} deltas.
+
+    Values are coerced to their column's dtype when they are set, so a bad value is refused at
+    edit time instead of at save time. Setting a cell back to its original value drops its delta.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self._changes = {}
+
+    def set(self, position, column, value):
+        """Record an edit and return the coerced value."""
+        value = coerce_value(self.data.dtypes.iloc[column], value)
+        original = self.data.iat[position, column]
+        if value == original or str(value) == str(original):
+            self._changes.pop((position, column), None)
+        else:
+            self._changes[position, column] = value
+        return value
+
+    def get(self, cell, default=None):
+        return self._changes.get(cell, default)
+
+    def __contains__(self, cell):
+        return cell in self._changes
+
+    def __getitem__(self, cell):
+        return self._changes[cell]
+
+    def __len__(self):
+        return len(self._changes)
+
+    def items(self):
+        return self._changes.items()
+
+    def clear(self):
+        self._changes.clear()
+
+    def by_column_name(self):
+        """[(row position, column name, value), ...] of every change."""
+        return [(position, self.data.columns[column], value) for (position, column), value in self._changes.items()]
+
+    def apply(self, data=None):
+        """Write the changes into `data` (default: the edited DataFrame) in place, without touching its index."""
+        data = self.data if data is None else data
+        for (position, column), value in self._changes.items():
+            data.iat[position, column] = value
+
+
+class CsvJournal:
+    """Append-only journal of cell changes next to a CSV file (`<csv>.journal`, JSON lines).
+
+    Saving appends only the changed cells, so it costs O(changes) whatever the size of the CSV.
+    The first line records the CSV's size and modification time; a journal that no longer matches
+    its CSV is not replayed. compact() folds the journal into the CSV with an atomic rewrite; the
+    editor does so when it closes, and every other reader of the CSV through fold_journal().
+    """
+
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+        self.path = csv_path + JOURNAL_SUFFIX
+        self.size = None  # Changes in the journal, counted once and then kept up to date
+
+    def _csv_signature(self):
+        stat = os.stat(self.csv_path)
+        return {"csv_size": stat.st_size, "csv_mtime_ns": stat.st_mtime_ns}
+
+    def entries(self):
+        """[(row position, column name, value), ...] in the journal, oldest first; [] without a journal."""
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, encoding="utf-8") as file:
+            header = json.loads(next(file, "{}"))
+            if header != self._csv_signature():
+                raise ValueError(f"{self.path} does not belong to the current {self.csv_path}")
+            entries = [(entry["row"], entry["column"], entry["value"]) for entry in map(json.loads, file)]
+        self.size = len(entries)
+        return entries
+
+    def append(self, changes):
+        """Durably append [(row position, column name, value), ...]; returns how many changes the journal holds."""
+        new = not os.path.exists(self.path)
+        if self.size is None or new:
+            self.size = 0 if new else len(self.entries())
+        with open(self.path, "a", encoding="utf-8") as file:
+            if new:
+                file.write(json.dumps(self._csv_signature()) + "\n")
+            for position, column, value in changes:
+                file.write(json.dumps({"row": int(position), "column": column, "value": _plain(value)},
+                                      ensure_ascii=False) + "\n")
+                self.size += 1
+            file.flush()
+            os.fsync(file.fileno())
+        return self.size
+
+    def replay(self, data):
+        """Apply the journal to `data` (the CSV as read) in place; returns the number of changes applied."""
+        entries = self.entries()
+        columns = {column: index for index, column in enumerate(data.columns)}
+        for position, column, value in entries:
+            data.iat[position, columns[column]] = value
+        return len(entries)
+
+    def compact(self, data):
+        """Atomically rewrite the CSV from `data` (with the journal applied) and remove the journal."""
+        temporary = f"{self.csv_path}.{os.getpid()}.tmp"
+        data.to_csv(temporary, index=False)
+        os.replace(temporary, self.csv_path)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.size = 0
+
+
+def fold_journal(csv_path):
+    """Fold the editor's journaled saves into `csv_path`, so a reader of the plain CSV sees them.
+
+    Every reader of a hospital/supplier CSV calls this first. Returns the number of changes folded
+    in; a journal that no longer matches its CSV is left for the editor to set aside.
+    """
+    journal = CsvJournal(csv_path)
+    if not (os.path.exists(journal.path) and os.path.exists(csv_path)):
+        return 0
+    import pandas as pd
+
+    data = pd.read_csv(csv_path)  # As the editor reads it, so the rewrite is the one it would make
+    try:
+        changes = journal.replay(data)
+    except ValueError as error:
+        print(f"Warning: {error}; reading the CSV without it")
+        return 0
+    journal.compact(data)
+    return changes
+
+
+def _plain(value):
+    """numpy scalars as the Python values json can write."""
+    return value.item() if isinstance(value, np.generic) else value
@@ -0,0 +1,90 @@
+import csv
+import os
+
+import numpy as np
+
+from network_state import NetworkState
+
+# Default data files, relative to the repository instead of one developer's machine
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "other_required_files")
+HOSPITALS_CSV = os.path.join(DATA_DIR, "Hospitals.csv")
+SUPPLIERS_CSV = os.path.join(DATA_DIR, "Suppliers.csv")
+HYPO_CSV = os.path.normpath(os.path.join(DATA_DIR, "..", "..", "hypo.csv"))
+SUPPLY_DB = os.path.normpath(os.path.join(DATA_DIR, "..", "..", "supply_chain.db"))
+# The editable hospital/supplier network lives in its own, untracked database next to SUPPLY_DB
+NETWORK_DB = os.environ.get("SUPPLY_CHAIN_NETWORK_DB") or os.path.normpath(
+    os.path.join(DATA_DIR, "..", "..", "network.db"))
+
+# Product mapping (Old name -> New name)
+product_mapping = {
+    "A": "Drug A",
+    "B": "Drug B",
+    "C": "Drug C",
+    "D": "Drug D",
+    "E": "Drug E"
+}
+
+# Second matrix per entity type: hospitals have minimum stock, suppliers production
+SECOND_COLUMN_PREFIX = {
+    "hospital": "min_stock_",
+    "supplier": "production_",
+}
+
+
+class TableSchema:
+    """Column layout of a hospital or supplier CSV, worked out once per header."""
+
+    def __init__(self, header, kind):
+        second_prefix = SECOND_COLUMN_PREFIX[kind]
+        suffixes = [column[len("stock_"):] for column in header if column.startswith("stock_")]
+
+        self.kind = kind
+        self.products = [product_mapping.get(suffix, suffix) for suffix in suffixes]
+        self.stock_columns = ["stock_" + suffix for suffix in suffixes]
+        self.second_columns = [second_prefix + suffix for suffix in suffixes]
+        self.columns = ["name", "coordinates"] + self.stock_columns + self.second_columns
+        self.dtypes = {column: np.int64 for column in self.stock_columns + self.second_columns}
+        self.dtypes.update(name=str, coordinates=str)
+
+
+_schemas = {}
+
+
+def table_schema(header, kind):
+    """Cached TableSchema for this header."""
+    key = (tuple(header), kind)
+    if key not in _schemas:
+        _schemas[key] = TableSchema(header, kind)
+    return _schemas[key]
+
+
+def parse_coordinates(values):
+    """Parse "lat, lon" strings into an (N, 2) float array in one go."""
+    values = list(values)
+    if not values:
+        return np.zeros((0, 2))
+    coordinates = np.fromstring(", ".join(values), sep=",")
+    if len(coordinates) != 2 * len(values):
+        raise ValueError("Every coordinates value must look like 'lat, lon'")
+    return coordinates.reshape(-1, 2)
+
+
+def read_network_csv(filename, kind):
+    """Bulk-load a hospital or supplier CSV into a NetworkState."""
+    import pandas as pd
+
+    with open(filename, newline='', encoding='utf-8') as csvfile:
+        header = next(csv.reader(csvfile))
+    schema = table_schema(header, kind)
+
+    frame = pd.read_csv(filename, encoding='utf-8', usecols=schema.columns, dtype=schema.dtypes)
+    second = frame[schema.second_columns].to_numpy(np.int64)
+    matrices = {"min_stock": second} if kind == "hospital" else {"production": second}
+
+    return NetworkState(
+        frame["name"].tolist(),
+        schema.products,
+        frame[schema.stock_columns].to_numpy(np.int64),
+        coordinates=parse_coordinates(frame["coordinates"]),
+        **matrices,
+    )
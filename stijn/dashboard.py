@@ -0,0 +1,155 @@
+import numpy as np
+from matplotlib.figure import Figure
+
+# Most hospital rows the heatmap draws; above this, consecutive hospitals share a row showing their mean ratio
+HEATMAP_MAX_ROWS = 200
+# Hospital names are written next to the heatmap up to this many rows
+HEATMAP_MAX_LABELS = 40
+# Most hospitals and suppliers the map draws; the hospitals most short of stock are always among them
+SCATTER_MAX_POINTS = 5000
+# Stock / minimum ratios are clipped here; cells without a minimum count as this well stocked
+RATIO_CLIP = 2.0
+# Shortage severity at which the map color saturates
+SEVERITY_CLIP = 0.5
+
+
+def stock_ratios(state):
+    """Hospital x product stock / minimum stock, clipped to [0, RATIO_CLIP]."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratios = state.stock / state.min_stock
+    return np.where(state.min_stock > 0, np.clip(ratios, 0, RATIO_CLIP), RATIO_CLIP)
+
+
+def shortage_severity(state):
+    """Per hospital, the share of its total minimum stock that is missing (0 = no shortage, 1 = empty)."""
+    missing = np.maximum(state.min_stock - state.stock, 0).sum(axis=1)
+    total = state.min_stock.sum(axis=1)
+    return np.divide(missing, total, out=np.zeros(len(state)), where=total > 0)
+
+
+def binned_ratios(ratios, max_rows=HEATMAP_MAX_ROWS):
+    """(heatmap rows, hospital order, hospitals per row) with the hospitals most at risk first.
+
+    Hospitals are ordered on their lowest ratio. Above `max_rows` hospitals, consecutive hospitals
+    in that order are binned into one row holding their mean ratio per product.
+    """
+    order = np.argsort(ratios.min(axis=1), kind="stable")
+    ratios = ratios[order]
+    if len(ratios) <= max_rows:
+        return ratios, order, 1
+    starts = np.linspace(0, len(ratios), max_rows, endpoint=False).astype(np.int64)
+    sizes = np.diff(np.append(starts, len(ratios)))
+    return np.add.reduceat(ratios, starts, axis=0) / sizes[:, None], order, -(-len(ratios) // max_rows)
+
+
+def sample_points(severity, max_points=SCATTER_MAX_POINTS):
+    """Sorted indices of at most `max_points` entities: the most severe ones, then an even spread of the rest."""
+    if len(severity) <= max_points:
+        return np.arange(len(severity))
+    short = np.flatnonzero(severity > 0)
+    if len(short) >= max_points:
+        return np.sort(short[np.argpartition(-severity[short], max_points - 1)[:max_points]])
+    rest = np.flatnonzero(severity <= 0)
+    step = -(-len(rest) // (max_points - len(short)))
+    return np.sort(np.concatenate([short, rest[::step]]))
+
+
+class NetworkDashboard:
+    """Network-wide view: a stock/minimum heatmap and a map of every entity colored by shortage severity.
+
+    Both plots are computed from the NetworkState arrays and downsampled for large networks. Like
+    grafs.InventoryChart, one figure is kept and later updates only replace the plotted data.
+    """
+
+    def __init__(self, figsize=(11, 5)):
+        self.figure = Figure(figsize=figsize)
+        self.heatmap_ax, self.map_ax = self.figure.subplots(1, 2, gridspec_kw={"width_ratios": (1, 1.3)})
+        self.figure.subplots_adjust(left=0.18, right=0.95, wspace=0.35)
+        self.image = None
+        self.hospital_points = None
+        self.supplier_points = None
+        self.canvas = None
+        self.master = None
+
+    def attach(self, master):
+        """Create the Tk canvas in `master` (once per frame) and return its widget."""
+        if self.canvas is None or self.master is not master:
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+            self.canvas = FigureCanvasTkAgg(self.figure, master=master)
+            self.master = master
+        return self.canvas.get_tk_widget()
+
+    def update(self, hospital_state, supplier_state=None):
+        """Redraw both plots for the current stock of these states."""
+        self._update_heatmap(hospital_state)
+        self._update_map(hospital_state, supplier_state)
+        if self.canvas is not None:
+            self.canvas.draw_idle()
+
+    def _update_heatmap(self, state):
+        rows, order, per_row = binned_ratios(stock_ratios(state))
+        ax = self.heatmap_ax
+        extent = (-0.5, len(state.products) - 0.5, len(rows) - 0.5, -0.5)
+        if self.image is None:
+            self.image = ax.imshow(rows, aspect="auto", cmap="RdYlGn", vmin=0, vmax=RATIO_CLIP,
+                                   interpolation="nearest", extent=extent)
+            self.figure.colorbar(self.image, ax=ax, label="Stock / minimum")
+        else:
+            self.image.set_data(rows)
+            self.image.set_extent(extent)
+
+        ax.set_xticks(range(len(state.products)))
+        ax.set_xticklabels(state.products, rotation=45, ha="right")
+        if len(rows) <= HEATMAP_MAX_LABELS and per_row == 1:
+            ax.set_yticks(range(len(rows)))
+            ax.set_yticklabels([state.names[row] for row in order.tolist()], fontsize=7)
+            ax.set_ylabel("")
+        else:
+            ax.set_yticks([])
+            ax.set_ylabel(f"Hospitals, most at risk first ({per_row} per row)" if per_row > 1
+                          else "Hospitals, most at risk first")
+        ax.set_title("Stock / minimum per product")
+
+    def _update_map(self, hospital_state, supplier_state):
+        severity = shortage_severity(hospital_state)
+        shown = sample_points(severity)
+        coordinates = hospital_state.coordinates[shown]
+        ax = self.map_ax
+        if self.hospital_points is None:
+            self.hospital_points = ax.scatter(coordinates[:, 1], coordinates[:, 0], c=severity[shown], cmap="Reds",
+                                              vmin=0, vmax=SEVERITY_CLIP, edgecolors="grey", linewidths=0.2,
+                                              label="Hospitals", zorder=2)
+            self.figure.colorbar(self.hospital_points, ax=ax, extend="max", label="Share of minimum stock missing")
+        else:
+            self.hospital_points.set_offsets(coordinates[:, ::-1])
+            self.hospital_points.set_array(severity[shown])
+        self.hospital_points.set_sizes([30 if len(shown) < 500 else 8])
+
+        supplier_coordinates = np.zeros((0, 2))
+        if supplier_state is not None and len(supplier_state):
+            step = -(-len(supplier_state) // SCATTER_MAX_POINTS)
+            supplier_coordinates = supplier_state.coordinates[::step]
+        if self.supplier_points is None:
+            self.supplier_points = ax.scatter(supplier_coordinates[:, 1], supplier_coordinates[:, 0], marker="^",
+                                              s=14, color="steelblue", label="Suppliers", zorder=1)
+            ax.legend(loc="upper right", fontsize=8)
+        else:
+            self.supplier_points.set_offsets(supplier_coordinates[:, ::-1])
+
+        every = np.concatenate([hospital_state.coordinates, supplier_coordinates])
+        if len(every):
+            ax.dataLim.set_points(np.array([every[:, ::-1].min(axis=0), every[:, ::-1].max(axis=0)]))
+            ax.autoscale_view()
+            ax.set_aspect(1 / np.cos(np.radians(every[:, 0].mean())), adjustable="datalim")
+        short = int((severity > 0).sum())
+        sampled = f", {len(shown)} drawn" if len(shown) < len(severity) else ""
+        ax.set_title(f"{len(severity)} hospitals, {short} short{sampled}")
+        ax.set_xlabel("Longitude")
+        ax.set_ylabel("Latitude")
+
+    def render_png(self, path, hospital_state, supplier_state=None):
+        """Update the dashboard and write it to `path`, without Tk."""
+        self.update(hospital_state, supplier_state)
+        self.figure.savefig(path, format="png")
+        return path
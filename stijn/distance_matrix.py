@@ -0,0 +1,74 @@
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371  # Radius of the Earth in km
+
+
+def as_coordinate_array(coordinates):
+    """Convert a sequence of (lat, lon) tuples to an (N, 2) float array."""
+    array = np.asarray(coordinates, dtype=np.float64)
+    return array.reshape(-1, 2)
+
+
+def haversine_matrix(origins, destinations):
+    """Compute all origin x destination haversine distances (km) in one batched pass."""
+    origins = np.radians(as_coordinate_array(origins))
+    destinations = np.radians(as_coordinate_array(destinations))
+
+    lat1 = origins[:, 0][:, None]
+    lon1 = origins[:, 1][:, None]
+    lat2 = destinations[:, 0][None, :]
+    lon2 = destinations[:, 1][None, :]
+
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return EARTH_RADIUS_KM * c
+
+
+class DistanceMatrix:
+    """Cache of origin x destination distance matrices keyed on the coordinate arrays."""
+
+    def __init__(self, max_entries=8):
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+
+    @staticmethod
+    def _key(origins, destinations):
+        digest = hashlib.blake2b(digest_size=16)
+        for array in (origins, destinations):
+            digest.update(str(array.shape).encode())
+            digest.update(np.ascontiguousarray(array).tobytes())
+        return digest.digest()
+
+    def get(self, origins, destinations):
+        """Return the distance matrix for the given coordinates, computing it only once."""
+        origins = as_coordinate_array(origins)
+        destinations = as_coordinate_array(destinations)
+        key = self._key(origins, destinations)
+
+        matrix = self._cache.get(key)
+        if matrix is None:
+            matrix = haversine_matrix(origins, destinations)
+            matrix.setflags(write=False)
+            self._cache[key] = matrix
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)  # Drop the least recently used matrix
+        else:
+            self._cache.move_to_end(key)
+        return matrix
+
+    def between(self, origin_entities, destination_entities):
+        """Distance matrix between two lists of entities with a `coordinates` attribute."""
+        return self.get([entity.coordinates for entity in origin_entities],
+                        [entity.coordinates for entity in destination_entities])
+
+    def clear(self):
+        self._cache.clear()
+
+
+# Shared instance used by the resolvers
+distance_matrix = DistanceMatrix()
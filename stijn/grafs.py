@@ -1,45 +1,121 @@
-import tkinter as tk
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import hashlib
+import os
+import tempfile
 
-class GraphGenerator:
-    def __init__(self, hospital):
-        self.hospital = hospital
+from matplotlib.figure import Figure
 
-    def create_graph_for_hospital(self):
-        """Maak een grafiek voor het geselecteerde ziekenhuis."""
-        # Dynamisch de lijst van producten halen uit de voorraad van het ziekenhuis
-        products = list(self.hospital.inventory.keys())  # Dit haalt de productnamen op
-        inventory = [self.hospital.inventory[product] for product in products]
-        min_inventory = [self.hospital.min_inventory[product] for product in products]  
+# Hier komen de PNG's van render_png terecht, één per ziekenhuis en voorraadtoestand
+CHART_CACHE_DIR = os.path.join(tempfile.gettempdir(), "supply_chain_charts")
 
-        fig, ax = plt.subplots(figsize=(8, 8))  # Grootte van de grafiek
-        bars = ax.bar(products, inventory, label="Stock", color='lightblue')
 
-        # Kleine balkjes voor de minimum voorraad naast de voorraadbalken
-        min_bars = ax.bar([product + '_min' for product in products], min_inventory, width=0.3, label="Min Stock", color='red')
+class InventoryChart:
+    """Eén figuur met voorraad- en minimumbalken, die bij elk ziekenhuis hergebruikt wordt.
 
+    Zolang de producten hetzelfde blijven worden alleen de balkhoogtes en de titel aangepast
+    (set_height + draw_idle) in plaats van telkens een nieuwe figuur en canvas te maken.
+    Zonder Tk kan de grafiek als PNG weggeschreven worden; die bestanden worden hergebruikt
+    zolang de voorraad van het ziekenhuis niet verandert.
+    """
 
-        # Verplaats de minimale voorraad balkjes naar de rechterkant van de hoofdvoorraad balken
-        for i, rect in enumerate(min_bars):
-            rect.set_x(bars[i].get_x() + bars[i].get_width())
+    def __init__(self, figsize=(5, 3), min_color="orange", bar_width=0.35):
+        # Een Figure buiten pyplot, zodat er geen figuren in het pyplot-register achterblijven
+        self.figure = Figure(figsize=figsize)
+        self.ax = self.figure.add_subplot()
+        self.min_color = min_color
+        self.bar_width = bar_width
+        self.products = None
+        self.stock_bars = None
+        self.min_bars = None
+        self.canvas = None
+        self.master = None
 
-        return fig
+    def attach(self, master):
+        """Maak het Tk-canvas in `master` (maar één keer per frame) en geef de widget terug."""
+        if self.canvas is None or self.master is not master:
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+            self.canvas = FigureCanvasTkAgg(self.figure, master=master)
+            self.master = master
+        return self.canvas.get_tk_widget()
+
+    def update(self, hospital):
+        """Toon de voorraad van `hospital`; bouwt de balken alleen opnieuw op als de producten veranderen."""
+        products = list(hospital.inventory.keys())  # Dynamisch de productnamen uit de voorraad halen
+        stocks = [hospital.inventory.get(product, 0) for product in products]
+        min_stocks = [hospital.min_inventory.get(product, 0) for product in products]
+
+        if products != self.products:
+            self._build(products, stocks, min_stocks)
+        else:
+            for bar, height in zip(self.stock_bars, stocks):
+                bar.set_height(height)
+            for bar, height in zip(self.min_bars, min_stocks):
+                bar.set_height(height)
+            self.ax.relim()
+            self.ax.autoscale_view()
+        self.ax.set_title(f"Inventory of {hospital.name}")
+
+        if self.canvas is not None:
+            self.canvas.draw_idle()
+
+    def _build(self, products, stocks, min_stocks):
+        self.ax.clear()
+        positions = range(len(products))
+        self.stock_bars = self.ax.bar([p - self.bar_width / 2 for p in positions], stocks, self.bar_width,
+                                      label="Stock", color='lightblue')
+        self.min_bars = self.ax.bar([p + self.bar_width / 2 for p in positions], min_stocks, self.bar_width,
+                                    label="Min Stock", color=self.min_color)
+        self.ax.set_xlabel('Products')
+        self.ax.set_ylabel('Stock Level')
+        self.ax.set_xticks(list(positions))
+        self.ax.set_xticklabels(products)
+        self.ax.legend()
+        self.products = products
+
+    def render_png(self, hospital, directory=CHART_CACHE_DIR):
+        """Schrijf de grafiek van `hospital` als PNG en geef het pad terug; een bestaande PNG wordt hergebruikt."""
+        # Ook het uiterlijk zit in de sleutel: een andere grootte of kleur is een andere PNG
+        key = hashlib.sha1(repr((hospital.name, sorted(hospital.inventory.items()),
+                                 sorted(hospital.min_inventory.items()), tuple(self.figure.get_size_inches()),
+                                 self.figure.dpi, self.min_color, self.bar_width)).encode("utf-8")).hexdigest()
+        path = os.path.join(directory, f"{key}.png")
+        if not os.path.exists(path):
+            os.makedirs(directory, exist_ok=True)
+            self.update(hospital)
+            temporary = f"{path}.{os.getpid()}.tmp"
+            self.figure.savefig(temporary, format="png")
+            os.replace(temporary, path)  # Nooit een half geschreven PNG in de cache
+        return path
+
+
+class GraphGenerator:
+    def __init__(self, hospital, chart=None):
+        self.hospital = hospital
+        # Geef dezelfde chart mee om figuur en canvas tussen ziekenhuizen te hergebruiken
+        self.chart = chart if chart is not None else InventoryChart(figsize=(8, 8), min_color='red')
+
+    def create_graph_for_hospital(self):
+        """Maak een grafiek voor het geselecteerde ziekenhuis."""
+        self.chart.update(self.hospital)
+        return self.chart.figure
 
     def add_graph_to_canvas(self, figure, graph_frame):
         """Voeg een grafiek toe aan de canvas."""
-        canvas = FigureCanvasTkAgg(figure, graph_frame)
-        canvas_widget = canvas.get_tk_widget()
+        import tkinter as tk  # Alleen hier nodig, zodat headless runs (save_graph) zonder Tk kunnen
+
+        if self.chart.master is graph_frame:
+            return  # Het canvas staat er al, update() heeft het al laten hertekenen
 
         # Verwijder de oude grafiek als die er is
         for widget in graph_frame.winfo_children():
             widget.destroy()
 
-        # Voeg de nieuwe grafiek toe aan het frame met pack voor schaling
+        # Voeg de grafiek toe aan het frame met pack voor schaling
+        canvas_widget = self.chart.attach(graph_frame)
         canvas_widget.pack(fill=tk.BOTH, expand=True, pady=10)
 
         # Teken de grafiek
-        canvas.draw()
+        self.chart.canvas.draw()
 
     def show_graph(self, graph_frame):
         """Toon de grafieken van het geselecteerde ziekenhuis."""
@@ -49,4 +125,8 @@ class GraphGenerator:
         # Voeg de grafiek toe aan de frame
         self.add_graph_to_canvas(fig, graph_frame)
 
-        return fig
\ No newline at end of file
+        return fig
+
+    def save_graph(self, directory=CHART_CACHE_DIR):
+        """Sla de grafiek op als PNG zonder Tk-venster, voor headless runs."""
+        return self.chart.render_png(self.hospital, directory)
@@ -0,0 +1,135 @@
+import argparse
+import os
+import sqlite3
+import time
+from contextlib import contextmanager, nullcontext
+
+from csv_loader import SUPPLY_DB
+from supply_history import HISTORY_INDEX, HISTORY_TABLE
+
+HISTORY_COLUMNS = ("hospital_name", "date", "product", "current_stock", "min_stock", "supplier_stock",
+                   "orders_placed", "restock_time_days", "demand_forecast")
+TEXT_COLUMNS = ("hospital_name", "date", "product")
+# Rows per executemany batch and transaction
+CHUNK_ROWS = 100_000
+
+INSERT_HISTORY = (f"INSERT INTO supply_data ({', '.join(HISTORY_COLUMNS)}) "
+                  f"VALUES ({', '.join('?' * len(HISTORY_COLUMNS))})")
+
+
+class ImportReport:
+    """Rows imported from one file and how long it took."""
+
+    def __init__(self, path, rows, seconds):
+        self.path = path
+        self.rows = rows
+        self.seconds = seconds
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds > 0 else float("inf")
+
+    def __str__(self):
+        return f"{self.path}: {self.rows} rows in {self.seconds:.1f}s ({self.rows_per_second:,.0f} rows/sec)"
+
+
+def read_history_chunks(path, chunk_rows=CHUNK_ROWS):
+    """Stream a CSV or JSONL history file (optionally compressed) as DataFrames of chunk_rows rows."""
+    import pandas as pd
+
+    name = path.lower()
+    for suffix in (".gz", ".bz2", ".xz", ".zst", ".zip"):
+        name = name.removesuffix(suffix)
+    if name.endswith((".jsonl", ".ndjson", ".json")):
+        reader = pd.read_json(path, lines=True, chunksize=chunk_rows, dtype=False)
+    else:
+        reader = pd.read_csv(path, chunksize=chunk_rows, dtype={column: str for column in TEXT_COLUMNS},
+                             usecols=lambda column: column in HISTORY_COLUMNS)
+    with reader:
+        yield from reader
+
+
+def history_rows(frame):
+    """History rows of a chunk as parameter tuples, with missing values as NULL."""
+    columns = []
+    for column in HISTORY_COLUMNS:
+        if column not in frame:
+            columns.append([None] * len(frame))
+            continue
+        values = frame[column]
+        if values.hasnans:
+            values = values.astype(object).where(values.notna(), None)
+        elif column not in TEXT_COLUMNS:
+            values = values.astype("int64")
+        columns.append(values.tolist())
+    return list(zip(*columns))
+
+
+@contextmanager
+def deferred_indexes(connection, report=print):
+    """Drop the supply_data indexes for the duration of the block and rebuild them once at the end,
+    also when the block fails; much faster than updating them for every inserted row."""
+    indexes = connection.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'supply_data' AND sql IS NOT NULL"
+    ).fetchall()
+    with connection:
+        for name, _ in indexes:
+            connection.execute(f"DROP INDEX {name}")
+    try:
+        yield
+    finally:
+        started = time.perf_counter()
+        with connection:
+            for _, sql in indexes:
+                connection.execute(sql)
+        if report and indexes:
+            report(f"Rebuilt {len(indexes)} index(es) in {time.perf_counter() - started:.1f}s")
+
+
+def import_history(path, connection, chunk_rows=CHUNK_ROWS, defer_indexes=True, report=print):
+    """Append a history file to the supply_data table of a sqlite3 connection, one transaction per chunk.
+
+    Progress is passed to `report` after every chunk. With defer_indexes the indexes are rebuilt
+    after the import (see deferred_indexes); pass False when the caller already defers them.
+    """
+    rows = 0
+    started = time.perf_counter()
+    with deferred_indexes(connection, report) if defer_indexes else nullcontext():
+        for frame in read_history_chunks(path, chunk_rows):
+            with connection:
+                connection.executemany(INSERT_HISTORY, history_rows(frame))
+            rows += len(frame)
+            if report:
+                elapsed = time.perf_counter() - started
+                report(f"{path}: {rows} rows, {rows / max(elapsed, 1e-9):,.0f} rows/sec")
+    return ImportReport(path, rows, time.perf_counter() - started)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import supply_data history files (CSV or JSONL) into SQLite.")
+    parser.add_argument("paths", nargs="+", help="history files, optionally compressed")
+    parser.add_argument("--db", default=SUPPLY_DB, help="SQLite database (default: %(default)s)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="rows per transaction")
+    parser.add_argument("--keep-indexes", action="store_true", help="update indexes while importing")
+    args = parser.parse_args(argv)
+
+    missing = [path for path in args.paths if not os.path.exists(path)]
+    if missing:
+        parser.error(f"not found: {', '.join(missing)}")
+
+    # Only the history table and its index: the network store lives in its own database
+    connection = sqlite3.connect(args.db)
+    try:
+        with connection:
+            connection.execute(HISTORY_TABLE)
+        with nullcontext() if args.keep_indexes else deferred_indexes(connection):
+            for path in args.paths:
+                print(import_history(path, connection, args.chunk_rows, defer_indexes=False))
+        with connection:
+            connection.execute(HISTORY_INDEX)  # So read-only history queries can use it
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
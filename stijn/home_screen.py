@@ -1,13 +1,17 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import pandas as pd
+from csv_loader import HOSPITALS_CSV, SUPPLIERS_CSV
+from network_store import NetworkStore, load_store_state
+from lazy_table import LazyTable
 
 class HomeScreen:
-    def __init__(self, root, show_simulation_content_callback):
+    def __init__(self, root, show_simulation_content_callback, data_saved_callback=None):
         self.root = root
         self.show_simulation_content_callback = show_simulation_content_callback
+        self.data_saved_callback = data_saved_callback  # Called after edits were saved to the network store
         self.data = None
         self.file_path = None
+        self.entity_type = None
         self.filename = "normal"
 
     def create_home_screen(self):
@@ -75,14 +79,17 @@ class HomeScreen:
                   bg="#34a853", fg="white").pack(pady=10)
 
     def load_csv_data(self, entity_type):
-        """Loads CSV data for the selected entity type."""
+        """Loads the stored data for the selected entity type (imported from its CSV the first time)."""
         if entity_type == "hospital":
-            self.file_path = fr"C:\creativity\Team-4-Ctrl-Alt-Defeat-OMP\stijn\other_required_files\Hospitals.csv"
+            self.file_path = HOSPITALS_CSV
         else:
-            self.file_path = fr"C:\creativity\Team-4-Ctrl-Alt-Defeat-OMP\stijn\other_required_files\Suppliers.csv"
+            self.file_path = SUPPLIERS_CSV
+        self.entity_type = entity_type
 
         try:
-            self.data = pd.read_csv(self.file_path)
+            load_store_state(entity_type)
+            with NetworkStore() as store:
+                self.data = store.table(entity_type)
         except FileNotFoundError:
             messagebox.showerror("File Not Found", f"{self.file_path} not found. Please ensure the file exists.")
             return
@@ -101,8 +108,7 @@ class HomeScreen:
         tk.Label(dialog, text=f"Select affected {entity_type}s:", font=("Arial", 12)).pack(pady=10)
 
         listbox = tk.Listbox(dialog, selectmode=tk.MULTIPLE, height=15)
-        for option in unique_options:
-            listbox.insert(tk.END, option)
+        listbox.insert(tk.END, *unique_options)  # One Tk call, also for very long lists
         listbox.pack(padx=10, pady=10, fill="both", expand=True)
 
         selected_values = []
@@ -123,35 +129,19 @@ class HomeScreen:
         edit_win.title("Edit Data")
         edit_win.geometry("1200x500")
 
-        frame = tk.Frame(edit_win)
-        frame.pack(fill="both", expand=True, padx=10, pady=10)
-
-        tree_scroll = ttk.Scrollbar(frame, orient="vertical")
-        tree_scroll.pack(side="right", fill="y")
-
-        # Dynamically create treeview with CSV columns
+        # Only the rows in view are put in the tree, fetched as the user scrolls
         columns = list(self.data.columns)
-        tree = ttk.Treeview(frame, columns=columns, show="headings", yscrollcommand=tree_scroll.set, height=10)
-        tree.pack(fill="both", expand=True)
-        tree_scroll.config(command=tree.yview)
-
-        for col in columns:
-            tree.heading(col, text=col)
-            tree.column(col, width=150)
-
-        filtered_data = self.data[self.data["name"].isin(selected_entities)]
-        for _, row in filtered_data.iterrows():
-            tree.insert("", "end", values=tuple(row))
+        rows = self.data["name"].isin(selected_entities).to_numpy().nonzero()[0]
+        table = LazyTable(edit_win, self.data, rows, height=10)
+        table.pack(fill="both", expand=True, padx=10, pady=10)
+        names = self.data["name"]  # Entity name as stored; edits stay in table.edits until they are saved
 
         def update_cell(event):
             """Allows double-click editing of table cells."""
-            selected_item = tree.selection()
-            if not selected_item:
+            cell = table.cell_at(event)
+            if cell is None:
                 return
-
-            col = tree.identify_column(event.x)  # Column clicked
-            row_id = tree.identify_row(event.y)  # Row clicked
-            col_index = int(col[1:]) - 1  # Convert '#1' to index 0
+            position, col_index = cell
 
             entry_popup = tk.Toplevel(edit_win)
             entry_popup.geometry("200x90")
@@ -167,39 +157,31 @@ class HomeScreen:
             def save_edit():
                 new_value = new_value_var.get()
                 if new_value:
-                    tree.item(selected_item, values=[new_value if i == col_index else val
-                                                     for i, val in enumerate(tree.item(selected_item)["values"])])
+                    try:
+                        table.set_value(position, col_index, new_value)
+                    except ValueError as error:
+                        messagebox.showerror("Invalid Value", str(error), parent=entry_popup)
+                        return
                 entry_popup.destroy()
 
             tk.Button(entry_popup, text="Save", command=save_edit).pack()
 
-        tree.bind("<Double-1>", update_cell)  # Bind double-click to edit cells
+        table.tree.bind("<Double-1>", update_cell)  # Bind double-click to edit cells
 
         def update_csv():
-            """Updates the CSV with modified values, preserving unchanged data."""
-            updated_data = []
-            
-            # Extract modified data from the table
-            for row in tree.get_children():
-                values = tree.item(row)["values"]
-                updated_data.append(values)
-
-            # Convert updated data into a DataFrame
-            new_df = pd.DataFrame(updated_data, columns=columns)
-
-            # Merge updated data back into the original dataset
-            self.data.set_index("name", inplace=True)  # Assuming "name" is the unique identifier
-            new_df.set_index("name", inplace=True)
-
-            self.data.update(new_df)  # Update only the modified rows
-
-            # Reset index before saving
-            self.data.reset_index(inplace=True)
-
-            # Save the full dataset to CSV
-            self.data.to_csv(self.file_path, index=False)
-            messagebox.showinfo("Success", f"Data saved successfully to {self.file_path}")
+            """Saves only the edited cells, each as a single-row UPDATE in the network store."""
+            changes = [(names.iat[position], column, value) for position, column, value in table.edits.by_column_name()]
+            try:
+                with NetworkStore() as store:
+                    saved = store.update_cells(self.entity_type, changes)
+            except ValueError as error:
+                messagebox.showerror("Invalid Value", f"Nothing was saved: {error}")
+                return
+            table.commit_edits()  # self.data now matches the store, without reloading it
+            messagebox.showinfo("Success", f"{saved} change(s) saved successfully to {store.path}")
             edit_win.destroy()
+            if saved and self.data_saved_callback is not None:
+                self.data_saved_callback()
 
         save_btn = tk.Button(edit_win, text="Save Changes", command=update_csv, font=("Arial", 12),
                              bg="#4285f4", fg="white", width=15, height=2)
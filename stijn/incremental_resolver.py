@@ -0,0 +1,202 @@
+from itertools import groupby
+
+import numpy as np
+
+from allocation_records import shortage_records, solution_lines
+from network_state import NetworkState
+from time_simulation import NearestResolver
+
+
+def _single_state(entities):
+    """The NetworkState all these entity views share."""
+    states = {id(entity.state): entity.state for entity in entities}
+    if len(states) != 1:
+        raise ValueError("Incremental resolving needs entities loaded from one network state")
+    state = next(iter(states.values()))
+    if len(state) != len(entities):
+        raise ValueError("Incremental resolving needs every entity of the network state")
+    return state
+
+
+class AllocationPlan:
+    """Transfers of one solve as parallel arrays: hospital row, source row, product column, amount, km."""
+
+    def __init__(self, hospitals=None, sources=None, products=None, amounts=None, distances=None):
+        empty = np.zeros(0, dtype=np.int64)
+        self.hospitals = empty if hospitals is None else hospitals
+        self.sources = empty if sources is None else sources
+        self.products = empty if products is None else products
+        self.amounts = empty if amounts is None else amounts
+        self.distances = np.zeros(0) if distances is None else distances
+
+    @classmethod
+    def from_transfers(cls, transfers):
+        """Build a plan from the chunks NearestResolver.resolve appends to its `transfers` list."""
+        if not transfers:
+            return cls()
+        hospitals, sources, products, amounts, distances = zip(*transfers)
+        plan = cls(
+            np.concatenate(hospitals).astype(np.int64),
+            np.concatenate(sources).astype(np.int64),
+            np.concatenate([np.full(len(chunk), product) for chunk, product in zip(hospitals, products)]),
+            np.concatenate(amounts).astype(np.int64),
+            np.concatenate(distances).astype(np.float64),
+        )
+        return plan.select(plan.amounts > 0)
+
+    def select(self, mask):
+        return AllocationPlan(self.hospitals[mask], self.sources[mask], self.products[mask], self.amounts[mask],
+                              self.distances[mask])
+
+    def merge(self, other):
+        return AllocationPlan(*(np.concatenate([getattr(self, key), getattr(other, key)])
+                                for key in ("hospitals", "sources", "products", "amounts", "distances")))
+
+    def apply(self, stock):
+        """Move the planned units in `stock` (in place)."""
+        np.subtract.at(stock, (self.sources, self.products), self.amounts)
+        np.add.at(stock, (self.hospitals, self.products), self.amounts)
+
+
+class IncrementalResolver:
+    """Re-resolve only the shortages an edit can have affected, and keep every other transfer.
+
+    The first solve (or one after hospitals, suppliers, products or coordinates changed) resolves
+    everything with a NearestResolver. After that, the new stock and minimums are compared with
+    the previous ones; per product, a shortage is re-solved when its hospital changed, when one of
+    the sources it used or one of its nearest candidates changed, or when it was left unresolved
+    and a changed entity now has more to give. Transfers of all other shortages are reused as is.
+    """
+
+    def __init__(self):
+        self._names = None
+        self._products = None
+        self._n_hospitals = None
+        self._coordinates = None
+        self._stock = None  # Stock and minimums as loaded, before any transfers
+        self._min_stock = None
+        self._plan = AllocationPlan()
+        self._resolver = None
+        self._candidate_owners = None
+        self._records = {}  # (hospital row, product column) -> Allocation records
+        self.last_resolved = 0  # Shortages re-solved by the last call, for diagnostics
+
+    def resolve(self, hospitals, suppliers, records=None, minimums=None, on_solution=None, check_cancelled=None):
+        """Resolve the shortages of these hospitals, moving stock in place; returns the solution lines.
+
+        The Allocation records behind the lines are appended to `records` when given, and handed to
+        on_solution per hospital, as the other resolvers do. `minimums` (a supply_history.DemandProfile)
+        replaces the hospitals' static minimums where it has history. check_cancelled() is called
+        before each product is solved; when it raises, the stock is left as it was and the next call
+        re-solves everything this one would have.
+        """
+        hospital_state, supplier_state = _single_state(hospitals), _single_state(suppliers)
+        state = NetworkState.concatenate(hospital_state, supplier_state)
+        n_hospitals = len(hospital_state)
+        if minimums is not None:
+            state.min_stock[:n_hospitals] = minimums.apply(state.names[:n_hospitals], state.products,
+                                                           state.min_stock[:n_hospitals])
+
+        if self._can_reuse(state, n_hospitals):
+            invalid = self._invalidated(state)
+        else:
+            self._reset(state, n_hospitals)
+            invalid = np.ones((n_hospitals, len(state.products)), dtype=bool)
+
+        kept = self._plan.select(~invalid[self._plan.hospitals, self._plan.products])
+        stock = state.stock.copy()
+        kept.apply(stock)
+
+        deficit = state.min_stock[:n_hospitals] - stock[:n_hospitals]
+        short_hospitals, short_products = np.nonzero((deficit > 0) & invalid)
+        transfers = []
+        if len(short_hospitals):
+            self._resolver.resolve(stock, state.min_stock, short_hospitals, short_products, deficit, transfers,
+                                   check_cancelled)
+        self._plan = kept.merge(AllocationPlan.from_transfers(transfers))
+        self.last_resolved = len(short_hospitals)
+
+        self._stock, self._min_stock = state.stock, state.min_stock
+        for key in [key for key in self._records if invalid[key]]:
+            del self._records[key]
+        self._write_back(stock, hospital_state, supplier_state, state.products)
+        solution = self._solution_records(state, n_hospitals)
+        if records is not None:
+            records.extend(solution)
+        if on_solution is not None:
+            for _, hospital_records in groupby(solution, key=lambda record: record.recipient):
+                on_solution(list(hospital_records))
+        return solution_lines(solution)
+
+    def _can_reuse(self, state, n_hospitals):
+        return (self._stock is not None and self._names == state.names and self._products == state.products
+                and self._n_hospitals == n_hospitals and np.array_equal(self._coordinates, state.coordinates))
+
+    def _reset(self, state, n_hospitals):
+        self._names, self._products, self._n_hospitals = state.names, state.products, n_hospitals
+        self._coordinates = state.coordinates.copy()
+        self._resolver = NearestResolver(self._coordinates, n_hospitals)
+        self._stock = self._min_stock = None  # Until this solve completes
+        self._plan = AllocationPlan()
+        self._records = {}
+
+        # Reverse candidate index: which hospitals have this entity among their nearest candidates
+        candidates = self._resolver.candidates
+        owners = np.repeat(np.arange(n_hospitals), candidates.shape[1])
+        order = np.argsort(candidates.ravel(), kind="stable")
+        self._candidate_owners = (owners[order], np.searchsorted(candidates.ravel()[order], np.arange(len(state) + 1)))
+
+    def _invalidated(self, state):
+        """Boolean hospital x product matrix of the shortages that have to be solved again."""
+        n_hospitals = self._n_hospitals
+        changed = (state.stock != self._stock) | (state.min_stock != self._min_stock)
+        invalid = changed[:n_hospitals].copy()
+        if not changed.any():
+            return invalid
+
+        # Shortages that took stock from a changed source
+        plan = self._plan
+        used_changed = changed[plan.sources, plan.products]
+        invalid[plan.hospitals[used_changed], plan.products[used_changed]] = True
+
+        # Shortages with a changed entity among their nearest candidates
+        owners, starts = self._candidate_owners
+        for entity, product in zip(*np.nonzero(changed)):
+            invalid[owners[starts[entity]:starts[entity + 1]], product] = True
+
+        # Unresolved shortages may now be covered by an entity that has more to give
+        gained = (state.stock - state.min_stock > self._stock - self._min_stock).any(axis=0)
+        if gained.any():
+            stock = self._stock.copy()
+            plan.apply(stock)
+            unresolved = self._min_stock[:n_hospitals] > stock[:n_hospitals]
+            invalid |= unresolved & gained
+        return invalid
+
+    def _write_back(self, stock, hospital_state, supplier_state, products):
+        columns = {product: column for column, product in enumerate(products)}
+        n_hospitals = len(hospital_state)
+        hospital_state.stock[...] = stock[:n_hospitals, [columns[product] for product in hospital_state.products]]
+        supplier_state.stock[...] = stock[n_hospitals:, [columns[product] for product in supplier_state.products]]
+
+    def _solution_records(self, state, n_hospitals):
+        """Allocation records in the order of the other resolvers, rebuilt only for re-solved shortages."""
+        plan = self._plan
+        deficit = state.min_stock[:n_hospitals] - state.stock[:n_hospitals]
+        short_hospitals, short_products = np.nonzero(deficit > 0)
+        missing = [key for key in zip(short_hospitals.tolist(), short_products.tolist()) if key not in self._records]
+        if missing:
+            order = np.lexsort((plan.distances, plan.products, plan.hospitals))
+            keys = plan.hospitals[order] * len(state.products) + plan.products[order]
+            for hospital, product in missing:
+                key = hospital * len(state.products) + product
+                used = order[np.searchsorted(keys, key, "left"):np.searchsorted(keys, key, "right")]
+                remaining_shortage = int(deficit[hospital, product] - plan.amounts[used].sum())
+                sources = [(state.names[source], amount, distance)
+                           for source, amount, distance in zip(plan.sources[used].tolist(),
+                                                               plan.amounts[used].tolist(),
+                                                               plan.distances[used].tolist())]
+                self._records[hospital, product] = shortage_records(state.names[hospital], state.products[product],
+                                                                    sources, remaining_shortage)
+
+        return [record for key in zip(short_hospitals.tolist(), short_products.tolist()) for record in self._records[key]]
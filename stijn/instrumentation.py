@@ -0,0 +1,154 @@
+import cProfile
+import io
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Comma-separated modes: "timers", "profile" (cProfile, implies timers), "memory" (tracemalloc, implies timers)
+INSTRUMENTATION_ENV = "SUPPLY_CHAIN_INSTRUMENT"
+REPORT_FILE = "run_report.txt"
+# Lines of the cProfile and tracemalloc listings in a report
+REPORT_TOP = 25
+
+
+class _NoTimer:
+    """What timer() returns while instrumentation is off: a context manager that does nothing."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_TIMER = _NoTimer()
+
+
+class _Timer:
+    __slots__ = ("instrumentation", "name", "started")
+
+    def __init__(self, instrumentation, name):
+        self.instrumentation = instrumentation
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.instrumentation.add_time(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class Instrumentation:
+    """Named timers and counters around the pipeline stages, with optional cProfile/tracemalloc capture.
+
+    Everything is off by default: timer() then hands out one shared no-op context manager and
+    count() returns at once, so the hooks cost a flag check. Measurements pile up until
+    write_report() writes them (usually next to output.txt) and starts over.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.profile = False
+        self.trace_memory = False
+        self.timers = {}  # name -> [calls, total seconds]
+        self.counters = {}
+        self._profiles = []  # pstats input of every profiled run
+        self._memory = None  # (peak bytes, top allocation lines) of the last traced run
+
+    def configure(self, timers=True, profile=False, trace_memory=False):
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.enabled = timers or profile or trace_memory
+
+    def configure_from_env(self):
+        """Configure from the SUPPLY_CHAIN_INSTRUMENT environment variable (off when it is unset)."""
+        modes = {mode.strip().lower() for mode in os.environ.get(INSTRUMENTATION_ENV, "").split(",") if mode.strip()}
+        self.configure(timers=bool(modes), profile="profile" in modes, trace_memory="memory" in modes)
+
+    def timer(self, name):
+        """Context manager adding the time spent in it to timer `name`."""
+        if not self.enabled:
+            return _NO_TIMER
+        return _Timer(self, name)
+
+    def add_time(self, name, seconds):
+        entry = self.timers.setdefault(name, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextmanager
+    def run(self, name="run"):
+        """Time a whole run; with profile/memory on, also capture it with cProfile and tracemalloc.
+
+        cProfile only sees the thread it was started in, so wrap the code on the thread that does the work.
+        """
+        if not self.enabled:
+            yield
+            return
+        profiler = cProfile.Profile() if self.profile else None
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            with self.timer(name):
+                yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self._profiles.append(profiler)
+            if self.trace_memory and tracemalloc.is_tracing():
+                _, peak = tracemalloc.get_traced_memory()
+                top = tracemalloc.take_snapshot().statistics("lineno")[:REPORT_TOP]
+                self._memory = (peak, [str(statistic) for statistic in top])
+                if started_tracing:
+                    tracemalloc.stop()
+
+    def reset(self):
+        self.timers = {}
+        self.counters = {}
+        self._profiles = []
+        self._memory = None
+
+    def report(self):
+        """The measurements so far as text."""
+        lines = [f"Run report {time.strftime('%Y-%m-%d %H:%M:%S')}", "", "Timers:"]
+        lines += [f"  {name:<40} {calls:>7} calls {total:10.4f} s {1000 * total / calls:10.3f} ms/call"
+                  for name, (calls, total) in sorted(self.timers.items(), key=lambda item: -item[1][1])]
+        if self.counters:
+            lines += ["", "Counters:"]
+            lines += [f"  {name:<40} {value:>12}" for name, value in sorted(self.counters.items())]
+        if self._memory is not None:
+            peak, top = self._memory
+            lines += ["", f"Memory: peak {peak / 2 ** 20:.1f} MiB, largest allocations:"]
+            lines += [f"  {line}" for line in top]
+        if self._profiles:
+            text = io.StringIO()
+            stats = pstats.Stats(self._profiles[0], stream=text)
+            for profiler in self._profiles[1:]:
+                stats.add(profiler)
+            stats.sort_stats("cumulative").print_stats(REPORT_TOP)
+            lines += ["", "Profile (cumulative):", text.getvalue()]
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, path=REPORT_FILE):
+        """Write the report to `path` and start collecting anew; does nothing while instrumentation is off."""
+        if not self.enabled:
+            return None
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(self.report())
+        self.reset()
+        return path
+
+
+instrumentation = Instrumentation()
+instrumentation.configure_from_env()
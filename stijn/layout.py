@@ -8,8 +8,8 @@ class Layout:
         self.root.geometry("1200x800")  # Make the window larger (800x600)
         
         # Initialize frames for home and simulation
-        self.home_screen = HomeScreen(self.root, self.show_simulation_content)
         self.simulation_screen = SupplyChainSimulation(self.root)
+        self.home_screen = HomeScreen(self.root, self.show_simulation_content, self.simulation_screen.data_saved)
 
     def show_home_content(self):
         self.home_screen.create_home_screen()
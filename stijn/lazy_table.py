@@ -0,0 +1,98 @@
+import numpy as np
+
+from cell_changes import ChangeSet
+from virtual_tree import VirtualTree
+
+# Rows fetched beyond the visible window on both sides, so short scrolls need no new fetch
+FETCH_BUFFER_ROWS = 100
+
+
+class LazyTable(VirtualTree):
+    """An editable Treeview over a DataFrame that only holds the rows in view.
+
+    Rows are fetched as array slices with itertuples, FETCH_BUFFER_ROWS around the visible window
+    at a time, so opening a file costs no more than reading it. Edited cells live in a ChangeSet
+    overlay that is shown on top of the data until the editor saves and calls commit_edits().
+    """
+
+    def __init__(self, master, data=None, rows=None, height=20, column_width=150):
+        super().__init__(master, height=height)
+        self.data = None
+        self.columns = []
+        self.positions = np.zeros(0, dtype=np.int64)  # Data row positions shown, in order
+        self.edits = None  # ChangeSet over data
+        self.column_width = column_width
+        self._items = {}  # Tree item -> row position, for the rows on screen
+        self._fetched = (0, [])  # (first index into positions, row tuples) around the window
+        if data is not None:
+            self.set_data(data, rows)
+
+    def set_data(self, data, rows=None):
+        """Show `data`, or only the row positions in `rows`; drops any edits."""
+        self.data = data
+        self.columns = list(data.columns)
+        self.positions = np.arange(len(data)) if rows is None else np.asarray(rows, dtype=np.int64)
+        self.edits = ChangeSet(data)
+        self.offset = 0
+        self._fetched = (0, [])
+
+        self.tree.delete(*self.tree.get_children())
+        self.tree["columns"] = self.columns
+        for column in self.columns:
+            self.tree.heading(column, text=column, anchor="center")
+            self.tree.column(column, width=self.column_width, anchor="center")
+        self.render()
+
+    def cell_at(self, event):
+        """(row position, column index) of the cell under a mouse event, or None."""
+        item = self.tree.identify_row(event.y)
+        column = self.tree.identify_column(event.x)
+        if item not in self._items or not column:
+            return None
+        return self._items[item], int(column[1:]) - 1
+
+    def value(self, position, column):
+        """The cell as shown: the edited value if there is one, else the data."""
+        if (position, column) in self.edits:
+            return self.edits[position, column]
+        return self.data.iat[position, column]
+
+    def set_value(self, position, column, value):
+        """Put an edited value in the overlay and show it; raises ValueError when it does not fit the column."""
+        value = self.edits.set(position, column, value)
+        for item, item_position in self._items.items():
+            if item_position == position:
+                values = list(self.tree.item(item, "values"))
+                values[column] = value
+                self.tree.item(item, values=values)
+        return value
+
+    def commit_edits(self):
+        """Write the overlay into the data in place (after a save) and start a new one."""
+        self.edits.apply()
+        self.edits.clear()
+        self._fetched = (0, [])
+        self.render()
+
+    def row_count(self):
+        return len(self.positions)
+
+    def _insert_rows(self, start, stop):
+        self._items = {}
+        for position, values in self._fetch(start, stop):
+            self._items[self.tree.insert("", "end", values=values)] = position
+
+    def _fetch(self, start, stop):
+        """[(row position, values), ...] for positions[start:stop], from the fetched window when it covers them."""
+        first, fetched = self._fetched
+        if not (first <= start and stop <= first + len(fetched)):
+            first = max(0, start - FETCH_BUFFER_ROWS)
+            window = self.positions[first:stop + FETCH_BUFFER_ROWS]
+            fetched = list(zip(window.tolist(), self.data.iloc[window].itertuples(index=False, name=None)))
+            self._fetched = (first, fetched)
+
+        rows = fetched[start - first:stop - first]
+        if not self.edits:
+            return rows
+        return [(position, tuple(self.edits.get((position, column), value) for column, value in enumerate(values)))
+                for position, values in rows]
@@ -0,0 +1,116 @@
+import argparse
+import csv
+import os
+
+import numpy as np
+
+from csv_loader import product_mapping
+from network_state import NetworkState
+
+# (city, latitude, longitude, relative size): entities cluster around these
+BELGIAN_CITIES = [
+    ("Brussel", 50.8503, 4.3517, 12),
+    ("Antwerpen", 51.2194, 4.4025, 9),
+    ("Gent", 51.0543, 3.7174, 6),
+    ("Charleroi", 50.4108, 4.4446, 4),
+    ("Liège", 50.6326, 5.5797, 4),
+    ("Brugge", 51.2093, 3.2247, 3),
+    ("Namur", 50.4674, 4.8720, 2),
+    ("Leuven", 50.8798, 4.7005, 2),
+    ("Mons", 50.4542, 3.9567, 2),
+    ("Aalst", 50.9378, 4.0403, 2),
+    ("Mechelen", 51.0259, 4.4776, 2),
+    ("Hasselt", 50.9307, 5.3325, 2),
+    ("Kortrijk", 50.8280, 3.2649, 2),
+    ("Oostende", 51.2154, 2.9286, 2),
+    ("Genk", 50.9650, 5.5008, 1),
+    ("Sint-Niklaas", 51.1650, 4.1437, 1),
+    ("Roeselare", 50.9465, 3.1227, 1),
+    ("Tournai", 50.6056, 3.3878, 1),
+    ("Verviers", 50.5891, 5.8667, 1),
+    ("Arlon", 49.6833, 5.8167, 1),
+]
+# Spread around a city centre, in degrees latitude (about 9 km)
+CLUSTER_SPREAD = 0.08
+# Share of the entities that are suppliers
+SUPPLIER_SHARE = 0.15
+# Network sizes (hospitals + suppliers) the benchmarks run at
+BENCHMARK_SIZES = (10, 1_000, 10_000, 100_000)
+
+
+def clustered_coordinates(count, rng):
+    """(count, 2) coordinates scattered around Belgian cities, weighted by city size."""
+    cities = np.array([(latitude, longitude) for _, latitude, longitude, _ in BELGIAN_CITIES])
+    weights = np.array([size for _, _, _, size in BELGIAN_CITIES], dtype=np.float64)
+    chosen = rng.choice(len(cities), size=count, p=weights / weights.sum())
+    centres = cities[chosen]
+    offsets = rng.normal(scale=CLUSTER_SPREAD, size=(count, 2))
+    offsets[:, 1] /= np.cos(np.radians(centres[:, 0]))  # Same spread in km east-west
+    return centres + offsets, chosen
+
+
+def generate_network(entities, seed=0, products=tuple(product_mapping)):
+    """Random (hospital state, supplier state) with `entities` rows in total.
+
+    About a fifth of the hospital stock cells start below their minimum; suppliers only carry
+    some of the products, like the sample data.
+    """
+    rng = np.random.default_rng(seed)
+    n_suppliers = max(1, int(round(entities * SUPPLIER_SHARE))) if entities > 1 else 0
+    n_hospitals = entities - n_suppliers
+    product_names = [product_mapping.get(product, product) for product in products]
+    shape = (n_hospitals, len(products))
+
+    coordinates, cities = clustered_coordinates(n_hospitals, rng)
+    min_stock = rng.integers(2, 31, size=shape) * 10
+    stock = np.round(min_stock * rng.lognormal(mean=0.4, sigma=0.5, size=shape)).astype(np.int64)
+    names = [f"Hospital {BELGIAN_CITIES[city][0]} {row + 1}" for row, city in enumerate(cities.tolist())]
+    hospitals = NetworkState(names, product_names, stock, min_stock=min_stock, coordinates=coordinates)
+
+    coordinates, cities = clustered_coordinates(n_suppliers, rng)
+    carries = rng.random((n_suppliers, len(products))) < 0.7
+    stock = np.where(carries, rng.integers(0, 51, size=carries.shape) * 10, 0)
+    production = np.where(carries, rng.integers(0, 26, size=carries.shape) * 10, 0)
+    names = [f"Supplier {BELGIAN_CITIES[city][0]} {row + 1}" for row, city in enumerate(cities.tolist())]
+    suppliers = NetworkState(names, product_names, stock, production=production, coordinates=coordinates)
+    return hospitals, suppliers
+
+
+def write_network_csv(state, path, kind):
+    """Write a NetworkState in the Hospitals.csv / Suppliers.csv layout."""
+    suffix_of = {name: suffix for suffix, name in product_mapping.items()}
+    suffixes = [suffix_of.get(product, product) for product in state.products]
+    second_prefix, second = ("min_stock_", state.min_stock) if kind == "hospital" else ("production_", state.production)
+
+    with open(path, "w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(["name"] + ["stock_" + suffix for suffix in suffixes]
+                        + [second_prefix + suffix for suffix in suffixes] + ["coordinates"])
+        coordinates = (f"{latitude:.4f}, {longitude:.4f}" for latitude, longitude in state.coordinates.tolist())
+        writer.writerows([name, *stock, *values, coordinate] for name, stock, values, coordinate
+                         in zip(state.names, state.stock.tolist(), second.tolist(), coordinates))
+
+
+def write_network(directory, entities, seed=0):
+    """Generate a network and write Hospitals.csv and Suppliers.csv into `directory`; returns both paths."""
+    os.makedirs(directory, exist_ok=True)
+    hospitals, suppliers = generate_network(entities, seed)
+    hospitals_csv = os.path.join(directory, "Hospitals.csv")
+    suppliers_csv = os.path.join(directory, "Suppliers.csv")
+    write_network_csv(hospitals, hospitals_csv, "hospital")
+    write_network_csv(suppliers, suppliers_csv, "supplier")
+    return hospitals_csv, suppliers_csv
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Belgian hospital/supplier network.")
+    parser.add_argument("entities", type=int, help="hospitals + suppliers")
+    parser.add_argument("directory", help="where Hospitals.csv and Suppliers.csv are written")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for path in write_network(args.directory, args.entities, args.seed):
+        print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
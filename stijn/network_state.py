@@ -0,0 +1,271 @@
+from collections.abc import MutableMapping
+
+import numpy as np
+
+
+class NetworkState:
+    """Columnar stock data for a group of entities: one entity x product matrix per quantity."""
+
+    def __init__(self, names, products, stock, min_stock=None, production=None, coordinates=None):
+        self.names = list(names)
+        self.products = list(products)
+        self.index = {name: row for row, name in enumerate(self.names)}
+        self.product_index = {product: column for column, product in enumerate(self.products)}
+
+        shape = (len(self.names), len(self.products))
+        self.stock = self._matrix(stock, shape)
+        self.min_stock = self._matrix(min_stock, shape)
+        self.production = self._matrix(production, shape)
+        if coordinates is None:
+            self.coordinates = np.zeros((shape[0], 2))
+        else:
+            self.coordinates = np.asarray(coordinates, dtype=np.float64).reshape(shape[0], 2)
+
+    @staticmethod
+    def _matrix(values, shape):
+        if values is None:
+            return np.zeros(shape, dtype=np.int64)
+        return np.asarray(values, dtype=np.int64).reshape(shape)
+
+    def __len__(self):
+        return len(self.names)
+
+    def row(self, name):
+        """Row index of the entity with this name."""
+        return self.index[name]
+
+    def shortages(self):
+        """Boolean entity x product matrix of stock below the minimum."""
+        return self.stock < self.min_stock
+
+    @classmethod
+    def concatenate(cls, *states):
+        """Stack several states (e.g. hospitals then suppliers) into one, aligning their products."""
+        products = list(dict.fromkeys(product for state in states for product in state.products))
+        columns = {product: column for column, product in enumerate(products)}
+        n_rows = sum(len(state) for state in states)
+        matrices = {key: np.zeros((n_rows, len(products)), dtype=np.int64)
+                    for key in ("stock", "min_stock", "production")}
+
+        start = 0
+        for state in states:
+            rows = slice(start, start + len(state))
+            state_columns = [columns[product] for product in state.products]
+            for key, matrix in matrices.items():
+                matrix[rows, state_columns] = getattr(state, key)
+            start += len(state)
+
+        names = [name for state in states for name in state.names]
+        coordinates = np.concatenate([state.coordinates for state in states]) if states else None
+        return cls(names, products, coordinates=coordinates, **matrices)
+
+    def copy(self):
+        return NetworkState(self.names, self.products, self.stock.copy(), min_stock=self.min_stock.copy(),
+                            production=self.production.copy(), coordinates=self.coordinates.copy())
+
+    def entities(self, entity_class):
+        """Hospital or Supplier views on every row of this state."""
+        return [entity_class.view(self, row) for row in range(len(self))]
+
+
+def copy_entities(entities):
+    """The same entity views on copies of their states, to solve on without touching the originals."""
+    copies = {}
+    result = []
+    for entity in entities:
+        state = copies.get(id(entity.state))
+        if state is None:
+            state = copies[id(entity.state)] = entity.state.copy()
+        result.append(type(entity).view(state, entity.row))
+    return result
+
+
+class ProductRow(MutableMapping):
+    """Dict-like view on one entity's row of a product matrix, keyed by product name."""
+
+    __slots__ = ("_matrix", "_row", "_product_index")
+
+    def __init__(self, matrix, row, product_index):
+        self._matrix = matrix
+        self._row = row
+        self._product_index = product_index
+
+    def __getitem__(self, product):
+        return int(self._matrix[self._row, self._product_index[product]])
+
+    def __setitem__(self, product, value):
+        self._matrix[self._row, self._product_index[product]] = value
+
+    def __delitem__(self, product):
+        raise TypeError("Products cannot be removed from a network state row")
+
+    def __iter__(self):
+        return iter(self._product_index)
+
+    def __len__(self):
+        return len(self._product_index)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def as_array(self):
+        """The underlying matrix row (no copy)."""
+        return self._matrix[self._row]
+
+
+class _Entity:
+    """Shared plumbing for entities that are a row of a NetworkState."""
+
+    def _bind(self, state, row):
+        self.state = state
+        self.row = row
+        self.name = state.names[row]
+
+    @classmethod
+    def view(cls, state, row):
+        """Entity backed by an existing row of `state` (no copy)."""
+        entity = cls.__new__(cls)
+        entity._bind(state, row)
+        return entity
+
+    @staticmethod
+    def _single_row_state(name, coordinates, **matrices):
+        products = list(dict.fromkeys(product for values in matrices.values() for product in values))
+        rows = {key: [[values.get(product, 0) for product in products]] for key, values in matrices.items()}
+        return NetworkState([name], products, coordinates=[coordinates], **rows)
+
+    def _row_view(self, matrix):
+        return ProductRow(matrix, self.row, self.state.product_index)
+
+    @property
+    def inventory(self):
+        return self._row_view(self.state.stock)
+
+    @inventory.setter
+    def inventory(self, values):
+        self.inventory.update(values)
+
+    @property
+    def coordinates(self):
+        return tuple(self.state.coordinates[self.row].tolist())
+
+    @coordinates.setter
+    def coordinates(self, value):
+        self.state.coordinates[self.row] = value
+
+
+class Hospital(_Entity):
+    def __init__(self, name, inventory, min_inventory, coordinates):
+        state = self._single_row_state(name, coordinates, stock=inventory, min_stock=min_inventory)
+        self._bind(state, 0)
+
+    @property
+    def min_inventory(self):
+        return self._row_view(self.state.min_stock)
+
+    @min_inventory.setter
+    def min_inventory(self, values):
+        self.min_inventory.update(values)
+
+    def needs_supply(self):
+        return bool((self.state.stock[self.row] < self.state.min_stock[self.row]).any())
+
+    def request_supply(self):
+        stock = self.state.stock[self.row]
+        min_stock = self.state.min_stock[self.row]
+        return [
+            (self.state.products[column], int(min_stock[column] - stock[column]))
+            for column in np.flatnonzero(stock < min_stock)
+        ]
+
+
+class Supplier(_Entity):
+    def __init__(self, name, inventory, production, coordinates):
+        state = self._single_row_state(name, coordinates, stock=inventory, production=production)
+        self._bind(state, 0)
+
+    @property
+    def production(self):
+        return self._row_view(self.state.production)
+
+    @production.setter
+    def production(self, values):
+        self.production.update(values)
+
+    def can_supply(self, required_items):
+        return all(self.inventory.get(product, 0) >= amount for product, amount in required_items)
+
+    def supply(self, required_items):
+        for product, amount in required_items:
+            if self.inventory.get(product, 0) >= amount:
+                self.inventory[product] -= amount
+
+    def get_available_stock(self, product):
+        """Retourneer de beschikbare voorraad voor een bepaald product."""
+        return self.inventory.get(product, 0)
+
+
+class ShortageMatrix:
+    """Sparse (hospital index, product index, deficit) triplets of every stock shortfall."""
+
+    def __init__(self, hospitals, products, hospital_index, product_index, deficit):
+        self.hospitals = hospitals
+        self.products = products
+        self.hospital_index = hospital_index
+        self.product_index = product_index
+        self.deficit = deficit
+
+    def __len__(self):
+        return len(self.deficit)
+
+    def to_list(self):
+        """[(hospital, [(product, deficit), ...]), ...] as used by the resolvers and the GUI."""
+        insufficient_hospitals = []
+        current = None
+        for hospital_row, column, deficit in zip(self.hospital_index.tolist(), self.product_index.tolist(),
+                                                 self.deficit.tolist()):
+            if current is None or current[0] is not self.hospitals[hospital_row]:
+                current = (self.hospitals[hospital_row], [])
+                insufficient_hospitals.append(current)
+            current[1].append((self.products[column], deficit))
+        return insufficient_hospitals
+
+
+def _stock_rows(hospitals):
+    """Stock and minimum stock of the given hospitals as two (hospitals x products) matrices."""
+    states = {id(hospital.state): hospital.state for hospital in hospitals}
+    rows = np.fromiter((hospital.row for hospital in hospitals), dtype=np.int64, count=len(hospitals))
+    if len(states) == 1:
+        state = next(iter(states.values()))
+        return state.products, state.stock[rows], state.min_stock[rows]
+
+    # Hospitals from several states: line their products up on one shared column order
+    products = list(dict.fromkeys(product for state in states.values() for product in state.products))
+    columns = {product: column for column, product in enumerate(products)}
+    stock = np.zeros((len(hospitals), len(products)), dtype=np.int64)
+    min_stock = np.zeros_like(stock)
+    for state_id, state in states.items():
+        members = np.flatnonzero([id(hospital.state) == state_id for hospital in hospitals])
+        state_columns = [columns[product] for product in state.products]
+        stock[np.ix_(members, state_columns)] = state.stock[rows[members]]
+        min_stock[np.ix_(members, state_columns)] = state.min_stock[rows[members]]
+    return products, stock, min_stock
+
+
+def find_shortages(hospitals, minimums=None):
+    """Compare every hospital's stock with its minimum in one pass and return a ShortageMatrix.
+
+    `minimums` (e.g. a DemandProfile) can replace the stored minimums through its
+    apply(names, products, min_stock) method.
+    """
+    hospitals = list(hospitals)
+    if not hospitals:
+        empty = np.zeros(0, dtype=np.int64)
+        return ShortageMatrix(hospitals, [], empty, empty, empty)
+
+    products, stock, min_stock = _stock_rows(hospitals)
+    if minimums is not None:
+        min_stock = minimums.apply([hospital.name for hospital in hospitals], products, min_stock)
+    deficit = min_stock - stock
+    hospital_index, product_index = np.nonzero(deficit > 0)
+    return ShortageMatrix(hospitals, products, hospital_index, product_index, deficit[hospital_index, product_index])
@@ -0,0 +1,244 @@
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+from cell_changes import fold_journal
+from csv_loader import HOSPITALS_CSV, NETWORK_DB, SECOND_COLUMN_PREFIX, SUPPLIERS_CSV, parse_coordinates, \
+    product_mapping
+from network_state import NetworkState
+from snapshot_cache import file_hash, load_network_state
+
+# CSV each entity type is imported from the first time the store is used
+DEFAULT_CSV = {
+    "hospital": HOSPITALS_CSV,
+    "supplier": SUPPLIERS_CSV,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS network_products (
+    kind TEXT NOT NULL,
+    product TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (kind, product)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS network_entities (
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    latitude REAL NOT NULL,
+    longitude REAL NOT NULL,
+    PRIMARY KEY (kind, name)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS network_stock (
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    product TEXT NOT NULL,
+    stock INTEGER NOT NULL DEFAULT 0,
+    min_stock INTEGER NOT NULL DEFAULT 0,
+    production INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (kind, name, product)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS network_sources (
+    kind TEXT PRIMARY KEY,
+    csv_path TEXT NOT NULL,
+    csv_size INTEGER NOT NULL,
+    csv_mtime_ns INTEGER NOT NULL,
+    edited_ns INTEGER,  -- Time of the last update_cells, NULL while the store matches the CSV
+    csv_hash TEXT
+) WITHOUT ROWID;
+"""
+
+# Matrix per CSV column prefix; the second one depends on the entity type
+COLUMN_PREFIXES = (("min_stock_", "min_stock"), ("production_", "production"), ("stock_", "stock"))
+
+
+class NetworkStore:
+    """Hospitals and suppliers in SQLite, so an edit is a single-row UPDATE instead of a CSV rewrite.
+
+    Products are stored under their CSV suffix ("A"), entities keep their CSV row order, and the
+    database runs in WAL mode so the GUI can read while an edit is being written. It defaults to
+    NETWORK_DB (set SUPPLY_CHAIN_NETWORK_DB to move it), never the tracked supply_chain.db.
+    """
+
+    def __init__(self, path=None):
+        path = path or NETWORK_DB
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")  # Safe with WAL, one fsync per checkpoint
+        self.connection.executescript(SCHEMA)
+        columns = {column for _, column, *_ in self.connection.execute("PRAGMA table_info(network_sources)")}
+        if "csv_hash" not in columns:  # Stores from before the CSV hash was recorded
+            self.connection.execute("ALTER TABLE network_sources ADD COLUMN csv_hash TEXT")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def has_network(self, kind):
+        return self.connection.execute("SELECT 1 FROM network_entities WHERE kind = ? LIMIT 1", (kind,)).fetchone() \
+            is not None
+
+    def source(self, kind):
+        """(csv path, size, mtime_ns, edited_ns, content hash) of the CSV this type was imported from, or None."""
+        return self.connection.execute(
+            "SELECT csv_path, csv_size, csv_mtime_ns, edited_ns, csv_hash FROM network_sources WHERE kind = ?",
+            (kind,)).fetchone()
+
+    def touch_source(self, kind, stat):
+        """Record the new size and mtime of a CSV that was touched without changing its contents."""
+        with self.connection:
+            self.connection.execute("UPDATE network_sources SET csv_size = ?, csv_mtime_ns = ? WHERE kind = ?",
+                                    (stat.st_size, stat.st_mtime_ns, kind))
+
+    def import_csv(self, csv_path, kind):
+        """Replace the stored entities of this type with the contents of a hospital/supplier CSV."""
+        stat = os.stat(csv_path)
+        state = load_network_state(csv_path, kind)
+        suffixes = _product_suffixes(state.products)
+        second = "min_stock" if kind == "hospital" else "production"
+        second_matrix = state.min_stock if kind == "hospital" else state.production
+
+        with self.connection:  # One transaction
+            for table in ("network_products", "network_entities", "network_stock"):
+                self.connection.execute(f"DELETE FROM {table} WHERE kind = ?", (kind,))
+            self.connection.executemany(
+                "INSERT INTO network_products (kind, product, position) VALUES (?, ?, ?)",
+                [(kind, suffix, position) for position, suffix in enumerate(suffixes)])
+            self.connection.executemany(
+                "INSERT INTO network_entities (kind, name, position, latitude, longitude) VALUES (?, ?, ?, ?, ?)",
+                [(kind, name, position, latitude, longitude)
+                 for position, (name, (latitude, longitude)) in enumerate(zip(state.names, state.coordinates.tolist()))])
+            self.connection.executemany(
+                f"INSERT INTO network_stock (kind, name, product, stock, {second}) VALUES (?, ?, ?, ?, ?)",
+                [(kind, name, suffix, stock, value)
+                 for name, stock_row, second_row in zip(state.names, state.stock.tolist(), second_matrix.tolist())
+                 for suffix, stock, value in zip(suffixes, stock_row, second_row)])
+            self.connection.execute(
+                "INSERT OR REPLACE INTO network_sources (kind, csv_path, csv_size, csv_mtime_ns, edited_ns, csv_hash) "
+                "VALUES (?, ?, ?, ?, NULL, ?)",
+                (kind, os.path.abspath(csv_path), stat.st_size, stat.st_mtime_ns, file_hash(csv_path)))
+        return state
+
+    def load_state(self, kind):
+        """All stored entities of this type as a NetworkState, in their original row order."""
+        suffixes = [suffix for suffix, in self.connection.execute(
+            "SELECT product FROM network_products WHERE kind = ? ORDER BY position", (kind,))]
+        entities = self.connection.execute(
+            "SELECT name, latitude, longitude FROM network_entities WHERE kind = ? ORDER BY position", (kind,)).fetchall()
+        names = [name for name, _, _ in entities]
+        rows = {name: row for row, name in enumerate(names)}
+        columns = {suffix: column for column, suffix in enumerate(suffixes)}
+
+        matrices = {key: np.zeros((len(names), len(suffixes)), dtype=np.int64)
+                    for key in ("stock", "min_stock", "production")}
+        cells = self.connection.execute(
+            "SELECT name, product, stock, min_stock, production FROM network_stock WHERE kind = ?", (kind,)).fetchall()
+        if cells:
+            names_column, products_column, *values = zip(*cells)
+            row_index = np.fromiter((rows[name] for name in names_column), dtype=np.int64, count=len(cells))
+            column_index = np.fromiter((columns[suffix] for suffix in products_column), dtype=np.int64, count=len(cells))
+            for key, column_values in zip(("stock", "min_stock", "production"), values):
+                matrices[key][row_index, column_index] = column_values
+
+        coordinates = [(latitude, longitude) for _, latitude, longitude in entities]
+        return NetworkState(names, [product_mapping.get(suffix, suffix) for suffix in suffixes],
+                            coordinates=coordinates or None, **matrices)
+
+    def table(self, kind):
+        """The stored entities as a DataFrame in the CSV layout, for the edit window."""
+        import pandas as pd
+
+        state = self.load_state(kind)
+        suffixes = _product_suffixes(state.products)
+        second_prefix = SECOND_COLUMN_PREFIX[kind]
+        second_matrix = state.min_stock if kind == "hospital" else state.production
+
+        data = {"name": state.names}
+        data.update(("stock_" + suffix, state.stock[:, column]) for column, suffix in enumerate(suffixes))
+        data.update((second_prefix + suffix, second_matrix[:, column]) for column, suffix in enumerate(suffixes))
+        data["coordinates"] = [f"{latitude}, {longitude}" for latitude, longitude in state.coordinates.tolist()]
+        return pd.DataFrame(data)
+
+    def update_cells(self, kind, changes):
+        """Apply (entity name, CSV column, value) edits as single-row UPDATEs in one transaction.
+
+        Values are coerced like the CSV loader would; a bad value raises ValueError and nothing is
+        saved. Renames are applied last, so the other edits can still use the old name.
+        """
+        changes = sorted(changes, key=lambda change: change[1] == "name")
+        statements = [statement for name, column, value in changes
+                      for statement in self._update_statements(kind, name, column, value)]
+        with self.connection:
+            for sql, parameters in statements:
+                if self.connection.execute(sql, parameters).rowcount == 0:
+                    raise ValueError(f"No {kind} row matches {parameters[-2:]!r}")
+            if statements:
+                self.connection.execute("UPDATE network_sources SET edited_ns = ? WHERE kind = ?",
+                                        (time.time_ns(), kind))
+        return len(changes)
+
+    @staticmethod
+    def _update_statements(kind, name, column, value):
+        if column == "coordinates":
+            (latitude, longitude), = parse_coordinates([str(value)]).tolist()
+            return [("UPDATE network_entities SET latitude = ?, longitude = ? WHERE kind = ? AND name = ?",
+                     (latitude, longitude, kind, name))]
+        if column == "name":
+            return [(f"UPDATE {table} SET name = ? WHERE kind = ? AND name = ?", (str(value), kind, name))
+                    for table in ("network_entities", "network_stock")]
+        for prefix, field in COLUMN_PREFIXES:
+            if column.startswith(prefix):
+                return [(f"UPDATE network_stock SET {field} = ? WHERE kind = ? AND name = ? AND product = ?",
+                         (int(value), kind, name, column[len(prefix):]))]
+        raise ValueError(f"Unknown column {column!r}")
+
+
+def _product_suffixes(products):
+    """CSV suffixes ("A") of display product names ("Drug A")."""
+    suffix_of = {product: suffix for suffix, product in product_mapping.items()}
+    return [suffix_of.get(product, product) for product in products]
+
+
+def load_store_state(kind, path=None, csv_path=None):
+    """Stored entities of this type, kept in step with their CSV (default: Hospitals.csv / Suppliers.csv).
+
+    The CSV is imported the first time, and again when it changed after it was imported and after
+    the last edit in the store. A CSV that changed before the store's last edit is ignored with a
+    warning. A CSV whose mtime changed but whose contents did not (same hash) is not re-imported.
+    While the store holds no edits it equals the CSV, which is then read through its snapshot cache.
+    Changes the CSV editor journaled are folded into the CSV first (cell_changes.fold_journal).
+    Loading an unchanged network does not write to the store.
+    """
+    csv_path = csv_path or DEFAULT_CSV[kind]
+    fold_journal(csv_path)  # Before the stat below, so the CSV editor's saves count as a change
+    with NetworkStore(path) as store:
+        if not store.has_network(kind):
+            return store.import_csv(csv_path, kind)
+        try:
+            stat = os.stat(csv_path)
+        except FileNotFoundError:
+            return store.load_state(kind)
+
+        source = store.source(kind)
+        edited_ns = source[3] if source is not None else None
+        same_file = source is not None and source[0] == os.path.abspath(csv_path)
+        unchanged = same_file and source[1:3] == (stat.st_size, stat.st_mtime_ns)
+        if same_file and not unchanged and source[4] == file_hash(csv_path):
+            store.touch_source(kind, stat)  # Only touched: remember the new mtime so it is not hashed again
+            unchanged = True
+        if unchanged:
+            return store.load_state(kind) if edited_ns is not None else load_network_state(csv_path, kind)
+        if edited_ns is None or stat.st_mtime_ns > edited_ns:
+            print(f"{csv_path} changed, re-importing it into {store.path}"
+                  + (" (this replaces the edits made in the store)" if edited_ns is not None else ""))
+            return store.import_csv(csv_path, kind)
+        print(f"Warning: {csv_path} changed before the last edit in {store.path}; using the store")
+        return store.load_state(kind)
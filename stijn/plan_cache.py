@@ -0,0 +1,153 @@
+import hashlib
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from allocation_records import Allocation
+
+# Bump when the fingerprint or the on-disk layout changes so old plans are not reused
+PLAN_CACHE_VERSION = 1
+# Solved plans kept in memory, least recently used first out
+PLAN_CACHE_SIZE = 32
+PLAN_SUFFIX = ".plan.npz"
+
+
+def _update_with_entities(digest, entities):
+    """Feed the names, products, stock, minimums and coordinates of these entities, in order, into `digest`."""
+    groups = []  # (state, rows) per run of entities from the same state
+    for entity in entities:
+        if not groups or groups[-1][0] is not entity.state:
+            groups.append((entity.state, []))
+        groups[-1][1].append(entity.row)
+
+    digest.update(len(groups).to_bytes(8, "little"))
+    for state, rows in groups:
+        rows = np.asarray(rows, dtype=np.int64)
+        digest.update(len(rows).to_bytes(8, "little"))
+        digest.update("\x1f".join(state.products).encode("utf-8"))
+        digest.update("\x1f".join(state.names[row] for row in rows.tolist()).encode("utf-8"))
+        for matrix in (state.stock, state.min_stock, state.coordinates):
+            digest.update(np.ascontiguousarray(matrix[rows]).tobytes())
+
+
+def plan_fingerprint(insufficient_hospitals, hospitals, suppliers, mode, minimums=None):
+    """Content fingerprint of everything a resolver's plan depends on.
+
+    Covers the solver mode, the shortages to resolve and the stock, minimums and coordinates of
+    every hospital and supplier in order. The resolvers' min_inventory_levels are assumed to be the
+    hospitals' own minimums with `minimums` (a DemandProfile) applied, as minimum_levels builds them.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{PLAN_CACHE_VERSION}\x1f{mode}".encode("utf-8"))
+    for hospital, shortages in insufficient_hospitals:
+        digest.update(hospital.name.encode("utf-8"))
+        for product, shortage in shortages:
+            digest.update(f"\x1f{product}\x1f{shortage}".encode("utf-8"))
+        digest.update(b"\x1e")
+    _update_with_entities(digest, hospitals)
+    _update_with_entities(digest, suppliers)
+    if minimums is not None:
+        digest.update("\x1f".join(minimums.hospitals + ["\x1e"] + minimums.products).encode("utf-8"))
+        digest.update(np.ascontiguousarray(minimums.dynamic_minimum).tobytes())
+    return digest.hexdigest()
+
+
+def apply_plan(records, hospitals, suppliers):
+    """Move the stock of a cached plan, exactly as the resolver that made it did."""
+    entities = {entity.name: entity for entity in hospitals + suppliers}
+    for record in records:
+        if record.source is not None:
+            entities[record.source].inventory[record.product] -= record.units
+            entities[record.recipient].inventory[record.product] += record.units
+
+
+class PlanCache:
+    """LRU cache of solved allocation plans (their Allocation records), keyed by plan_fingerprint.
+
+    With a `directory`, plans are also stored there as .npz files and found again after a restart
+    or by another process. hits, disk_hits and misses count the lookups.
+    """
+
+    def __init__(self, max_entries=PLAN_CACHE_SIZE, directory=None):
+        self.max_entries = max_entries
+        self.directory = directory
+        self._plans = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._plans)
+
+    def get(self, key):
+        """The cached records for this fingerprint, or None."""
+        if key in self._plans:
+            self._plans.move_to_end(key)
+            self.hits += 1
+            return self._plans[key]
+        records = self._load(key)
+        if records is None:
+            self.misses += 1
+            return None
+        self.disk_hits += 1
+        self._remember(key, records)
+        return records
+
+    def put(self, key, records):
+        records = list(records)
+        self._remember(key, records)
+        self._save(key, records)
+
+    def clear(self):
+        self._plans.clear()
+
+    def stats(self):
+        return {"entries": len(self._plans), "hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses}
+
+    def _remember(self, key, records):
+        self._plans[key] = records
+        self._plans.move_to_end(key)
+        while len(self._plans) > self.max_entries:
+            self._plans.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + PLAN_SUFFIX)
+
+    def _save(self, key, records):
+        if self.directory is None:
+            return
+        path = self._path(key)
+        temporary = path + ".tmp.npz"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            np.savez(
+                temporary,
+                version=PLAN_CACHE_VERSION,
+                recipient=np.array([record.recipient for record in records], dtype=str),
+                product=np.array([record.product for record in records], dtype=str),
+                source=np.array([record.source or "" for record in records], dtype=str),
+                has_source=np.array([record.source is not None for record in records], dtype=bool),
+                units=np.array([record.units for record in records], dtype=np.int64),
+                distance_km=np.array([np.nan if record.distance_km is None else record.distance_km
+                                      for record in records], dtype=np.float64),
+                resolved=np.array([record.resolved for record in records], dtype=bool),
+            )
+            os.replace(temporary, path)  # Readers never see a half-written plan
+        except OSError as error:
+            print(f"Warning: could not write plan {path}: {error}")
+
+    def _load(self, key):
+        if self.directory is None:
+            return None
+        try:
+            with np.load(self._path(key), allow_pickle=False) as plan:
+                if int(plan["version"]) != PLAN_CACHE_VERSION:
+                    return None
+                columns = [plan[name].tolist() for name in ("recipient", "product", "source", "has_source",
+                                                            "units", "distance_km", "resolved")]
+        except (OSError, KeyError, ValueError):
+            return None
+        return [Allocation(recipient, product, source if has_source else None, units,
+                           distance if has_source else None, resolved)
+                for recipient, product, source, has_source, units, distance, resolved in zip(*columns)]
@@ -0,0 +1,126 @@
+import csv
+import json
+import os
+
+from allocation_records import Allocation
+
+ALLOCATION_FIELDS = Allocation.__slots__
+EXPORT_FORMATS = ("csv", "jsonl", "parquet")
+# Rows per Parquet row group and per chunk when reading an export back
+CHUNK_ROWS = 100_000
+
+
+def export_format(path):
+    """The export format of a path, from its extension."""
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    extension = {"ndjson": "jsonl", "pq": "parquet"}.get(extension, extension)
+    if extension not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {extension!r}, expected one of {', '.join(EXPORT_FORMATS)}")
+    return extension
+
+
+class AllocationWriter:
+    """Streams Allocation records to a CSV, JSONL or Parquet file as they come in.
+
+    write() can be passed straight to the resolvers as their on_solution callback, so records
+    go to disk per hospital instead of being collected first. Use as a context manager.
+    """
+
+    def __init__(self, path, file_format=None):
+        self.path = path
+        self.format = file_format or export_format(path)
+        if self.format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format {self.format!r}, expected one of {', '.join(EXPORT_FORMATS)}")
+        self.rows = 0
+        self._file = None
+        self._csv = None
+        self._parquet = None
+        self._pending = []  # Parquet rows waiting for a full row group
+
+        if self.format == "parquet":
+            try:
+                import pyarrow  # noqa: F401  Fail before anything is written
+            except ImportError:
+                raise ImportError("Parquet export needs pyarrow (pip install pyarrow)") from None
+        else:
+            self._file = open(path, "w", newline="", encoding="utf-8")
+            if self.format == "csv":
+                self._csv = csv.writer(self._file)
+                self._csv.writerow(ALLOCATION_FIELDS)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, records):
+        for record in records:
+            row = (record.recipient, record.product, record.source, record.units, record.distance_km, record.resolved)
+            if self.format == "csv":
+                self._csv.writerow(row)
+            elif self.format == "jsonl":
+                self._file.write(json.dumps(dict(zip(ALLOCATION_FIELDS, row)), ensure_ascii=False) + "\n")
+            else:
+                self._pending.append(row)
+                if len(self._pending) >= CHUNK_ROWS:
+                    self._write_row_group()
+            self.rows += 1
+
+    def _write_row_group(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([("recipient", pa.string()), ("product", pa.string()), ("source", pa.string()),
+                            ("units", pa.int64()), ("distance_km", pa.float64()), ("resolved", pa.bool_())])
+        columns = list(zip(*self._pending)) if self._pending else [[] for _ in ALLOCATION_FIELDS]
+        table = pa.Table.from_arrays([pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                                     schema=schema)
+        if self._parquet is None:
+            self._parquet = pq.ParquetWriter(self.path, schema)
+        self._parquet.write_table(table)
+        self._pending = []
+
+    def close(self):
+        if self.format == "parquet":
+            if self._pending or self._parquet is None:
+                self._write_row_group()  # Also writes an empty file when nothing came in
+            self._parquet.close()
+        elif self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def export_allocations(records, path, file_format=None):
+    """Write any iterable of Allocation records to `path`; returns the number of rows written."""
+    with AllocationWriter(path, file_format) as writer:
+        writer.write(records)
+    return writer.rows
+
+
+def read_allocations(path, recipient=None, product=None, resolved=None, chunk_rows=CHUNK_ROWS):
+    """Stream an export back as DataFrames of at most chunk_rows rows, keeping only the matching rows.
+
+    recipient, product and resolved filter on equality when given; chunks without a match are skipped.
+    """
+    import pandas as pd
+
+    file_format = export_format(path)
+    if file_format == "parquet":
+        import pyarrow.parquet as pq
+
+        chunks = (batch.to_pandas() for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows))
+    elif file_format == "jsonl":
+        chunks = pd.read_json(path, lines=True, chunksize=chunk_rows, dtype=False)
+    else:
+        chunks = pd.read_csv(path, chunksize=chunk_rows, dtype={"recipient": str, "product": str, "source": str})
+
+    filters = {"recipient": recipient, "product": product, "resolved": resolved}
+    for chunk in chunks:
+        if file_format == "csv":
+            chunk["resolved"] = chunk["resolved"].astype(str) == "True"
+        for column, value in filters.items():
+            if value is not None:
+                chunk = chunk[chunk[column] == value]
+        if len(chunk):
+            yield chunk
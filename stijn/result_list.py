@@ -0,0 +1,99 @@
+import tkinter as tk
+
+from virtual_tree import VirtualTree
+
+# Wait this long after the last keystroke before filtering again
+FILTER_DELAY_MS = 150
+
+
+class ResultList(VirtualTree):
+    """A Treeview holding only the rows in view, scrolled over any number of records.
+
+    Records are tuples with one value per column. Every column in `filter_columns` gets an entry
+    that keeps the records whose value contains the typed text (case-insensitive), so a hospital
+    or product can be picked out of 100k lines without building a widget per line.
+    """
+
+    def __init__(self, master, columns, widths=None, filter_columns=(), height=20):
+        super().__init__(master, height=height, tree_row=1, columns=list(columns), selectmode="browse")
+        self.columns = list(columns)
+        self.records = []
+        self.visible = []  # Indices of the records that pass the filters
+        self._filter_indices = [self.columns.index(column) for column in filter_columns]
+        self._filter_keys = []  # Lower-cased filter column values per record
+        self._filter_vars = []
+        self._pending_filter = None
+
+        filter_frame = tk.Frame(self.frame)
+        filter_frame.grid(row=0, column=0, columnspan=2, sticky="ew")
+        for position, column in enumerate(filter_columns):
+            variable = tk.StringVar()
+            variable.trace_add("write", self._schedule_filter)
+            tk.Label(filter_frame, text=f"{column}:", font=("Helvetica", 10)).grid(row=0, column=2 * position, padx=(5, 2))
+            tk.Entry(filter_frame, textvariable=variable, width=16).grid(row=0, column=2 * position + 1, padx=(0, 5))
+            self._filter_vars.append(variable)
+
+        for position, column in enumerate(self.columns):
+            self.tree.heading(column, text=column)
+            self.tree.column(column, width=widths[position] if widths else 100, stretch=True)
+        self.count_label = tk.Label(self.frame, text="", font=("Helvetica", 9))
+        self.count_label.grid(row=2, column=0, columnspan=2, sticky="w")
+
+    def set_records(self, records):
+        """Replace all records."""
+        self.records = []
+        self._filter_keys = []
+        self.visible = []
+        self.offset = 0
+        self.extend(records)
+
+    def extend(self, records):
+        """Append records; only redraws the tree when the new ones can be in view."""
+        first = len(self.records)
+        in_view = len(self.visible) < self.offset + self.rows
+        self.records.extend(records)
+        keys = [tuple(str(record[index]).lower() for index in self._filter_indices) for record in records]
+        self._filter_keys.extend(keys)
+        needles = self._needles()
+        self.visible.extend(first + position for position, key in enumerate(keys) if self._matches(key, needles))
+        if in_view:
+            self.render()
+        else:
+            self._update_position(self.rows)
+
+    def apply_filters(self):
+        """Recompute which records pass the filter entries and scroll back to the top."""
+        self._pending_filter = None
+        needles = self._needles()
+        if any(needles):
+            self.visible = [index for index, key in enumerate(self._filter_keys) if self._matches(key, needles)]
+        else:
+            self.visible = list(range(len(self.records)))
+        self.offset = 0
+        self.render()
+
+    def row_count(self):
+        return len(self.visible)
+
+    def _insert_rows(self, start, stop):
+        for index in self.visible[start:stop]:
+            self.tree.insert("", "end", values=self.records[index])
+
+    def _update_position(self, shown):
+        """Scrollbar and row count for `shown` rows from `offset`."""
+        super()._update_position(shown)
+        total = len(self.visible)
+        filtered = f" of {len(self.records)}" if total != len(self.records) else ""
+        self.count_label.config(text=f"{total}{filtered} rows")
+
+    def _needles(self):
+        return [variable.get().strip().lower() for variable in self._filter_vars]
+
+    @staticmethod
+    def _matches(key, needles):
+        return all(needle in value for needle, value in zip(needles, key))
+
+    def _schedule_filter(self, *_):
+        if self._pending_filter is not None:
+            self.frame.after_cancel(self._pending_filter)
+        self._pending_filter = self.frame.after(FILTER_DELAY_MS, self.apply_filters)
@@ -0,0 +1,216 @@
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from network_state import NetworkState
+from network_store import load_store_state
+from simulation_core import NETWORK_SOLVER_MODES, resolve_network_state
+from snapshot_cache import load_network_state
+from time_simulation import NearestResolver, nearest_candidates
+
+# Arrays every worker needs, shared once instead of pickled with every task
+# (the candidate lists only for mode "incremental", the only one that uses them)
+SHARED_ARRAYS = ("stock", "min_stock", "coordinates", "candidates", "candidate_distances")
+# Tasks per worker, so a slow batch does not leave the other cores idle at the end
+BATCHES_PER_WORKER = 4
+
+
+class Disruption:
+    """Probabilities and sizes of the random events sampled in every scenario."""
+
+    def __init__(self, supplier_outage=0.1, demand_spike=0.05, spike_factor=1.0, stock_loss=0.02,
+                 loss_fraction=0.5):
+        self.supplier_outage = supplier_outage  # Chance a supplier is offline (no stock at all)
+        self.demand_spike = demand_spike  # Chance a hospital x product uses extra stock
+        self.spike_factor = spike_factor  # Extra use as a fraction of the minimum stock
+        self.stock_loss = stock_loss  # Chance an entity x product loses part of its stock
+        self.loss_fraction = loss_fraction  # Share of the stock that is lost
+
+    def apply(self, stock, min_stock, n_hospitals, rng):
+        """Disrupt a copy of the stock matrix in place."""
+        n_suppliers = len(stock) - n_hospitals
+        offline = n_hospitals + np.flatnonzero(rng.random(n_suppliers) < self.supplier_outage)
+        stock[offline] = 0
+
+        hospital_stock = stock[:n_hospitals]
+        spikes = rng.random(hospital_stock.shape) < self.demand_spike
+        extra = np.ceil(min_stock[:n_hospitals] * self.spike_factor).astype(np.int64)
+        hospital_stock -= np.where(spikes, extra, 0)
+        np.maximum(hospital_stock, 0, out=hospital_stock)
+
+        losses = rng.random(stock.shape) < self.stock_loss
+        stock -= np.where(losses, np.floor(stock * self.loss_fraction).astype(np.int64), 0)
+
+
+class ScenarioResults:
+    """Aggregated outcome of many scenarios: how often each hospital x product stayed short."""
+
+    def __init__(self, hospital_names, products, scenarios, short_counts, unresolved_units):
+        self.hospital_names = hospital_names
+        self.products = products
+        self.scenarios = scenarios
+        self.short_counts = short_counts  # Scenarios in which the cell stayed short after resolving
+        self.unresolved_units = unresolved_units  # Units still missing per cell, summed over scenarios
+
+    @property
+    def shortage_probability(self):
+        return self.short_counts / max(self.scenarios, 1)
+
+    @property
+    def expected_unresolved(self):
+        return self.unresolved_units / max(self.scenarios, 1)
+
+    def most_at_risk(self, count=10):
+        """[(hospital, product, probability, expected missing units), ...] sorted by risk."""
+        probability = self.shortage_probability
+        expected = self.expected_unresolved
+        cells = np.flatnonzero(probability.ravel() > 0)
+        order = cells[np.lexsort((-expected.ravel()[cells], -probability.ravel()[cells]))][:count]
+        rows, columns = np.unravel_index(order, probability.shape)
+        return [(self.hospital_names[row], self.products[column], float(probability[row, column]),
+                 float(expected[row, column]))
+                for row, column in zip(rows.tolist(), columns.tolist())]
+
+
+# Worker-side view on the shared network, set up once per process by _attach_network
+_network = {}
+
+
+def _share_arrays(arrays):
+    """Copy arrays into new shared memory blocks; returns the blocks and how to find them again."""
+    blocks, layout = [], {}
+    for key, array in arrays.items():
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        blocks.append(block)
+        layout[key] = (block.name, array.shape, array.dtype.str)
+    return blocks, layout
+
+
+def _attach_network(layout, names, products, n_hospitals, disruption, mode):
+    """Process pool initializer: map the shared arrays read-only, without copying them."""
+    for key, (name, shape, dtype) in layout.items():
+        block = shared_memory.SharedMemory(name=name)
+        array = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        array.flags.writeable = False
+        _network[key] = array
+        _network.setdefault("blocks", []).append(block)  # Keep the mapping alive
+    _network["n_hospitals"] = n_hospitals
+    _network["disruption"] = disruption
+    _network["mode"] = mode
+    # Every scenario is disrupted and resolved in this state's stock matrix
+    _network["scenario"] = NetworkState(names, products, np.empty_like(_network["stock"]),
+                                        min_stock=_network["min_stock"], coordinates=_network["coordinates"])
+    _network["resolver"] = None
+    if mode == "incremental":
+        _network["resolver"] = NearestResolver(_network["coordinates"], n_hospitals,
+                                               _network["candidates"], _network["candidate_distances"])
+
+
+def _run_batch(seeds):
+    """Run the scenarios with these seeds (one SeedSequence each) in a worker and return their partial sums."""
+    stock, min_stock = _network["stock"], _network["min_stock"]
+    n_hospitals = _network["n_hospitals"]
+    disruption, mode, resolver = _network["disruption"], _network["mode"], _network["resolver"]
+    scenario = _network["scenario"]
+
+    short_counts = np.zeros((n_hospitals, stock.shape[1]), dtype=np.int64)
+    unresolved_units = np.zeros_like(short_counts)
+    for seed in seeds:
+        scenario.stock[...] = stock
+        disruption.apply(scenario.stock, min_stock, n_hospitals, np.random.default_rng(seed))
+        remaining = resolve_network_state(scenario, n_hospitals, mode, resolver)
+        short_counts += remaining > 0
+        unresolved_units += remaining
+    return short_counts, unresolved_units
+
+
+def run_scenarios(hospital_state, supplier_state, scenarios=1000, disruption=None, workers=None, seed=0,
+                  mode="greedy"):
+    """Sample `scenarios` random disruptions, resolve each one and aggregate the remaining shortages.
+
+    Each scenario is resolved with solver `mode` as the simulation screen would ("greedy",
+    "optimal" or "incremental"). The network is put in shared memory once and every worker
+    attaches to it when it starts, so tasks only carry their scenarios' seeds. Scenario i always
+    draws from child i of SeedSequence(seed), so results only depend on the seed, not on the
+    number of workers or how the scenarios are split over them.
+    """
+    if mode not in NETWORK_SOLVER_MODES:
+        raise ValueError(f"Unknown solver mode {mode!r}, expected one of {', '.join(NETWORK_SOLVER_MODES)}")
+    disruption = disruption or Disruption()
+    workers = workers or os.cpu_count() or 1
+    state = NetworkState.concatenate(hospital_state, supplier_state)
+    n_hospitals = len(hospital_state)
+    arrays = {"stock": state.stock, "min_stock": state.min_stock, "coordinates": state.coordinates}
+    if mode == "incremental":
+        arrays["candidates"], arrays["candidate_distances"] = nearest_candidates(state.coordinates, n_hospitals)
+
+    # Split the scenarios over a few batches per worker
+    seeds = np.random.SeedSequence(seed).spawn(scenarios)
+    n_batches = max(1, min(scenarios, workers * BATCHES_PER_WORKER))
+    bounds = np.linspace(0, scenarios, n_batches + 1).astype(np.int64).tolist()
+    batches = [seeds[start:end] for start, end in zip(bounds, bounds[1:])]
+
+    short_counts = np.zeros((n_hospitals, len(state.products)), dtype=np.int64)
+    unresolved_units = np.zeros_like(short_counts)
+    blocks, layout = _share_arrays(arrays)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach_network,
+                                 initargs=(layout, state.names, state.products, n_hospitals, disruption,
+                                           mode)) as pool:
+            for batch_counts, batch_units in pool.map(_run_batch, batches):
+                short_counts += batch_counts
+                unresolved_units += batch_units
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    return ScenarioResults(state.names[:n_hospitals], state.products, scenarios, short_counts, unresolved_units)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Estimate how likely each hospital stays short under random "
+                                                 "supplier outages, demand spikes and stock losses.")
+    parser.add_argument("--scenarios", type=int, default=1000, help="scenarios to sample, default %(default)s")
+    parser.add_argument("--mode", choices=NETWORK_SOLVER_MODES, default="greedy",
+                        help="solver each scenario is resolved with, as on the simulation screen, default %(default)s")
+    parser.add_argument("--hospitals", help="hospitals CSV (default: the network store)")
+    parser.add_argument("--suppliers", help="suppliers CSV (default: the network store)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--supplier-outage", type=float, default=Disruption().supplier_outage,
+                        help="chance a supplier is offline, default %(default)s")
+    parser.add_argument("--demand-spike", type=float, default=Disruption().demand_spike,
+                        help="chance a hospital x product uses extra stock, default %(default)s")
+    parser.add_argument("--spike-factor", type=float, default=Disruption().spike_factor,
+                        help="extra use in a demand spike, as a fraction of the minimum stock, default %(default)s")
+    parser.add_argument("--stock-loss", type=float, default=Disruption().stock_loss,
+                        help="chance an entity x product loses part of its stock, default %(default)s")
+    parser.add_argument("--top", type=int, default=10, help="hospital x product cells listed, default %(default)s")
+    args = parser.parse_args(argv)
+
+    hospital_state = load_store_state("hospital") if args.hospitals is None else \
+        load_network_state(args.hospitals, "hospital")
+    supplier_state = load_store_state("supplier") if args.suppliers is None else \
+        load_network_state(args.suppliers, "supplier")
+    disruption = Disruption(supplier_outage=args.supplier_outage, demand_spike=args.demand_spike,
+                            spike_factor=args.spike_factor, stock_loss=args.stock_loss)
+    results = run_scenarios(hospital_state, supplier_state, args.scenarios, disruption, args.workers, args.seed,
+                            args.mode)
+
+    at_risk = results.most_at_risk(args.top)
+    print(f"{results.scenarios} scenarios, solver {args.mode}; most at risk:")
+    for hospital, product, probability, expected in at_risk:
+        print(f"  {hospital:<40} {product:<20} {probability:6.1%} short, {expected:8.1f} units missing on average")
+    if not at_risk:
+        print("  none, every shortage was resolved in every scenario")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
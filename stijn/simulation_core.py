@@ -0,0 +1,400 @@
+import heapq
+from itertools import combinations, groupby
+from math import radians, sin, cos, sqrt, atan2
+
+import numpy as np
+
+from allocation_records import shortage_records, solution_lines
+from allocation_solver import solve_transportation
+from csv_loader import HOSPITALS_CSV, SUPPLIERS_CSV, HYPO_CSV
+from distance_matrix import distance_matrix
+from instrumentation import instrumentation
+from network_state import Hospital, Supplier, find_shortages
+from network_store import load_store_state
+from plan_cache import apply_plan, plan_fingerprint
+from snapshot_cache import load_network_state
+from spatial_index import SpatialIndex
+from time_simulation import NearestResolver
+
+# Up to this many shortage x source distances the greedy resolver takes them from the shared
+# distance_matrix cache; larger networks use the k-d tree, which never builds the full matrix
+DISTANCE_MATRIX_MAX_CELLS = 4_000_000
+# The optimal resolver builds dense sources x recipients matrices per product and runs a pure-Python
+# simplex over them; above this many shortage x source cells it is too slow and big, so greedy takes over
+OPTIMAL_MAX_CELLS = 10_000_000
+
+
+# Load hospitals
+def load_hospitals(is_changed, filename=None):
+    """Load hospital data with support for multiple products dynamically.
+
+    The "hypo" datamode and an explicit filename read a CSV; otherwise the network store is used.
+    """
+    if filename is None and is_changed.lower() == "hypo":
+        filename = HYPO_CSV
+
+    hospitals = []
+    try:
+        with instrumentation.timer("load.hospitals"):
+            state = load_store_state("hospital") if filename is None else load_network_state(filename, "hospital")
+            hospitals = state.entities(Hospital)
+        print(f"Loaded {len(hospitals)} hospitals successfully.")
+    except FileNotFoundError:
+        print(f"Error: {filename or HOSPITALS_CSV} not found.")
+    return hospitals
+
+
+# Load suppliers
+def load_suppliers(filename=None):
+    """Load supplier data from the network store, or from a CSV file when one is given."""
+    suppliers = []
+    try:
+        with instrumentation.timer("load.suppliers"):
+            state = load_store_state("supplier") if filename is None else load_network_state(filename, "supplier")
+            suppliers = state.entities(Supplier)
+        print(f"Loaded {len(suppliers)} suppliers successfully.")  
+    except FileNotFoundError:
+        print(f"Error: {filename or SUPPLIERS_CSV} not found.")
+    return suppliers
+
+
+
+# Check hospital stock levels
+def check_hospitals_stock(hospitals, verbosity=0, minimums=None):
+    """Return [(hospital, [(product, missing amount), ...]), ...] for hospitals below their minimum stock.
+
+    verbosity 1 prints the hospitals with a shortage, 2 prints every hospital's inventory.
+    `minimums` (a supply_history.DemandProfile) replaces the static minimums where it has history.
+    """
+    with instrumentation.timer("check_hospitals_stock"):
+        shortages = find_shortages(hospitals, minimums)
+        insufficient_hospitals = shortages.to_list()
+    instrumentation.count("hospitals_short", len(insufficient_hospitals))
+
+    if verbosity >= 2:
+        for hospital in shortages.hospitals:
+            print(f"Checking {hospital.name}: Inventory {hospital.inventory}, Min {hospital.min_inventory}")
+    elif verbosity == 1:
+        for hospital, missing_products in insufficient_hospitals:
+            print(f"{hospital.name} is short of: {missing_products}")
+    return insufficient_hospitals
+
+def minimum_levels(hospitals, minimums=None):
+    """{hospital name: {product: minimum}} for the resolvers.
+
+    `minimums` (a supply_history.DemandProfile) replaces the static minimums where it has
+    history, as in check_hospitals_stock, so sources keep the same minimums the shortages use.
+    """
+    if minimums is None:
+        return {hospital.name: hospital.min_inventory for hospital in hospitals}
+    names = [hospital.name for hospital in hospitals]
+    products = list(dict.fromkeys(product for hospital in hospitals for product in hospital.min_inventory))
+    static = np.array([[hospital.min_inventory.get(product, 0) for product in products] for hospital in hospitals],
+                      dtype=np.int64).reshape(len(hospitals), len(products))
+    dynamic = minimums.apply(names, products, static)
+    return {name: dict(zip(products, row)) for name, row in zip(names, dynamic.tolist())}
+
+
+def generate_combinations(all_sources, remaining_shortage):
+    """Generate all possible combinations of sources that could potentially fulfill the shortage"""
+    combinations_list = []
+    
+    # Check combinations that may fulfill the shortage
+    for r in range(1, len(all_sources) + 1):  # Try combinations from 1 to the full set
+        for comb in combinations(all_sources, r):
+            selected_combination = []
+            temp_shortage = remaining_shortage
+            for source, dist, stock in comb:
+                supply_amount = min(stock, temp_shortage)
+                selected_combination.append((source, dist, supply_amount))
+                temp_shortage -= supply_amount
+                if temp_shortage <= 0:
+                    break
+            if temp_shortage <= 0:
+                combinations_list.append(selected_combination)
+    
+    return combinations_list
+
+
+def calculate_distance(coord1, coord2):
+    # Convert latitude and longitude from degrees to radians
+    lat1, lon1 = coord1
+    lat2, lon2 = coord2
+    R = 6371  # Radius of the Earth in km
+    dlat = radians(lat2 - lat1)
+    dlon = radians(lon2 - lon1)
+    a = sin(dlat / 2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2)**2
+    c = 2 * atan2(sqrt(a), sqrt(1 - a))
+    distance = R * c  # Distance in km
+    return distance
+
+def surplus_stock(source, product, min_inventory_levels):
+    """Voorraad die een bron kan missen zonder onder haar minimumvoorraad te zakken."""
+    available_stock = source.inventory.get(product, 0)
+    min_stock = min_inventory_levels.get(source.name, {}).get(product, 0)  # Haal de minimumvoorraad op
+    return available_stock - min_stock
+
+def nearest_in_row(distances, order, block=256):
+    """Yield (candidate index, distance) of one distance matrix row in `order` (closest first), a block at a time."""
+    for start in range(0, len(order), block):
+        indices = order[start:start + block]
+        yield from zip(indices.tolist(), distances[indices].tolist())
+
+
+def sources_by_efficiency(hospital, product, candidate_sources, nearest, min_inventory_levels, max_surplus):
+    """Yield (source, distance, max_deliverable) in increasing distance-per-unit order.
+
+    Sources are discovered nearest-first from `nearest`, (candidate index, distance) pairs in
+    increasing distance with ties in candidate order, e.g. SpatialIndex.nearest() or nearest_in_row().
+    A discovered source is only
+    handed out once no undiscovered source can still beat its distance per unit: those are at
+    least as far away and can deliver at most `max_surplus` units. Ties keep the order of
+    `candidate_sources`, so the result matches a full sort on distance / max_deliverable.
+    """
+    if max_surplus <= 0:
+        return
+
+    ready = []  # (distance per unit, source index, distance, max_deliverable)
+    for index, distance in nearest:
+        bound = distance / max_surplus
+        while ready and ready[0][0] < bound:
+            _, source_index, source_distance, max_deliverable = heapq.heappop(ready)
+            yield candidate_sources[source_index], source_distance, max_deliverable
+
+        source = candidate_sources[index]
+        if source != hospital:  # Voorkom dat een ziekenhuis zichzelf bevoorraden kan
+            max_deliverable = surplus_stock(source, product, min_inventory_levels)
+            if max_deliverable > 0:  # Alleen leveren als er boven de minimumvoorraad blijft
+                heapq.heappush(ready, (distance / max_deliverable, index, distance, max_deliverable))
+
+    while ready:
+        _, source_index, source_distance, max_deliverable = heapq.heappop(ready)
+        yield candidate_sources[source_index], source_distance, max_deliverable
+
+def resolve_shortages_with_minimum_distance(insufficient_hospitals, hospitals, suppliers, min_inventory_levels,
+                                            on_solution=None, check_cancelled=None, records=None):
+    """Resolve shortages one at a time, each from the sources with the lowest distance per unit.
+
+    Distances come from the shared distance_matrix cache, or from a k-d tree over the sources when
+    the shortage x source matrix would exceed DISTANCE_MATRIX_MAX_CELLS.
+
+    Returns the solution lines; the Allocation records they are made from are appended to `records`
+    when given. `on_solution(records)` is called with each hospital's records as soon as it is resolved
+    and `check_cancelled()` before each hospital, so a background worker can stream and stop the solve.
+    """
+    solutions = []
+    candidate_sources = hospitals + suppliers
+    distances = spatial_index = None
+    if len(insufficient_hospitals) * len(candidate_sources) <= DISTANCE_MATRIX_MAX_CELLS:
+        with instrumentation.timer("greedy.distances"):
+            distances = distance_matrix.between([hospital for hospital, _ in insufficient_hospitals],
+                                                candidate_sources)
+    else:
+        with instrumentation.timer("greedy.spatial_index"):
+            spatial_index = SpatialIndex([source.coordinates for source in candidate_sources])
+    max_surplus = {}  # Bovengrens op de leverbare voorraad per product
+
+    for row, (hospital, shortages) in enumerate(insufficient_hospitals):
+        if check_cancelled is not None:
+            check_cancelled()
+        first_record = len(solutions)
+        if distances is not None:
+            order = np.argsort(distances[row], kind="stable")  # Gelijke afstanden in kandidaatvolgorde
+        for product, shortage in shortages:
+            remaining_shortage = shortage
+            used_sources = []
+
+            if product not in max_surplus:
+                max_surplus[product] = max(
+                    (surplus_stock(source, product, min_inventory_levels) for source in candidate_sources), default=0)
+
+            # Bronnen (ziekenhuizen + leveranciers) op efficiëntie (afstand per eenheid), dichtste eerst ontdekt
+            nearest = (nearest_in_row(distances[row], order) if distances is not None
+                       else spatial_index.nearest(hospital.coordinates))
+            all_sources = sources_by_efficiency(hospital, product, candidate_sources, nearest,
+                                                min_inventory_levels, max_surplus[product])
+
+            # Gebruik bronnen totdat het tekort is opgelost
+            total_distance = 0
+            with instrumentation.timer("greedy.source_ranking"):  # Afstanden, heap en voorraadmutaties
+                for source, dist, max_stock in all_sources:
+                    supply_amount = min(max_stock, remaining_shortage)
+
+                    # Pas voorraad aan
+                    source.inventory[product] -= supply_amount
+                    hospital.inventory[product] += supply_amount
+
+                    total_distance += dist * supply_amount
+                    remaining_shortage -= supply_amount
+                    used_sources.append((source, supply_amount, dist))
+                    if remaining_shortage <= 0:
+                        break  # Stop als het tekort is opgelost
+            instrumentation.count("shortages", 1)
+            instrumentation.count("transfers", len(used_sources))
+
+            # Het ontvangende ziekenhuis kan nu zelf meer voorraad missen
+            max_surplus[product] = max(max_surplus[product], surplus_stock(hospital, product, min_inventory_levels))
+
+            # Leg de oplossing vast
+            solutions.extend(shortage_records(hospital.name, product,
+                                              [(source.name, amount, dist) for source, amount, dist in used_sources],
+                                              remaining_shortage))
+
+            avg_distance_per_unit = total_distance / shortage if shortage > 0 else 0
+           ## solutions.append(f"  ➡️ Average distance per unit: {avg_distance_per_unit:.2f} km/unit")
+
+        if on_solution is not None:
+            on_solution(solutions[first_record:])
+
+    if records is not None:
+        records.extend(solutions)
+    return solution_lines(solutions)
+
+
+def resolve_shortages_optimal(insufficient_hospitals, hospitals, suppliers, min_inventory_levels,
+                              on_solution=None, check_cancelled=None, records=None):
+    """Resolve all shortages at once with the lowest total distance x units.
+
+    Each product is solved as one transportation problem over every hospital with a shortage and
+    every source with stock above its minimum, so sources go where they save the most distance
+    network-wide instead of to whichever shortage happens to be handled first. The solution is
+    only known once every product is solved, so `on_solution` gets the hospitals' records afterwards;
+    `check_cancelled()` is called before each product. Returns the solution lines like the greedy
+    solver and appends the Allocation records to `records` when given.
+    """
+    candidate_sources = hospitals + suppliers
+    used_sources = {}  # (index in insufficient_hospitals, product) -> [(source, amount, dist)]
+
+    products = list(dict.fromkeys(product for _, shortages in insufficient_hospitals for product, _ in shortages))
+    for product in products:
+        if check_cancelled is not None:
+            check_cancelled()
+        recipients = [(row, hospital, shortage)
+                      for row, (hospital, shortages) in enumerate(insufficient_hospitals)
+                      for shortage_product, shortage in shortages if shortage_product == product]
+        sources = [source for source in candidate_sources if surplus_stock(source, product, min_inventory_levels) > 0]
+        if not sources:
+            continue
+
+        supply = [surplus_stock(source, product, min_inventory_levels) for source in sources]
+        demand = [shortage for _, _, shortage in recipients]
+        with instrumentation.timer("optimal.distances"):
+            distances = distance_matrix.between(sources, [hospital for _, hospital, _ in recipients])
+
+        cost = distances.copy()
+        source_rows = {id(source): source_row for source_row, source in enumerate(sources)}
+        for column, (_, hospital, _) in enumerate(recipients):
+            if id(hospital) in source_rows:  # Voorkom dat een ziekenhuis zichzelf bevoorraden kan
+                cost[source_rows[id(hospital)], column] = np.inf
+
+        with instrumentation.timer("optimal.transportation"):
+            transfers = solve_transportation(supply, demand, cost)
+        instrumentation.count("shortages", len(recipients))
+        instrumentation.count("transfers", int(np.count_nonzero(transfers)))
+        for source_row, column in zip(*np.nonzero(transfers)):
+            row, hospital, _ = recipients[column]
+            source = sources[source_row]
+            supply_amount = int(transfers[source_row, column])
+
+            # Pas voorraad aan
+            source.inventory[product] -= supply_amount
+            hospital.inventory[product] += supply_amount
+            used_sources.setdefault((row, product), []).append(
+                (source, supply_amount, float(distances[source_row, column])))
+
+    # Leg de oplossing vast, in dezelfde volgorde als de tekorten
+    solutions = []
+    for row, (hospital, shortages) in enumerate(insufficient_hospitals):
+        first_record = len(solutions)
+        for product, shortage in shortages:
+            used = sorted(used_sources.get((row, product), []), key=lambda used_source: used_source[2])
+            remaining_shortage = shortage - sum(amount for _, amount, _ in used)
+            solutions.extend(shortage_records(hospital.name, product,
+                                              [(source.name, amount, dist) for source, amount, dist in used],
+                                              remaining_shortage))
+        if on_solution is not None:
+            on_solution(solutions[first_record:])
+
+    if records is not None:
+        records.extend(solutions)
+    return solution_lines(solutions)
+
+
+# Beschikbare oplossers: "greedy" is de snelle standaard, "optimal" is globaal optimaal voor kleinere netwerken
+SOLVER_MODES = {
+    "greedy": resolve_shortages_with_minimum_distance,
+    "optimal": resolve_shortages_optimal,
+}
+
+def resolve_shortages(insufficient_hospitals, hospitals, suppliers, min_inventory_levels, mode="greedy",
+                      on_solution=None, check_cancelled=None, records=None, cache=None, minimums=None):
+    """Resolve shortages with the solver selected by `mode` ("greedy" or "optimal").
+
+    "optimal" falls back to "greedy" when the shortages x sources exceed OPTIMAL_MAX_CELLS.
+
+    With a PlanCache, a network that was solved before (same shortages, stock, minimums,
+    coordinates and mode) gets its cached plan: the same stock moves and records, without solving.
+    Pass the DemandProfile min_inventory_levels was built with as `minimums`, it is part of that key.
+    """
+    try:
+        resolver = SOLVER_MODES[mode]
+    except KeyError:
+        raise ValueError(f"Unknown solver mode {mode!r}, expected one of {', '.join(SOLVER_MODES)}")
+    cells = len(insufficient_hospitals) * (len(hospitals) + len(suppliers))
+    if mode == "optimal" and cells > OPTIMAL_MAX_CELLS:
+        print(f"{len(insufficient_hospitals)} hospitals short x {len(hospitals) + len(suppliers)} sources is too "
+              f"large for the optimal solver, using greedy")
+        mode = "greedy"
+        resolver = SOLVER_MODES[mode]
+    if cache is None:
+        with instrumentation.timer(f"resolve.{mode}"):
+            return resolver(insufficient_hospitals, hospitals, suppliers, min_inventory_levels,
+                            on_solution=on_solution, check_cancelled=check_cancelled, records=records)
+
+    with instrumentation.timer("plan_cache.fingerprint"):
+        key = plan_fingerprint(insufficient_hospitals, hospitals, suppliers, mode, minimums)
+    plan = cache.get(key)
+    instrumentation.count("plan_cache.misses" if plan is None else "plan_cache.hits")
+    if plan is None:
+        plan = []
+        with instrumentation.timer(f"resolve.{mode}"):
+            resolver(insufficient_hospitals, hospitals, suppliers, min_inventory_levels,
+                     on_solution=on_solution, check_cancelled=check_cancelled, records=plan)
+        cache.put(key, plan)  # Only complete plans: a cancelled solve raised above
+    else:
+        apply_plan(plan, hospitals, suppliers)
+        if on_solution is not None:
+            for _, hospital_records in groupby(plan, key=lambda record: record.recipient):
+                on_solution(list(hospital_records))
+    if records is not None:
+        records.extend(plan)
+    return solution_lines(plan)
+
+
+# Solvers the what-if analyses can run, named as on the simulation screen
+NETWORK_SOLVER_MODES = (*SOLVER_MODES, "incremental")
+
+def resolve_network_state(state, n_hospitals, mode="greedy", nearest=None):
+    """Resolve every shortage of a hospitals + suppliers NetworkState in place, as the app's solver `mode` does.
+
+    Rows 0..n_hospitals-1 are hospitals (NetworkState.concatenate). "greedy" and "optimal" run
+    resolve_shortages on entity views of the rows; "incremental" resolves the whole network with a
+    NearestResolver, as IncrementalResolver's first solve does (pass one as `nearest` to reuse its
+    candidate lists). Returns the hospital x product units still missing afterwards.
+    """
+    if mode not in NETWORK_SOLVER_MODES:
+        raise ValueError(f"Unknown solver mode {mode!r}, expected one of {', '.join(NETWORK_SOLVER_MODES)}")
+    hospital_min = state.min_stock[:n_hospitals]
+    if mode == "incremental":
+        deficit = hospital_min - state.stock[:n_hospitals]
+        short_hospitals, short_products = np.nonzero(deficit > 0)
+        if len(short_hospitals):
+            nearest = nearest if nearest is not None else NearestResolver(state.coordinates, n_hospitals)
+            nearest.resolve(state.stock, state.min_stock, short_hospitals, short_products, deficit)
+    else:
+        hospitals = [Hospital.view(state, row) for row in range(n_hospitals)]
+        suppliers = [Supplier.view(state, row) for row in range(n_hospitals, len(state))]
+        insufficient_hospitals = check_hospitals_stock(hospitals)
+        if insufficient_hospitals:
+            resolve_shortages(insufficient_hospitals, hospitals, suppliers, minimum_levels(hospitals), mode=mode)
+    return np.maximum(hospital_min - state.stock[:n_hospitals], 0)
@@ -0,0 +1,94 @@
+import hashlib
+import os
+
+import numpy as np
+
+from cell_changes import fold_journal
+from csv_loader import read_network_csv
+from network_state import NetworkState
+
+# Bump when the snapshot layout changes so old files are re-parsed
+SNAPSHOT_VERSION = 1
+SNAPSHOT_SUFFIX = ".snapshot.npz"
+
+
+def snapshot_path(csv_path):
+    """The snapshot lives next to the CSV it was parsed from."""
+    return csv_path + SNAPSHOT_SUFFIX
+
+
+def file_hash(path):
+    """Content hash of a file, read in chunks."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as source:
+        for chunk in iter(lambda: source.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_snapshot(state, csv_path, kind, content_hash=None):
+    """Store a parsed NetworkState next to its CSV, tagged with the CSV's mtime, size and hash."""
+    stat = os.stat(csv_path)
+    path = snapshot_path(csv_path)
+    temporary = path + ".tmp.npz"
+    try:
+        np.savez(
+            temporary,
+            version=SNAPSHOT_VERSION,
+            kind=kind,
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            content_hash=content_hash or file_hash(csv_path),
+            names=np.array(state.names, dtype=str),
+            products=np.array(state.products, dtype=str),
+            stock=state.stock,
+            min_stock=state.min_stock,
+            production=state.production,
+            coordinates=state.coordinates,
+        )
+        os.replace(temporary, path)  # Readers never see a half-written snapshot
+    except OSError as error:
+        print(f"Warning: could not write snapshot {path}: {error}")
+
+
+def load_snapshot(csv_path, kind):
+    """Return the cached NetworkState for this CSV, or None when it is missing or stale."""
+    path = snapshot_path(csv_path)
+    try:
+        stat = os.stat(csv_path)
+        with np.load(path, allow_pickle=False) as snapshot:
+            if int(snapshot["version"]) != SNAPSHOT_VERSION or str(snapshot["kind"]) != kind:
+                return None
+            touched = (int(snapshot["mtime_ns"]), int(snapshot["size"])) != (stat.st_mtime_ns, stat.st_size)
+            content_hash = None
+            if touched:
+                # Touched but maybe not changed: only the content hash can tell
+                content_hash = file_hash(csv_path)
+                if content_hash != str(snapshot["content_hash"]):
+                    return None
+            state = NetworkState(
+                snapshot["names"].tolist(),
+                snapshot["products"].tolist(),
+                snapshot["stock"],
+                min_stock=snapshot["min_stock"],
+                production=snapshot["production"],
+                coordinates=snapshot["coordinates"],
+            )
+    except (OSError, KeyError, ValueError):
+        return None
+
+    if touched:
+        save_snapshot(state, csv_path, kind, content_hash)  # Store the new mtime
+    return state
+
+
+def load_network_state(csv_path, kind):
+    """Parse a hospital/supplier CSV, reusing the snapshot while the file is unchanged."""
+    fold_journal(csv_path)  # Edits saved by the CSV editor, which then changes the file
+    state = load_snapshot(csv_path, kind)
+    if state is None:
+        if not os.path.exists(csv_path):
+            raise FileNotFoundError(csv_path)
+        state = read_network_csv(csv_path, kind)
+        save_snapshot(state, csv_path, kind)
+    return state
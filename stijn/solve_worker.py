@@ -0,0 +1,64 @@
+import queue
+import threading
+
+
+class SolveCancelled(Exception):
+    """Raised inside a solve when its worker was cancelled."""
+
+
+class SolveWorker:
+    """Run a solve on a background thread and hand its messages to the Tk thread through a queue.
+
+    `solve(worker)` runs on the thread and can call worker.report(kind, payload) and
+    worker.check_cancelled(). The worker itself adds ("done", result), ("cancelled", None) or
+    ("error", exception) when the solve ends. The Tk side drains the queue with poll() from an
+    after() callback, so no widget is ever touched from the worker thread.
+    """
+
+    def __init__(self, solve):
+        self.messages = queue.Queue()
+        self.finished = False  # Set by poll() once the final message was handed out
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(solve,), daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def running(self):
+        return not self.finished
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise SolveCancelled()
+
+    def report(self, kind, payload=None):
+        self.messages.put((kind, payload))
+
+    def _run(self, solve):
+        try:
+            result = solve(self)
+        except SolveCancelled:
+            self.report("cancelled")
+        except Exception as error:  # Handed to the Tk thread to show
+            self.report("error", error)
+        else:
+            self.report("done", result)
+
+    def poll(self, max_messages=500):
+        """The messages waiting right now (at most max_messages, so one poll never blocks the UI for long)."""
+        messages = []
+        while len(messages) < max_messages:
+            try:
+                message = self.messages.get_nowait()
+            except queue.Empty:
+                break
+            messages.append(message)
+            if message[0] in ("done", "cancelled", "error"):
+                self.finished = True
+                break
+        return messages
@@ -0,0 +1,99 @@
+import heapq
+from math import asin
+
+import numpy as np
+
+from distance_matrix import EARTH_RADIUS_KM, as_coordinate_array, haversine_matrix
+
+
+def to_unit_vectors(coordinates):
+    """Project (lat, lon) coordinates onto the unit sphere as (x, y, z) points."""
+    lat, lon = np.radians(as_coordinate_array(coordinates)).T
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+def chord_to_km(chord):
+    """Great-circle distance (km) belonging to a straight-line distance on the unit sphere."""
+    return 2 * EARTH_RADIUS_KM * asin(min(1.0, chord / 2))
+
+
+class SpatialIndex:
+    """k-d tree over entity coordinates that yields entities in increasing distance order.
+
+    The tree is built on unit-sphere (x, y, z) points, where straight-line distance grows
+    with great-circle distance, so bounding boxes give a valid lower bound in km.
+    """
+
+    def __init__(self, coordinates, leaf_size=16):
+        self.coordinates = as_coordinate_array(coordinates)
+        self.points = to_unit_vectors(self.coordinates)
+        self.leaf_size = leaf_size
+
+        self.order = np.arange(len(self.coordinates))
+        self.lower = []  # Bounding box per node
+        self.upper = []
+        self.children = []  # (left, right) for inner nodes, None for leaves
+        self.ranges = []  # (start, end) slice of self.order per node
+        if len(self.coordinates):
+            self._build()
+
+    def __len__(self):
+        return len(self.coordinates)
+
+    def _add_node(self, start, end):
+        points = self.points[self.order[start:end]]
+        self.lower.append(points.min(axis=0))
+        self.upper.append(points.max(axis=0))
+        self.children.append(None)
+        self.ranges.append((start, end))
+        return len(self.ranges) - 1
+
+    def _build(self):
+        stack = [self._add_node(0, len(self.order))]
+        while stack:
+            node = stack.pop()
+            start, end = self.ranges[node]
+            if end - start <= self.leaf_size:
+                continue
+
+            # Split along the widest axis at the median
+            axis = int(np.argmax(self.upper[node] - self.lower[node]))
+            segment = self.order[start:end]
+            middle = (end - start) // 2
+            self.order[start:end] = segment[np.argpartition(self.points[segment, axis], middle)]
+
+            left = self._add_node(start, start + middle)
+            right = self._add_node(start + middle, end)
+            self.children[node] = (left, right)
+            stack.extend((left, right))
+
+    def _lower_bound_km(self, node, point):
+        gap = np.maximum(self.lower[node] - point, 0) + np.maximum(point - self.upper[node], 0)
+        # Small safety margin so rounding never lets a box overtake a point it contains
+        return chord_to_km(float(np.sqrt(gap @ gap))) * (1 - 1e-9)
+
+    def nearest(self, coordinate):
+        """Yield (index, distance_km) for every entity, closest first."""
+        if not len(self.coordinates):
+            return
+        point = to_unit_vectors([coordinate])[0]
+
+        heap = [(0.0, 1, 0)]  # (distance, is_node, node or entity index)
+        while heap:
+            distance, is_node, item = heapq.heappop(heap)
+            if not is_node:
+                yield item, distance
+                continue
+
+            children = self.children[item]
+            if children is not None:
+                for child in children:
+                    heapq.heappush(heap, (self._lower_bound_km(child, point), 1, child))
+                continue
+
+            start, end = self.ranges[item]
+            indices = self.order[start:end]
+            distances = haversine_matrix([coordinate], self.coordinates[indices])[0]
+            for index, entity_distance in zip(indices.tolist(), distances.tolist()):
+                heapq.heappush(heap, (entity_distance, 0, index))
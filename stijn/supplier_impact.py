@@ -0,0 +1,38 @@
+import numpy as np
+
+from network_state import NetworkState
+from simulation_core import NETWORK_SOLVER_MODES, resolve_network_state
+from time_simulation import NearestResolver
+
+
+def unresolved_shortages(state, n_hospitals, mode="greedy", nearest=None):
+    """Hospital x product units still missing after resolving every shortage of `state` (a copy is used)."""
+    return resolve_network_state(state.copy(), n_hospitals, mode, nearest)
+
+
+def network_impact(excluded_suppliers, hospital_state, supplier_state, mode="greedy"):
+    """Hospitals that can no longer cover a shortage once these suppliers are gone.
+
+    Resolves the network with and without the excluded suppliers' stock, with the simulation's
+    solver `mode` ("greedy", "optimal" or "incremental"), and returns [(hospital, product, missing
+    units), ...] for every cell that only stays short without them. Supplier names that are not in
+    the network are ignored; when none is left nothing is resolved.
+    """
+    if mode not in NETWORK_SOLVER_MODES:
+        raise ValueError(f"Unknown solver mode {mode!r}, expected one of {', '.join(NETWORK_SOLVER_MODES)}")
+    state = NetworkState.concatenate(hospital_state, supplier_state)
+    n_hospitals = len(hospital_state)
+    excluded = [state.index[name] for name in excluded_suppliers
+                if name in state.index and state.index[name] >= n_hospitals]
+    if not excluded:
+        return []
+
+    nearest = NearestResolver(state.coordinates, n_hospitals) if mode == "incremental" else None
+    baseline = unresolved_shortages(state, n_hospitals, mode, nearest)
+    without = state.copy()
+    without.stock[excluded] = 0
+    missing = unresolved_shortages(without, n_hospitals, mode, nearest)
+
+    rows, columns = np.nonzero(missing > baseline)
+    return [(state.names[row], state.products[column], int(missing[row, column] - baseline[row, column]))
+            for row, column in zip(rows.tolist(), columns.tolist())]
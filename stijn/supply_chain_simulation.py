@@ -1,13 +1,39 @@
+from functools import partial
 import tkinter as tk
 from tkinter import ttk
-from grafs import GraphGenerator  # Zorg ervoor dat deze import goed is
+from grafs import GraphGenerator, InventoryChart  # Zorg ervoor dat deze import goed is
+from dashboard import NetworkDashboard
 from tkinter import messagebox
 from home_screen import HomeScreen
-import csv
-from itertools import permutations, combinations
-from math import radians, sin, cos, sqrt, atan2
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from incremental_resolver import IncrementalResolver
+from solve_worker import SolveWorker
+from allocation_records import solution_lines
+from result_export import export_allocations
+from plan_cache import PlanCache, apply_plan
+from network_state import copy_entities
+from result_list import ResultList
+from instrumentation import instrumentation
+# The GUI-free part of the simulation, also used by batch_run; re-exported for existing imports
+from simulation_core import SOLVER_MODES, calculate_distance, check_hospitals_stock, generate_combinations, \
+    load_hospitals, load_suppliers, minimum_levels, resolve_shortages, resolve_shortages_optimal, \
+    resolve_shortages_with_minimum_distance, sources_by_efficiency, surplus_stock
+from supply_history import history_mismatch, load_history_minimums
+
+# How often the Tk thread picks up what the simulation worker reported
+WORKER_POLL_MS = 50
+# Columns of the problems and solutions lists
+PROBLEM_COLUMNS = ("Hospital", "Product", "Missing units")
+SOLUTION_COLUMNS = ("Hospital", "Product", "Source", "Units", "Distance (km)", "Status")
+# Solver modes offered on the simulation screen
+SOLVER_CHOICES = (*SOLVER_MODES, "incremental")
+
+
+def solution_row(record):
+    """A solutions list row for one Allocation record."""
+    if record.source is None:
+        return record.recipient, record.product, "-", record.units, "", "still short"
+    return (record.recipient, record.product, record.source, record.units, f"{record.distance_km:.2f}",
+            "resolved" if record.resolved else "partial")
 
 
 class SupplyChainSimulation:
@@ -19,7 +45,20 @@ class SupplyChainSimulation:
         self.return_button = None
         self.solutions_label = None
         self.graph_frame = None  # To hold the graph
+        self.chart = None  # InventoryChart shown in graph_frame
+        self.dashboard = None  # NetworkDashboard, with the window it is shown in
+        self.dashboard_window = None
+        self._hospital_index = None  # (hospital list, {name: hospital}) for update_graph
         self.number_times_pressed = 0
+        self.solver_mode = "greedy"  # "optimal" for the lowest total distance on small networks, "incremental" after edits
+        self.use_history_minimums = False  # Minimums from the supply_data history instead of the static ones
+        self.incremental_resolver = IncrementalResolver()  # Keeps its plan between simulations
+        self.plan_cache = PlanCache()  # Solved plans, reused when the same data is simulated again
+        self.solution_records = []  # Allocation records of the last simulation
+        self.export_format = "csv"  # Format of the allocation export: "csv", "jsonl" or "parquet" (needs pyarrow)
+        self.solutions_list = None
+        self.worker = None  # SolveWorker of the running simulation
+        self.cancel_button = None
 
     def create_simulation_screen(self, data):
         """Create the simulation screen content."""
@@ -54,6 +93,19 @@ class SupplyChainSimulation:
         hospital_dropdown = tk.OptionMenu(self.simulation_frame, self.hospital_selector, *hospital_names, command=self.update_graph)
         hospital_dropdown.grid(row=1, column=1, padx=10, pady=5, sticky="w")
 
+        # Solver selector; switches to "incremental" by itself after an edit is saved
+        solver_frame = tk.Frame(self.simulation_frame, bg="#A2D4CD")
+        solver_frame.grid(row=1, column=2, padx=10, pady=5, sticky="e")
+        tk.Label(solver_frame, text="Solver:", font=("Helvetica", 12)).pack(side="left")
+        self.solver_selector = ttk.Combobox(solver_frame, values=SOLVER_CHOICES, state="readonly", width=12)
+        self.solver_selector.set(self.solver_mode)
+        self.solver_selector.bind("<<ComboboxSelected>>", lambda event: self.set_solver_mode(self.solver_selector.get()))
+        self.solver_selector.pack(side="left", padx=5)
+        self.history_minimums_var = tk.BooleanVar(value=self.use_history_minimums)
+        tk.Checkbutton(solver_frame, text="History minimums", variable=self.history_minimums_var,
+                       command=lambda: setattr(self, "use_history_minimums", self.history_minimums_var.get()),
+                       font=("Helvetica", 12)).pack(side="left", padx=5)
+
         # Left and Right frames for the problems and solutions with borders
         self.left_frame = tk.Frame(self.simulation_frame, relief="solid", bd=2)  # Add border
         self.left_frame.grid(row=2, column=0, padx=10, pady=10, sticky="nsew")
@@ -74,6 +126,9 @@ class SupplyChainSimulation:
         self.create_output_file_button = tk.Button(self.simulation_frame, text="Create Output File", command=self.create_output_file, font=("Helvetica", 12))
         self.create_output_file_button.grid(row=4, column=2, pady=20, sticky="nsew")
 
+        self.dashboard_button = tk.Button(self.simulation_frame, text="Network Dashboard", command=self.show_dashboard, font=("Helvetica", 12))
+        self.dashboard_button.grid(row=4, column=0, pady=20, sticky="nsew")
+
         # Return Button in the center, below simulate button
         self.return_button = None
         self.show_return_button()  # Show the return buttons
@@ -88,11 +143,29 @@ class SupplyChainSimulation:
 
         self.frame.protocol("WM_DELETE_WINDOW", self.on_close)
     
+    def set_solver_mode(self, mode):
+        """Use this solver ("greedy", "optimal" or "incremental") for the next simulation."""
+        if mode not in SOLVER_CHOICES:
+            raise ValueError(f"Unknown solver mode {mode!r}, expected one of {', '.join(SOLVER_CHOICES)}")
+        self.solver_mode = mode
+
+    def data_saved(self):
+        """Called after an edit was saved: reload the network and re-simulate only what the edit affected."""
+        self.hospitals = load_hospitals("normal")
+        self.suppliers = load_suppliers()
+        self.set_solver_mode("incremental")
+
     def create_output_file(self):
-        """Create an output file with the simulation results."""
-        filename = "simulation_results.txt"
+        """Create output.txt with the readable results and simulation_results.<format> with the allocation records."""
+        filename = f"simulation_results.{self.export_format}"
         with open("output.txt", "w", encoding="utf-8") as file:
-            file.write("\n".join(map(str, self.solutions)))
+            file.write("\n".join(solution_lines(self.solution_records)))
+        try:
+            rows = export_allocations(self.solution_records, filename, self.export_format)
+        except (ImportError, OSError) as error:
+            messagebox.showerror("Export failed", str(error))
+            return
+        print(f"Wrote {rows} allocation records to {filename}")
 
     def on_close(self):
         """Handle the window close event to cleanly exit the program."""
@@ -104,60 +177,63 @@ class SupplyChainSimulation:
     def update_graph(self, selected_hospital_name):
         """Update and show the graph for the selected hospital."""
         # Find the selected hospital object
-        selected_hospital = next(hospital for hospital in self.hospitals if hospital.name == selected_hospital_name)
+        selected_hospital = self.hospital_named(selected_hospital_name)
 
-        # Clear the previous graph in the graph_frame
-        for widget in self.graph_frame.winfo_children():
-            widget.destroy()
-
-        # Generate and display the graph for the selected hospital
+        # Update the graph in place for the selected hospital
         self.display_graph(selected_hospital)
 
-    def display_graph(self, hospital):
-        """Create and display a graph for the selected hospital."""
-        # Check if there is already an existing graph and clear it before creating a new one
-        fig, ax = plt.subplots(figsize=(5, 3))
-
-        # Example: Bar chart of the hospital's stock (You can adjust this part to your product data)
-        products = list(hospital.inventory.keys())  # Dynamically fetch product names from inventory
-        stocks = [hospital.inventory.get(product, 0) for product in products]
-        min_stocks = [hospital.min_inventory.get(product, 0) for product in products]  # Get min inventory
-
-        # Set the width for the bars
-        bar_width = 0.35
-
-        # Create the bars for the stock level and min stock
-        bars1 = ax.bar([p - bar_width / 2 for p in range(len(products))], stocks, bar_width, label="Stock", color='lightblue')
-        bars2 = ax.bar([p + bar_width / 2 for p in range(len(products))], min_stocks, bar_width, label="Min Stock", color='orange')
-
-        # Set titles and labels
-        ax.set_title(f"Inventory of {hospital.name}")
-        ax.set_xlabel('Products')
-        ax.set_ylabel('Stock Level')
+    def hospital_named(self, name):
+        """The loaded hospital with this name, through an index rebuilt whenever the hospitals are reloaded."""
+        if self._hospital_index is None or self._hospital_index[0] is not self.hospitals:
+            self._hospital_index = (self.hospitals, {hospital.name: hospital for hospital in self.hospitals})
+        return self._hospital_index[1][name]
+
+    def show_dashboard(self):
+        """Open (or refresh) the network-wide dashboard window."""
+        if not self.hospitals:
+            return
+        if self.dashboard_window is None or not self.dashboard_window.winfo_exists():
+            self.dashboard_window = tk.Toplevel(self.frame)
+            self.dashboard_window.title("Network Dashboard")
+            self.dashboard = NetworkDashboard()
+            self.dashboard.attach(self.dashboard_window).pack(fill=tk.BOTH, expand=True)
+        self.update_dashboard()
+        self.dashboard_window.lift()
+
+    def update_dashboard(self):
+        """Redraw an open dashboard for the current stock."""
+        if self.dashboard_window is None or not self.dashboard_window.winfo_exists():
+            return
+        hospital_state = self.hospitals[0].state
+        supplier_state = self.suppliers[0].state if self.suppliers else None
+        self.dashboard.update(hospital_state, supplier_state)
+
+    def close_dashboard(self):
+        if self.dashboard_window is not None and self.dashboard_window.winfo_exists():
+            self.dashboard_window.destroy()
+        self.dashboard_window = None
 
-        # Set product names on x-axis
-        ax.set_xticks(range(len(products)))
-        ax.set_xticklabels(products)
-
-        # Add the legend
-        ax.legend()
+    def display_graph(self, hospital):
+        """Show the graph of the selected hospital, reusing one figure and canvas for the whole screen."""
+        if self.chart is None or self.chart.master is not self.graph_frame:
+            # Clear the previous graph in the graph_frame
+            for widget in self.graph_frame.winfo_children():
+                widget.destroy()
+            self.chart = InventoryChart(figsize=(5, 3))
 
-        # Render the graph into the tkinter frame
-        canvas = FigureCanvasTkAgg(fig, master=self.graph_frame)
-        canvas.draw()
+            # Properly pack the canvas into the grid
+            self.chart.attach(self.graph_frame).grid(row=0, column=0, sticky="nsew")
 
-        # Properly pack the canvas into the grid
-        canvas.get_tk_widget().grid(row=0, column=0, sticky="nsew")
+            # Configure grid to make sure the canvas expands with the frame size
+            self.graph_frame.grid_rowconfigure(0, weight=1)
+            self.graph_frame.grid_columnconfigure(0, weight=1)
 
-        # Configure grid to make sure the canvas expands with the frame size
-        self.graph_frame.grid_rowconfigure(0, weight=1)
-        self.graph_frame.grid_columnconfigure(0, weight=1)
+        # Only the bar heights and title change between hospitals
+        self.chart.update(hospital)
 
     def simulate_supply(self):
-        """Check hospital stock and simulate supply chain."""
-        if self.number_times_pressed == 0:
-            insufficient_hospitals = check_hospitals_stock(self.hospitals)
-
+        """Check hospital stock and simulate supply chain on a worker thread, so the window keeps responding."""
+        if self.number_times_pressed == 0 and self.worker is None:
             # Clear previous labels in the left and right frames
             for widget in self.left_frame.winfo_children():
                 widget.destroy()
@@ -165,20 +241,117 @@ class SupplyChainSimulation:
             for widget in self.right_frame.winfo_children():
                 widget.destroy()
 
-            if insufficient_hospitals:
-                self.show_insufficient_stock_screen(insufficient_hospitals)
-            else:
-                self.simulation_result_label.config(text="All hospitals are sufficiently supplied.", fg="green")
+            self.solution_records = []
+            self.solutions_list = None
+            self.worker = SolveWorker(self.solve).start()
+            self.cancel_button = tk.Button(self.simulation_frame, text="Cancel Simulation", command=self.cancel_simulation, font=("Helvetica", 12))
+            self.cancel_button.grid(row=3, column=2, pady=20, sticky="nsew")
+            self.frame.after(WORKER_POLL_MS, self.poll_worker)
             self.number_times_pressed += 1
             self.show_return_button()
 
+    def solve(self, worker):
+        """Runs on the worker thread: find the shortages and resolve them, streaming the Allocation records."""
+        with instrumentation.run("simulation"):  # Profiled here, cProfile only sees its own thread
+            return self._solve(worker)
+
+    def _solve(self, worker):
+        # The worker moves stock on copies; add_solutions applies the streamed records on the Tk thread
+        hospitals, suppliers = copy_entities(self.hospitals), copy_entities(self.suppliers)
+        minimums = self.history_minimums(worker) if self.use_history_minimums else None
+        insufficient_hospitals = check_hospitals_stock(hospitals, minimums=minimums)
+        worker.report("problems", insufficient_hospitals)
+        records = []
+        if not insufficient_hospitals:
+            return records
+
+        on_solution = partial(worker.report, "solutions")
+        if self.solver_mode == "incremental":
+            self.incremental_resolver.resolve(hospitals, suppliers, records=records, minimums=minimums,
+                                              on_solution=on_solution, check_cancelled=worker.check_cancelled)
+            return records
+
+        # Create min_inventory_levels dictionary
+        min_inventory_levels = minimum_levels(hospitals, minimums)
+        resolve_shortages(insufficient_hospitals, hospitals, suppliers, min_inventory_levels,
+                          mode=self.solver_mode, on_solution=on_solution, check_cancelled=worker.check_cancelled,
+                          records=records, cache=self.plan_cache, minimums=minimums)
+        return records
+
+    def history_minimums(self, worker):
+        """The history minimums for the loaded hospitals; None, with a warning for the user, when they do not apply."""
+        minimums = load_history_minimums()
+        warning = ("No supply_data history found, using the static minimums" if minimums is None
+                   else history_mismatch(minimums, [hospital.name for hospital in self.hospitals],
+                                         self.hospitals[0].state.products))
+        if warning:
+            worker.report("warning", warning)
+            return None
+        return minimums
+
+    def poll_worker(self):
+        """Show what the worker reported since the last poll; reschedules itself until the worker is done."""
+        worker = self.worker
+        if worker is None:
+            return  # Cancelled and left the screen
+        solutions = []  # Added in one go, the list redraws once per poll
+        for kind, payload in worker.poll():
+            if kind == "solutions":
+                solutions.extend(payload)
+                continue
+            if solutions:
+                self.add_solutions(solutions)
+                solutions = []
+            if kind == "problems":
+                self.show_insufficient_stock_screen(payload)
+            elif kind == "warning":
+                messagebox.showwarning("Supply Chain Simulation", payload)
+            elif kind == "done":
+                self.finish_simulation("See solutions above." if payload else "All hospitals are sufficiently supplied.", "green")
+            elif kind == "cancelled":
+                self.finish_simulation("Simulation cancelled, the solutions above are partial.", "red")
+            elif kind == "error":
+                self.finish_simulation("Simulation failed.", "red")
+                messagebox.showerror("Simulation failed", str(payload))
+        if solutions:
+            self.add_solutions(solutions)
+        if worker.running:
+            self.frame.after(WORKER_POLL_MS, self.poll_worker)
+
+    def cancel_simulation(self):
+        """Ask the worker to stop after the hospital it is resolving."""
+        if self.worker is not None:
+            self.worker.cancel()
+
+    def finish_simulation(self, text, color):
+        """Show the final result line and remove the cancel button."""
+        self.worker = None
+        self.update_dashboard()  # Transfers changed the stock
+        if self.cancel_button is not None:
+            self.cancel_button.destroy()
+            self.cancel_button = None
+        self.simulation_result_label = tk.Label(self.right_frame, text=text, font=("Helvetica", 10, "bold"), fg=color, justify="left")
+        self.simulation_result_label.grid(row=2, column=0, padx=10, pady=5, sticky="w")
+        report = instrumentation.write_report()  # Next to output.txt; only when SUPPLY_CHAIN_INSTRUMENT is set
+        if report:
+            print(f"Wrote the run report to {report}")
+
     def show_return_button(self):
         """Show the return button."""
         self.return_button = tk.Button(self.simulation_frame, text="Return", command=self.return_to_main_screen, font=("Helvetica", 12))
         self.return_button.grid(row=4, column=1, pady=10, sticky="nsew")
 
+    def stop_worker(self):
+        """Cancel a running simulation; its thread stops at the next hospital and nobody polls it anymore."""
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker = None
+        self.cancel_button = None
+
     def return_to_main_screen(self):
         """Return to the home screen and refresh the simulation content."""
+        self.stop_worker()
+        self.close_dashboard()
         self.number_times_pressed = 0
         self.hospitals = load_hospitals(self.datamode)  # Reload hospital data
         self.suppliers = load_suppliers()
@@ -186,22 +359,24 @@ class SupplyChainSimulation:
         self.return_button = None
         self.solutions_label = None  # Remove solutions when going back
         self.simulation_frame.destroy()
-        home_screen = HomeScreen(self.frame, self.create_simulation_screen)
+        home_screen = HomeScreen(self.frame, self.create_simulation_screen, self.data_saved)
         home_screen.create_home_screen()
 
     def return_to_home(self):
         """Return to the home screen and refresh the simulation content."""
+        self.stop_worker()
+        self.close_dashboard()
         self.hospitals = load_hospitals(self.datamode)  # Reload hospital data
         self.suppliers = load_suppliers()
         self.simulation_result_label = None
         self.return_button = None
         self.solutions_label = None  # Remove solutions when going back
         self.simulation_frame.destroy()
-        home_screen = HomeScreen(self.frame, self.create_simulation_screen)
+        home_screen = HomeScreen(self.frame, self.create_simulation_screen, self.data_saved)
         home_screen.create_home_screen()
 
     def show_insufficient_stock_screen(self, insufficient_hospitals):
-        """Show the message for insufficient stock in the left and right frames."""
+        """Show the problems in the left frame; the solutions follow in the right frame as they are found."""
         
         # Clear any existing labels in the problems and solutions sections
         for widget in self.left_frame.winfo_children():
@@ -217,29 +392,31 @@ class SupplyChainSimulation:
         self.solutions_header = tk.Label(self.right_frame, text="Solutions:", font=("Helvetica", 12, "bold"))
         self.solutions_header.grid(row=0, column=0, padx=10, pady=5, sticky="w")
 
-        # Populate problems (left list)
-        row = 1  # Start adding problems below the header
-        for hospital, missing_products in insufficient_hospitals:
-            problem_text = f"{hospital.name} needs:\n"
-            for product, amount in missing_products:
-                problem_text += f"- {product}: {amount} units\n"
-            problem_label = tk.Label(self.left_frame, text=problem_text, font=("Helvetica", 10), justify="left")
-            problem_label.grid(row=row, column=0, padx=10, pady=5, sticky="w")
-            row += 1  # Increment row for the next problem
-
-        # Create min_inventory_levels dictionary
-        min_inventory_levels = {hospital.name: hospital.min_inventory for hospital in self.hospitals}
-
-        # Populate solutions (right list)
-        self.solutions = resolve_shortages_with_minimum_distance(insufficient_hospitals, self.hospitals, self.suppliers, min_inventory_levels)
-        row = 1  # Start adding solutions below the header
-        for solution in self.solutions:
-            solution_label = tk.Label(self.right_frame, text=solution, font=("Helvetica", 10), justify="left")
-            solution_label.grid(row=row, column=0, padx=10, pady=5, sticky="w")
-            row += 1  # Increment row for the next solution
-
-        self.simulation_result_label = tk.Label(self.right_frame, text="See solutions above.", font=("Helvetica", 10, "bold"), fg="green", justify="left")
-        self.simulation_result_label.grid(row=row + 1, column=0, padx=10, pady=5, sticky="w")
+        # Both lists only build the rows in view, so thousands of shortages cost no widgets
+        for frame in (self.left_frame, self.right_frame):
+            frame.grid_rowconfigure(1, weight=1)
+            frame.grid_columnconfigure(0, weight=1)
+
+        with instrumentation.timer("gui.result_lists"):
+            # Populate problems (left list)
+            problems_list = ResultList(self.left_frame, PROBLEM_COLUMNS, widths=(180, 100, 90), filter_columns=("Hospital", "Product"))
+            problems_list.grid(row=1, column=0, padx=10, pady=5, sticky="nsew")
+            problems_list.set_records([(hospital.name, product, amount)
+                                       for hospital, missing_products in insufficient_hospitals
+                                       for product, amount in missing_products])
+
+            # Solutions (right list) are added by add_solutions
+            self.solutions_list = ResultList(self.right_frame, SOLUTION_COLUMNS, widths=(160, 90, 160, 60, 90, 80),
+                                             filter_columns=("Hospital", "Product"))
+            self.solutions_list.grid(row=1, column=0, padx=10, pady=5, sticky="nsew")
+
+    def add_solutions(self, records):
+        """Move the stock of these Allocation records and append them to the right list."""
+        apply_plan(records, self.hospitals, self.suppliers)
+        self.solution_records.extend(records)
+        if self.solutions_list is not None:
+            with instrumentation.timer("gui.add_solutions"):
+                self.solutions_list.extend([solution_row(record) for record in records])
 
     def close_window(self):
         """Afsluiten van het venster en stoppen van de applicatie."""
@@ -247,221 +424,3 @@ class SupplyChainSimulation:
         self.frame.quit()  # Dit zorgt ervoor dat de tkinter loop stopt
         self.frame.destroy()  # Dit sluit het venster volledig af
         exit()  # Dit zorgt ervoor dat ook de terminal wordt afgesloten
-
-class Hospital:
-    def __init__(self, name, inventory, min_inventory, coordinates):
-        self.name = name
-        self.inventory = inventory
-        self.min_inventory = min_inventory 
-        self.coordinates =  coordinates
-
-    def needs_supply(self):
-        return any(self.inventory[product] < self.min_inventory[product] for product in self.inventory)
-
-    def request_supply(self):
-        return [
-            (product, self.min_inventory[product] - qty) 
-            for product, qty in self.inventory.items() 
-            if qty < self.min_inventory[product]
-        ]
-
-class Supplier:
-    def __init__(self, name, inventory, production, coordinates):
-        self.name = name
-        self.inventory = inventory
-        self.production = production
-        self.coordinates = coordinates  
-
-    def can_supply(self, required_items):
-        return all(self.inventory.get(product, 0) >= amount for product, amount in required_items)
-
-    def supply(self, required_items):
-        for product, amount in required_items:
-            if self.inventory.get(product, 0) >= amount:
-                self.inventory[product] -= amount
-    
-    def get_available_stock(self, product):
-        """Retourneer de beschikbare voorraad voor een bepaald product."""
-        return self.inventory.get(product, 0)
-
-
-# Product mapping (Old name -> New name)
-product_mapping = {
-    "A": "Drug A",
-    "B": "Drug B",
-    "C": "Drug C",
-    "D": "Drug D",
-    "E": "Drug E"
-}
-
-# Load hospitals
-def load_hospitals(is_changed):
-    """Load hospital data from a CSV file with support for multiple products dynamically."""
-    if is_changed.lower() == "hypo":
-        filename = r"C:\creativity\Team-4-Ctrl-Alt-Defeat-OMP\hypo.csv"
-    else:
-        filename = r"C:\creativity\Team-4-Ctrl-Alt-Defeat-OMP\stijn\other_required_files\Hospitals.csv"
-    
-    hospitals = []
-    try:
-        with open(filename, newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                # Dynamically determine product keys from column names
-                product_keys = [key for key in row.keys() if key.startswith("stock_")]
-                min_product_keys = [key.replace("stock_", "min_stock_") for key in product_keys]
-
-                # Inventory and minimum inventory filled dynamically with renaming
-                inventory = {
-                    product_mapping.get(key.replace("stock_", ""), key.replace("stock_", "")): int(row[key])
-                    for key in product_keys
-                }
-                min_inventory = {
-                    product_mapping.get(key.replace("min_stock_", ""), key.replace("min_stock_", "")): int(row[key])
-                    for key in min_product_keys
-                }
-
-                hospitals.append(Hospital(
-                    name=row["name"],
-                    inventory=inventory,
-                    min_inventory=min_inventory,
-                    coordinates=tuple(map(float, row["coordinates"].split(", ")))
-                ))
-
-        print(f"Loaded {len(hospitals)} hospitals successfully.")
-    except FileNotFoundError:
-        print(f"Error: {filename} not found.")
-    return hospitals
-
-
-# Load suppliers
-def load_suppliers(filename=r"C:\creativity\Team-4-Ctrl-Alt-Defeat-OMP\stijn\other_required_files\Suppliers.csv"):
-    """Load supplier data from a CSV file."""
-    suppliers = []
-    try:
-        with open(filename, newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                # Mapping product names dynamically for inventory and production
-                inventory = {
-                    product_mapping.get(key.replace("stock_", ""), key.replace("stock_", "")): int(row[key])
-                    for key in ["stock_A", "stock_B", "stock_C", "stock_D", "stock_E"]
-                }
-                production = {
-                    product_mapping.get(key.replace("production_", ""), key.replace("production_", "")): int(row[key])
-                    for key in ["production_A", "production_B", "production_C", "production_D", "production_E"]
-                }
-
-                suppliers.append(Supplier(
-                    name=row["name"],
-                    inventory=inventory,
-                    production=production,
-                    coordinates=tuple(map(float, row["coordinates"].split(", "))) 
-                ))
-
-        print(f"Loaded {len(suppliers)} suppliers successfully.")  
-    except FileNotFoundError:
-        print(f"Error: {filename} not found.")
-    return suppliers
-
-
-
-# Check hospital stock levels
-def check_hospitals_stock(hospitals):
-    insufficient_hospitals = []
-    for hospital in hospitals:
-        print(f"Checking {hospital.name}: Inventory {hospital.inventory}, Min {hospital.min_inventory}")
-        missing_products = [
-            (product, hospital.min_inventory[product] - qty) 
-            for product, qty in hospital.inventory.items() 
-            if qty < hospital.min_inventory[product]
-        ]
-        if missing_products:
-            insufficient_hospitals.append((hospital, missing_products))
-    return insufficient_hospitals
-
-def generate_combinations(all_sources, remaining_shortage):
-    """Generate all possible combinations of sources that could potentially fulfill the shortage"""
-    combinations_list = []
-    
-    # Check combinations that may fulfill the shortage
-    for r in range(1, len(all_sources) + 1):  # Try combinations from 1 to the full set
-        for comb in combinations(all_sources, r):
-            selected_combination = []
-            temp_shortage = remaining_shortage
-            for source, dist, stock in comb:
-                supply_amount = min(stock, temp_shortage)
-                selected_combination.append((source, dist, supply_amount))
-                temp_shortage -= supply_amount
-                if temp_shortage <= 0:
-                    break
-            if temp_shortage <= 0:
-                combinations_list.append(selected_combination)
-    
-    return combinations_list
-
-
-def calculate_distance(coord1, coord2):
-    # Convert latitude and longitude from degrees to radians
-    lat1, lon1 = coord1
-    lat2, lon2 = coord2
-    R = 6371  # Radius of the Earth in km
-    dlat = radians(lat2 - lat1)
-    dlon = radians(lon2 - lon1)
-    a = sin(dlat / 2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2)**2
-    c = 2 * atan2(sqrt(a), sqrt(1 - a))
-    distance = R * c  # Distance in km
-    return distance
-
-def resolve_shortages_with_minimum_distance(insufficient_hospitals, hospitals, suppliers, min_inventory_levels):
-    solutions = []
-
-    for hospital, shortages in insufficient_hospitals:
-        for product, shortage in shortages:
-            remaining_shortage = shortage
-            used_sources = []
-
-            # Combineer alle mogelijke leveranciers (ziekenhuizen + leveranciers)
-            all_sources = []
-            for source in hospitals + suppliers:
-                if source != hospital:  # Voorkom dat een ziekenhuis zichzelf bevoorraden kan
-                    available_stock = source.inventory.get(product, 0)
-                    min_stock = min_inventory_levels.get(source.name, {}).get(product, 0)  # Haal de minimumvoorraad op
-                    
-                    if available_stock > min_stock:  # Alleen leveren als er boven de minimumvoorraad blijft
-                        max_deliverable = available_stock - min_stock
-                        distance = calculate_distance(hospital.coordinates, source.coordinates)
-                        all_sources.append((source, distance, max_deliverable))
-
-            # Sorteer bronnen op efficiëntie (afstand per eenheid)
-            all_sources.sort(key=lambda x: x[1] / x[2])  # Distance per unit
-
-            # Gebruik bronnen totdat het tekort is opgelost
-            total_distance = 0
-            for source, dist, max_stock in all_sources:
-                if remaining_shortage <= 0:
-                    break  # Stop als het tekort is opgelost
-
-                supply_amount = min(max_stock, remaining_shortage)
-
-                # Pas voorraad aan
-                source.inventory[product] -= supply_amount
-                hospital.inventory[product] += supply_amount
-
-                total_distance += dist * supply_amount
-                remaining_shortage -= supply_amount
-                used_sources.append((source, supply_amount, dist))
-
-            # Maak een oplossingstekst
-            if remaining_shortage > 0:
-                solutions.append(f"⚠️ {hospital.name} still has a shortage of {remaining_shortage} units of {product}!")
-
-            else:
-                solutions.append(f"✅ {hospital.name} shortage of {product} resolved!")
-                for source, amount, dist in used_sources:
-                    solutions.append(f"  - {source.name} supplied {amount} units at {dist:.2f} km")
-
-                avg_distance_per_unit = total_distance / shortage if shortage > 0 else 0
-               ## solutions.append(f"  ➡️ Average distance per unit: {avg_distance_per_unit:.2f} km/unit")
-
-    return solutions
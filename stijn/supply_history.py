@@ -0,0 +1,205 @@
+import os
+import sqlite3
+from collections import OrderedDict
+from urllib.parse import quote
+
+import numpy as np
+
+from csv_loader import SUPPLY_DB
+
+# The history table as supply_chain.db has it; history_import creates it in a new database
+HISTORY_TABLE = """
+CREATE TABLE IF NOT EXISTS supply_data (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    hospital_name TEXT,
+    date TEXT,
+    product TEXT,
+    current_stock INTEGER,
+    min_stock INTEGER,
+    supplier_stock INTEGER,
+    orders_placed INTEGER,
+    restock_time_days INTEGER,
+    demand_forecast INTEGER
+)
+"""
+
+# Covering index for date-range aggregates: the query never has to touch the table rows
+HISTORY_INDEX = """
+CREATE INDEX IF NOT EXISTS supply_data_date_history
+ON supply_data (date, hospital_name, product, orders_placed, demand_forecast, restock_time_days)
+"""
+
+PROFILE_QUERY = """
+SELECT hospital_name, product, SUM(orders_placed), AVG(demand_forecast), AVG(restock_time_days),
+       MAX(restock_time_days), COUNT(*)
+FROM supply_data INDEXED BY supply_data_date_history
+WHERE date >= ? AND date <= ?
+GROUP BY hospital_name, product
+"""
+
+# demand_forecast values are forecasts for this many days ahead
+FORECAST_HORIZON_DAYS = 7
+# History window the simulation's dynamic minimums are computed over
+HISTORY_DAYS = 90
+
+
+class DemandProfile:
+    """Per hospital x product demand, lead time and dynamic minimum over one date range."""
+
+    def __init__(self, hospitals, products, demand_per_day, forecast_per_day, lead_time_days, max_lead_time_days,
+                 records):
+        self.hospitals = hospitals
+        self.products = products
+        self.demand_per_day = demand_per_day  # Units ordered per day in the range
+        self.forecast_per_day = forecast_per_day
+        self.lead_time_days = lead_time_days  # Average restock time
+        self.max_lead_time_days = max_lead_time_days
+        self.records = records  # History rows behind each value
+
+    def __len__(self):
+        return len(self.hospitals)
+
+    @property
+    def dynamic_minimum(self):
+        """Stock that covers the expected demand (history or forecast, whichever is higher)
+        during the longest observed restock time."""
+        rate = np.maximum(self.demand_per_day, self.forecast_per_day)
+        return np.ceil(rate * self.max_lead_time_days).astype(np.int64)
+
+    def matches(self, names, products):
+        """How many of these hospitals x products this profile has history for."""
+        names, products = set(names), set(products)
+        return sum(hospital in names and product in products
+                   for hospital, product in zip(self.hospitals, self.products))
+
+    def apply(self, names, products, min_stock):
+        """Copy of a (names x products) minimum matrix with the dynamic minimums filled in
+        wherever this profile has history for the hospital and product."""
+        rows = {name: row for row, name in enumerate(names)}
+        columns = {product: column for column, product in enumerate(products)}
+        min_stock = np.array(min_stock, dtype=np.int64)
+        for hospital, product, minimum in zip(self.hospitals, self.products, self.dynamic_minimum.tolist()):
+            if hospital in rows and product in columns:
+                min_stock[rows[hospital], columns[product]] = minimum
+        return min_stock
+
+
+class SupplyHistory:
+    """Aggregated views on the supply_data history, cached per date range.
+
+    Cached profiles are dropped as soon as the database changes, through this connection or
+    any other one. `store` is a NetworkStore or a plain sqlite3 connection; on a read-only
+    connection the covering index is used when an import created it, else the table is scanned.
+    """
+
+    def __init__(self, store, max_entries=32, forecast_horizon_days=FORECAST_HORIZON_DAYS):
+        self.connection = getattr(store, "connection", store)
+        try:
+            self.connection.execute(HISTORY_INDEX)
+        except sqlite3.OperationalError:  # Read-only
+            pass
+        indexed = self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'supply_data_date_history'").fetchone()
+        self._query = PROFILE_QUERY if indexed else PROFILE_QUERY.replace(" INDEXED BY supply_data_date_history", "")
+        self.forecast_horizon_days = forecast_horizon_days
+        self.max_entries = max_entries
+        self._profiles = OrderedDict()
+
+    def _data_version(self):
+        # data_version moves on commits by other connections, total_changes on our own
+        return self.connection.execute("PRAGMA data_version").fetchone()[0], self.connection.total_changes
+
+    def date_range(self):
+        """(first, last) date in the history, or (None, None) when it is empty."""
+        return self.connection.execute("SELECT MIN(date), MAX(date) FROM supply_data").fetchone()
+
+    def profile(self, start, end):
+        """DemandProfile of every hospital x product with history between start and end (ISO dates, inclusive)."""
+        key = (start, end)
+        version = self._data_version()
+        cached = self._profiles.get(key)
+        if cached is not None and cached[0] == version:
+            self._profiles.move_to_end(key)
+            return cached[1]
+
+        rows = self.connection.execute(self._query, (start, end)).fetchall()
+        days = self._days_between(start, end)
+        if rows:
+            hospitals, products, ordered, forecast, lead_time, max_lead_time, records = zip(*rows)
+        else:
+            hospitals = products = ordered = forecast = lead_time = max_lead_time = records = ()
+        profile = DemandProfile(
+            list(hospitals),
+            list(products),
+            np.array(ordered, dtype=np.float64) / days,
+            np.array(forecast, dtype=np.float64) / self.forecast_horizon_days,
+            np.array(lead_time, dtype=np.float64),
+            np.array(max_lead_time, dtype=np.float64),
+            np.array(records, dtype=np.int64),
+        )
+
+        self._profiles[key] = (version, profile)
+        self._profiles.move_to_end(key)
+        while len(self._profiles) > self.max_entries:
+            self._profiles.popitem(last=False)
+        return profile
+
+    def recent_profile(self, days, end=None):
+        """DemandProfile of the `days` days of history up to and including `end` (an ISO date).
+
+        Without `end` the window ends at the last date in the history; pass the simulated date to
+        get a window that rolls along with the simulation.
+        """
+        if end is None:
+            _, end = self.date_range()
+            if end is None:
+                return self.profile("", "")
+        end = str(np.datetime64(end, "D"))
+        start = (np.datetime64(end) - np.timedelta64(days - 1, "D")).astype(str)
+        return self.profile(start, end)
+
+    @staticmethod
+    def _days_between(start, end):
+        try:
+            return max(int((np.datetime64(end) - np.datetime64(start)) / np.timedelta64(1, "D")) + 1, 1)
+        except ValueError:
+            return 1
+
+
+def open_history(path=None):
+    """Read-only connection to the history database (default SUPPLY_DB), or None without a supply_data table."""
+    path = path or SUPPLY_DB
+    if not os.path.exists(path):
+        return None
+    connection = sqlite3.connect(f"file:{quote(os.path.abspath(path))}?mode=ro", uri=True)
+    if connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'supply_data'").fetchone() \
+            is None:
+        connection.close()
+        return None
+    return connection
+
+
+def load_history_minimums(days=HISTORY_DAYS, path=None, end=None):
+    """DemandProfile of the `days` days of history up to `end` (default: the last day with history), or None.
+
+    None when the history database (default SUPPLY_DB) or its supply_data table is missing or has no
+    rows in the window. The database is opened read-only, so using history minimums never changes it.
+    """
+    connection = open_history(path)
+    if connection is None:
+        return None
+    try:
+        profile = SupplyHistory(connection).recent_profile(days, end)
+    finally:
+        connection.close()
+    return profile if len(profile) else None
+
+
+def history_mismatch(profile, names, products):
+    """Warning text when `profile` has no history for any of these hospitals x products, else None."""
+    if profile is None or profile.matches(names, products):
+        return None
+    if not len(profile):
+        return "The supply_data history has no rows in the window; using the static minimums"
+    return (f"The supply_data history matches none of the {len(names)} hospitals and their products "
+            f"(it has e.g. {profile.hospitals[0]!r} / {profile.products[0]!r}); using the static minimums")
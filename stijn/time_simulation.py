@@ -0,0 +1,388 @@
+import argparse
+import sys
+
+import numpy as np
+
+from allocation_solver import solve_transportation
+from distance_matrix import EARTH_RADIUS_KM, haversine_matrix
+from network_state import NetworkState
+from network_store import load_store_state
+from snapshot_cache import load_network_state
+from spatial_index import to_unit_vectors
+from supply_history import HISTORY_DAYS, SupplyHistory, history_mismatch, open_history
+
+# Without consumption data a hospital is assumed to use its minimum stock in this many days
+DEFAULT_COVER_DAYS = 7
+# Nearest suppliers and nearest hospitals each hospital tries first, per source type
+CANDIDATES_PER_TYPE = 8
+
+
+class DayResult:
+    """Totals of one simulated day; `short` marks hospital x product cells still below minimum."""
+
+    def __init__(self, shortage_units, unresolved_units, transferred_units, transport_km, stockout_units, short):
+        self.shortage_units = shortage_units
+        self.unresolved_units = unresolved_units
+        self.transferred_units = transferred_units
+        self.transport_km = transport_km
+        self.stockout_units = stockout_units
+        self.short = short
+
+
+class SimulationHistory:
+    """Per-day totals of a time-stepped run, plus how often each hospital ended a day short."""
+
+    def __init__(self, days, hospital_names, products):
+        self.hospital_names = hospital_names
+        self.products = products
+        self.shortage_units = np.zeros(days, dtype=np.int64)  # Units below minimum before transfers
+        self.unresolved_units = np.zeros(days, dtype=np.int64)  # Units still below minimum after transfers
+        self.transferred_units = np.zeros(days, dtype=np.int64)
+        self.transport_km = np.zeros(days)  # Sum of distance x units
+        self.stockout_units = np.zeros(days, dtype=np.int64)  # Consumption that could not be served
+        self.days_short = np.zeros((len(hospital_names), len(products)), dtype=np.int64)
+
+    def record(self, index, day):
+        self.shortage_units[index] = day.shortage_units
+        self.unresolved_units[index] = day.unresolved_units
+        self.transferred_units[index] = day.transferred_units
+        self.transport_km[index] = day.transport_km
+        self.stockout_units[index] = day.stockout_units
+        self.days_short += day.short
+
+    def summary(self):
+        return {
+            "days": len(self.shortage_units),
+            "shortage_units": int(self.shortage_units.sum()),
+            "unresolved_units": int(self.unresolved_units.sum()),
+            "transferred_units": int(self.transferred_units.sum()),
+            "transport_km": float(self.transport_km.sum()),
+            "stockout_units": int(self.stockout_units.sum()),
+        }
+
+
+def nearest_candidates(coordinates, n_hospitals, per_type=CANDIDATES_PER_TYPE, chunk_rows=1024):
+    """For every hospital: its nearest suppliers and nearest other hospitals, closest first.
+
+    Returns (indices, distances), both (hospitals x candidates). Entities are ranked by the dot
+    product of their unit-sphere points, which orders them like great-circle distance but is one
+    matrix product per chunk of rows; only the chosen candidates get a distance in km.
+    """
+    points = to_unit_vectors(coordinates) if len(coordinates) else np.zeros((0, 3))
+    groups = [(0, n_hospitals), (n_hospitals, len(coordinates))]
+    indices, distances = [], []
+    for start in range(0, n_hospitals, chunk_rows):
+        rows = np.arange(start, min(start + chunk_rows, n_hospitals))
+        closeness = points[rows] @ points.T
+        closeness[np.arange(len(rows)), rows] = -np.inf  # A hospital is not its own source
+
+        chunk_indices = []
+        for first, end in groups:
+            k = min(per_type, end - first - (first == 0))
+            if k <= 0:
+                continue
+            nearest = np.argpartition(closeness[:, first:end], -k, axis=1)[:, -k:]
+            chunk_indices.append(first + nearest)
+        chunk_indices = np.hstack(chunk_indices) if chunk_indices else np.zeros((len(rows), 0), dtype=np.int64)
+        chord = np.linalg.norm(points[chunk_indices] - points[rows, None], axis=2)
+        chunk_distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, chord / 2))
+        order = np.argsort(chunk_distances, axis=1, kind="stable")
+        indices.append(np.take_along_axis(chunk_indices, order, axis=1))
+        distances.append(np.take_along_axis(chunk_distances, order, axis=1))
+    if not indices:
+        return np.zeros((0, 0), dtype=np.int64), np.zeros((0, 0))
+    return np.vstack(indices), np.vstack(distances)
+
+
+class NearestResolver:
+    """Resolve shortages on stock matrices: each short hospital takes from its nearest source with stock.
+
+    Works a whole product at once, in rounds over precomputed candidate lists; when two hospitals
+    want the same source, the one listed first is served first. Hospitals whose candidates ran
+    dry fall back to the nearest of all entities that still have surplus, batched per product
+    into one distance matrix and the same kind of rounds.
+    Rows 0..n_hospitals-1 of the matrices are hospitals, the rest are suppliers.
+    """
+
+    def __init__(self, coordinates, n_hospitals, candidates=None, candidate_distances=None):
+        self.coordinates = coordinates
+        self.n_hospitals = n_hospitals
+        if candidates is None:
+            candidates, candidate_distances = nearest_candidates(coordinates, n_hospitals)
+        self.candidates = candidates
+        self.candidate_distances = candidate_distances
+        self._distance_rows = {}
+
+    def distances(self, hospitals):
+        """Distance rows (hospital -> every entity) for these hospitals, computed once each."""
+        missing = [hospital for hospital in hospitals if hospital not in self._distance_rows]
+        if missing:
+            rows = haversine_matrix(self.coordinates[missing], self.coordinates)
+            self._distance_rows.update(zip(missing, rows))
+        return self._distance_rows
+
+    def resolve(self, stock, min_stock, short_hospitals, short_products, deficit, transfers=None,
+                check_cancelled=None):
+        """Move stock into the short cells in place; returns (transferred units, distance x units).
+
+        When `transfers` is a list, every transfer is appended to it as
+        (hospital rows, source rows, product column, amounts, distances) arrays.
+        check_cancelled() is called before each product and may raise to stop.
+        """
+        transferred, transport_km = 0, 0.0
+        for product in np.unique(short_products).tolist():
+            if check_cancelled is not None:
+                check_cancelled()
+            hospitals = short_hospitals[short_products == product]
+            need = deficit[hospitals, product].copy()
+            surplus = stock[:, product] - min_stock[:, product]
+
+            # Round k: every hospital still short asks its k-th nearest candidate
+            for k in range(self.candidates.shape[1]):
+                active = np.flatnonzero(need > 0)
+                if not len(active) or surplus.max() <= 0:
+                    break
+                sources = self.candidates[hospitals[active], k]
+                has_stock = surplus[sources] > 0
+                active, sources = active[has_stock], sources[has_stock]
+                if not len(active):
+                    continue
+
+                order, given = self._serve(stock, product, hospitals, need, surplus, active, sources)
+                distances = self.candidate_distances[hospitals[active[order]], k]
+                transferred += int(given.sum())
+                transport_km += float(given @ distances)
+                if transfers is not None:
+                    transfers.append((hospitals[active[order]], sources[order], product, given, distances))
+
+            # Hospitals whose candidates ran dry look further, as long as anything is left
+            moved, km = self._resolve_rest(stock, product, hospitals, need, surplus, transfers)
+            transferred += moved
+            transport_km += km
+        return transferred, transport_km
+
+    @staticmethod
+    def _serve(stock, product, hospitals, need, surplus, active, sources):
+        """Serve hospitals[active] from their requested `sources`, per source in hospital order until it runs out.
+
+        Updates stock, need and surplus in place; returns (order of the requests as served, units given).
+        """
+        order = np.argsort(sources, kind="stable")
+        active, sources = active[order], sources[order]
+        requested = need[active]
+        requested_before = np.cumsum(requested) - requested
+        group_start = np.r_[True, sources[1:] != sources[:-1]]
+        requested_before -= np.maximum.accumulate(np.where(group_start, requested_before, 0))
+        given = np.clip(np.minimum(requested, surplus[sources] - requested_before), 0, None)
+
+        np.subtract.at(surplus, sources, given)
+        np.subtract.at(stock, (sources, product), given)  # A source can appear more than once
+        need[active] -= given
+        stock[hospitals[active], product] += given
+        return order, given
+
+    def _resolve_rest(self, stock, product, hospitals, need, surplus, transfers):
+        """Cover what the candidate rounds left from the nearest of all entities with surplus.
+
+        One distance matrix for every hospital still short against every entity with surplus,
+        then rounds in which each hospital asks the nearest of those that still has stock.
+        """
+        waiting = np.flatnonzero(need > 0)
+        sources = np.flatnonzero(surplus > 0)
+        if not len(waiting) or not len(sources):
+            return 0, 0.0
+        rows = hospitals[waiting]
+        distances = haversine_matrix(self.coordinates[rows], self.coordinates[sources])
+        distances[rows[:, None] == sources[None, :]] = np.inf  # A hospital is not its own source
+
+        transferred, transport_km = 0, 0.0
+        while True:
+            has_stock = surplus[sources] > 0
+            still_short = need[waiting] > 0
+            if not has_stock.any() or not still_short.any():
+                break
+            sources, waiting, distances = sources[has_stock], waiting[still_short], distances[still_short][:, has_stock]
+            nearest = np.argmin(distances, axis=1)
+            nearest_distances = distances[np.arange(len(waiting)), nearest]
+            reachable = np.isfinite(nearest_distances)  # Only its own stock left: nothing to take
+            if not reachable.all():
+                waiting, distances = waiting[reachable], distances[reachable]
+                nearest, nearest_distances = nearest[reachable], nearest_distances[reachable]
+                if not len(waiting):
+                    break
+
+            order, given = self._serve(stock, product, hospitals, need, surplus, waiting, sources[nearest])
+            served = given > 0
+            transferred += int(given.sum())
+            transport_km += float(given @ nearest_distances[order])
+            if transfers is not None:
+                transfers.append((hospitals[waiting[order]][served], sources[nearest[order]][served], product,
+                                  given[served], nearest_distances[order][served]))
+        return transferred, transport_km
+
+
+class TimeSteppedSimulation:
+    """Run the network day by day: suppliers produce, hospitals consume, shortages get resolved.
+
+    All stock lives in one (hospitals + suppliers) x products matrix that is updated in place,
+    and each day only the hospitals that dropped below their minimum are resolved.
+
+    mode "nearest" (default) resolves them with a NearestResolver; mode "optimal" solves each
+    day's transfers as a transportation problem, which is only practical for small networks.
+
+    With a supply_history.SupplyHistory as `history`, every day's minimums are the dynamic ones
+    of the `history_days` days before that simulated date, so the window rolls along with the run.
+    Day 0 is `start_date` (default: the day after the last day with history).
+    """
+
+    def __init__(self, hospital_state, supplier_state, consumption=None, production_interval_days=1,
+                 mode="nearest", history=None, start_date=None, history_days=HISTORY_DAYS):
+        if mode not in ("nearest", "optimal"):
+            raise ValueError(f"Unknown solver mode {mode!r}, expected 'nearest' or 'optimal'")
+        self.state = NetworkState.concatenate(hospital_state, supplier_state)
+        self.n_hospitals = len(hospital_state)
+        self.production_interval_days = production_interval_days
+        self.mode = mode
+        self.day = 0
+
+        hospital_min = self.state.min_stock[:self.n_hospitals]
+        if consumption is None:
+            consumption = -(-hospital_min // DEFAULT_COVER_DAYS)  # Rounded up
+        self.consumption = np.asarray(consumption, dtype=np.int64).reshape(hospital_min.shape)
+        self.resolver = NearestResolver(self.state.coordinates, self.n_hospitals)
+
+        self.history = history
+        self.history_days = history_days
+        self.static_min_stock = hospital_min.copy()
+        if history is not None and start_date is None:
+            _, last = history.date_range()
+            start_date = np.datetime64(last, "D") + 1 if last is not None else None
+        self.start_date = np.datetime64(start_date, "D") if start_date is not None else None
+
+    def date(self):
+        """Simulated date of the next step, or None without a start date."""
+        return None if self.start_date is None else self.start_date + self.day
+
+    def history_minimums(self):
+        """DemandProfile of the history_days before the next step's date."""
+        return self.history.recent_profile(self.history_days, self.date() - 1)
+
+    def step(self):
+        """Advance one day and return its DayResult."""
+        if self.history is not None and self.start_date is not None:
+            self.state.min_stock[:self.n_hospitals] = self.history_minimums().apply(
+                self.state.names[:self.n_hospitals], self.state.products, self.static_min_stock)
+        stock = self.state.stock
+        hospital_stock = stock[:self.n_hospitals]
+        hospital_min = self.state.min_stock[:self.n_hospitals]
+
+        if self.day % self.production_interval_days == 0:
+            stock += self.state.production
+
+        # Hospitals use what they need; what they do not have is a stockout
+        served = np.minimum(hospital_stock, self.consumption)
+        hospital_stock -= served
+
+        deficit = hospital_min - hospital_stock
+        short_hospitals, short_products = np.nonzero(deficit > 0)
+        transferred, transport_km = 0, 0.0
+        if len(short_hospitals):
+            if self.mode == "nearest":
+                transferred, transport_km = self.resolver.resolve(
+                    stock, self.state.min_stock, short_hospitals, short_products, deficit)
+            else:
+                transferred, transport_km = self._resolve_optimal(short_hospitals, short_products, deficit)
+
+        remaining = np.maximum(hospital_min - hospital_stock, 0)
+        self.day += 1
+        return DayResult(
+            shortage_units=int(deficit[short_hospitals, short_products].sum()),
+            unresolved_units=int(remaining.sum()),
+            transferred_units=transferred,
+            transport_km=transport_km,
+            stockout_units=int((self.consumption - served).sum()),
+            short=remaining > 0,
+        )
+
+    def _resolve_optimal(self, short_hospitals, short_products, deficit):
+        distances = self.resolver.distances(np.unique(short_hospitals).tolist())
+        surplus = self.state.stock - self.state.min_stock
+        transferred, transport_km = 0, 0.0
+        for product in np.unique(short_products).tolist():
+            recipients = short_hospitals[short_products == product]
+            sources = np.flatnonzero(surplus[:, product] > 0)
+            if not len(sources):
+                continue
+            cost = np.stack([distances[hospital][sources] for hospital in recipients.tolist()], axis=1)
+            flow = solve_transportation(surplus[sources, product], deficit[recipients, product], cost)
+            self.state.stock[sources, product] -= flow.sum(axis=1)
+            self.state.stock[recipients, product] += flow.sum(axis=0)
+            transferred += int(flow.sum())
+            transport_km += float((cost * flow).sum())
+        return transferred, transport_km
+
+    def run(self, days):
+        """Run `days` days and return their SimulationHistory."""
+        history = SimulationHistory(days, self.state.names[:self.n_hospitals], self.state.products)
+        for index in range(days):
+            history.record(index, self.step())
+        return history
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate the network day by day: production, consumption and "
+                                                 "the transfers that cover each day's shortages.")
+    parser.add_argument("--days", type=int, default=30, help="days to simulate, default %(default)s")
+    parser.add_argument("--hospitals", help="hospitals CSV (default: the network store)")
+    parser.add_argument("--suppliers", help="suppliers CSV (default: the network store)")
+    parser.add_argument("--mode", choices=("nearest", "optimal"), default="nearest",
+                        help="how each day's shortages are resolved, default %(default)s")
+    parser.add_argument("--production-interval", type=int, default=1, metavar="DAYS",
+                        help="suppliers produce every this many days, default %(default)s")
+    parser.add_argument("--history-minimums", action="store_true",
+                        help="each day, use the dynamic minimums of the supply_data history before that date")
+    parser.add_argument("--history-days", type=int, default=HISTORY_DAYS,
+                        help="rolling history window for --history-minimums, default %(default)s days")
+    parser.add_argument("--start-date", metavar="DATE",
+                        help="simulated date of day 1 (default: the day after the last day with history)")
+    parser.add_argument("--history-db", help="history database for --history-minimums (default: supply_chain.db)")
+    args = parser.parse_args(argv)
+    if args.start_date:
+        try:
+            np.datetime64(args.start_date, "D")
+        except ValueError:
+            parser.error(f"--start-date takes an ISO date (YYYY-MM-DD), not {args.start_date!r}")
+
+    hospital_state = load_store_state("hospital") if args.hospitals is None else \
+        load_network_state(args.hospitals, "hospital")
+    supplier_state = load_store_state("supplier") if args.suppliers is None else \
+        load_network_state(args.suppliers, "supplier")
+    connection = open_history(args.history_db) if args.history_minimums else None
+    if args.history_minimums and connection is None:
+        print("No supply_data history found, using the static minimums")
+    try:
+        simulation = TimeSteppedSimulation(hospital_state, supplier_state,
+                                           production_interval_days=args.production_interval, mode=args.mode,
+                                           history=SupplyHistory(connection) if connection is not None else None,
+                                           start_date=args.start_date, history_days=args.history_days)
+        if simulation.history is not None:
+            warning = history_mismatch(simulation.history_minimums(), hospital_state.names, hospital_state.products)
+            if warning:
+                print(f"Warning: {warning}")
+        history = simulation.run(args.days)
+    finally:
+        if connection is not None:
+            connection.close()
+
+    print(f"{'Day':>5} {'Short':>10} {'Unresolved':>10} {'Transferred':>12} {'Stockout':>10} {'km x units':>14}")
+    for day in range(args.days):
+        print(f"{day + 1:>5} {history.shortage_units[day]:>10} {history.unresolved_units[day]:>10} "
+              f"{history.transferred_units[day]:>12} {history.stockout_units[day]:>10} "
+              f"{history.transport_km[day]:>14.1f}")
+    for key, value in history.summary().items():
+        print(f"{key}: {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
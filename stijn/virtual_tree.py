@@ -0,0 +1,85 @@
+import tkinter as tk
+from tkinter import ttk
+
+# Row height a Treeview uses when the theme does not say
+DEFAULT_ROW_HEIGHT = 20
+
+
+class VirtualTree:
+    """A Treeview that only holds the rows in view, with its own scrollbar over all rows.
+
+    Handles the scrollbar, the mouse wheel, Page Up/Down and resizing for its subclasses, which
+    say how many rows there are (row_count) and insert the ones from start to stop (_insert_rows).
+    The tree and scrollbar go in row `tree_row` of `frame`'s grid, so a subclass can add widgets
+    above or below them.
+    """
+
+    def __init__(self, master, height=20, tree_row=0, **tree_options):
+        self.frame = tk.Frame(master)
+        self.offset = 0  # First row shown
+        self.rows = height  # Rows that fit in the tree
+
+        self.tree = ttk.Treeview(self.frame, show="headings", height=height, **tree_options)
+        self.tree.grid(row=tree_row, column=0, sticky="nsew")
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.yview)
+        self.scrollbar.grid(row=tree_row, column=1, sticky="ns")
+        self.frame.grid_rowconfigure(tree_row, weight=1)
+        self.frame.grid_columnconfigure(0, weight=1)
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", lambda event: self.scroll(-1 if event.delta > 0 else 1, "units"))
+        self.tree.bind("<Button-4>", lambda event: self.scroll(-1, "units"))
+        self.tree.bind("<Button-5>", lambda event: self.scroll(1, "units"))
+        self.tree.bind("<Prior>", lambda event: self.scroll(-1, "pages"))
+        self.tree.bind("<Next>", lambda event: self.scroll(1, "pages"))
+
+    def pack(self, **options):
+        self.frame.pack(**options)
+
+    def grid(self, **options):
+        self.frame.grid(**options)
+
+    def row_count(self):
+        raise NotImplementedError
+
+    def _insert_rows(self, start, stop):
+        """Insert rows start..stop-1 into the (empty) tree."""
+        raise NotImplementedError
+
+    def yview(self, action, value, unit=None):
+        """Scrollbar command: ("moveto", fraction) or ("scroll", steps, "units" | "pages")."""
+        if action == "moveto":
+            self.offset = int(float(value) * self.row_count())
+            self.render()
+        else:
+            self.scroll(int(value), unit)
+
+    def scroll(self, steps, unit):
+        self.offset += steps * (self.rows if unit == "pages" else 1)
+        self.render()
+
+    def render(self):
+        """Show the rows from `offset` that fit in the tree."""
+        total = self.row_count()
+        self.offset = max(0, min(self.offset, total - self.rows))
+        stop = min(self.offset + self.rows, total)
+        children = self.tree.get_children()
+        if children:
+            self.tree.delete(*children)
+        self._insert_rows(self.offset, stop)
+        self._update_position(stop - self.offset)
+
+    def _update_position(self, shown):
+        """Scrollbar for `shown` rows from `offset`."""
+        total = self.row_count()
+        if total:
+            self.scrollbar.set(self.offset / total, (self.offset + shown) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _on_resize(self, event):
+        row_height = ttk.Style().lookup("Treeview", "rowheight") or DEFAULT_ROW_HEIGHT
+        rows = max(1, event.height // int(row_height) - 1)  # The heading takes about one row
+        if rows != self.rows:
+            self.rows = rows
+            self.render()
@@ -1,8 +1,15 @@
+import os
+import sys
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import pandas as pd
 from ttkthemes import ThemedStyle  # For modern themes
 
+# The table widget lives with the simulation modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "stijn"))
+from cell_changes import COMPACT_AFTER_CHANGES, CsvJournal
+from lazy_table import LazyTable
+
 class CSVEditor:
     def __init__(self, root):
         self.root = root
@@ -16,8 +23,11 @@ class CSVEditor:
 
         self.csv_file = None
         self.data = None
+        self.journal = None  # CsvJournal of the open file: saves append to it, compact() rewrites the CSV
 
         self.create_widgets()
+        # Closing the window folds the journal into the CSV too, for readers that only see the CSV
+        self.root.protocol("WM_DELETE_WINDOW", self.exit)
 
     def create_widgets(self):
         # === Top Bar with Buttons ===
@@ -30,22 +40,17 @@ class CSVEditor:
         self.save_btn = ttk.Button(top_frame, text="💾 Save CSV", command=self.save_csv, state=tk.DISABLED)
         self.save_btn.pack(side="left", padx=5, pady=5)
 
-        self.exit_btn = ttk.Button(top_frame, text="❌ Exit", command=self.root.quit)
+        self.exit_btn = ttk.Button(top_frame, text="❌ Exit", command=self.exit)
         self.exit_btn.pack(side="right", padx=10, pady=5)
 
         # === Table Frame ===
         table_frame = ttk.Frame(self.root)
         table_frame.pack(expand=True, fill="both", padx=10, pady=5)
 
-        # Scrollbar
-        self.tree_scroll = ttk.Scrollbar(table_frame, orient="vertical")
-        self.tree_scroll.pack(side="right", fill="y")
-
-        # Treeview (Table)
-        self.tree = ttk.Treeview(table_frame, show="headings", yscrollcommand=self.tree_scroll.set)
-        self.tree.pack(expand=True, fill="both")
-
-        self.tree_scroll.config(command=self.tree.yview)
+        # Table that only holds the rows in view, with its own scrollbar
+        self.table = LazyTable(table_frame, column_width=120)
+        self.table.pack(expand=True, fill="both")
+        self.tree = self.table.tree
 
         self.tree.bind("<Double-1>", self.on_double_click)  # Editable cells
 
@@ -54,32 +59,32 @@ class CSVEditor:
         if not file_path:
             return
         
+        self.compact_journal()  # Fold the saves of the previous file into it
         self.csv_file = file_path
         self.data = pd.read_csv(file_path)
 
-        # Clear old table
-        self.tree.delete(*self.tree.get_children())
-        self.tree["columns"] = list(self.data.columns)
+        # Replay the changes saved since the CSV was last rewritten
+        self.journal = CsvJournal(file_path)
+        try:
+            self.journal.replay(self.data)
+        except ValueError as error:
+            # The CSV changed outside the editor: keep the old journal aside and start a new one
+            os.replace(self.journal.path, self.journal.path + ".stale")
+            messagebox.showwarning("Journal Ignored", f"{error}; it was moved to {self.journal.path}.stale.")
 
-        # Set column headings
-        for col in self.data.columns:
-            self.tree.heading(col, text=col, anchor="center")
-            self.tree.column(col, width=120, anchor="center")
-
-        # Insert data
-        for i, row in self.data.iterrows():
-            self.tree.insert("", "end", values=list(row))
+        # Rows are inserted as they scroll into view
+        self.table.set_data(self.data)
 
         self.save_btn.config(state=tk.NORMAL)  # Enable save button
 
     def on_double_click(self, event):
         """Make treeview cells editable on double-click."""
-        item = self.tree.selection()[0]  
-        col_id = self.tree.identify_column(event.x)
-        col_idx = int(col_id[1:]) - 1
-        col_name = self.tree["columns"][col_idx]
+        cell = self.table.cell_at(event)
+        if cell is None:
+            return
+        position, col_idx = cell
 
-        value = self.tree.item(item, "values")[col_idx]
+        value = self.table.value(position, col_idx)
 
         # Create Entry box
         entry = ttk.Entry(self.root, font=("Arial", 12))
@@ -88,30 +93,43 @@ class CSVEditor:
         entry.place(x=event.x_root - self.root.winfo_rootx(), y=event.y_root - self.root.winfo_rooty())
 
         def save_edit():
+            if not entry.winfo_exists():
+                return  # Already saved by <Return>, this is the <FocusOut> of the destroyed entry
             new_value = entry.get()
-            row_values = list(self.tree.item(item, "values"))
-            row_values[col_idx] = new_value
-            self.tree.item(item, values=row_values)
             entry.destroy()
+            if new_value != str(value):
+                try:
+                    self.table.set_value(position, col_idx, new_value)
+                except ValueError as error:
+                    messagebox.showerror("Invalid Value", str(error))
 
         entry.bind("<Return>", lambda e: save_edit())
         entry.bind("<FocusOut>", lambda e: save_edit())
 
     def save_csv(self):
-        """Save changes back to CSV."""
+        """Save the edited cells: appended to the CSV's journal, which is folded into the CSV once it grows large."""
         if not self.csv_file:
             return
-        
-        # Collect updated data
-        updated_data = []
-        for row in self.tree.get_children():
-            updated_data.append(self.tree.item(row)["values"])
-        
-        # Convert to DataFrame and save
-        df = pd.DataFrame(updated_data, columns=self.data.columns)
-        df.to_csv(self.csv_file, index=False)
+        changes = self.table.edits.by_column_name()
+        if not changes:
+            messagebox.showinfo("Nothing to Save", "No cells were changed.")
+            return
+
+        journaled = self.journal.append(changes)
+        self.table.commit_edits()
+        if journaled >= COMPACT_AFTER_CHANGES:
+            self.journal.compact(self.data)
+
+        messagebox.showinfo("✅ Success", f"{len(changes)} change(s) saved successfully!")
+
+    def compact_journal(self):
+        """Rewrite the CSV with every journaled change (atomically) and drop the journal."""
+        if self.journal is not None and os.path.exists(self.journal.path):
+            self.journal.compact(self.data)
 
-        messagebox.showinfo("✅ Success", "CSV file saved successfully!")
+    def exit(self):
+        self.compact_journal()
+        self.root.quit()
 
 # === Run Application ===
 if __name__ == "__main__":
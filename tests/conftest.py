@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The simulation modules import each other by their bare names
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "stijn"))
@@ -0,0 +1,25 @@
+from allocation_records import Allocation, shortage_records, solution_lines
+
+
+def test_every_shortage_gets_records():
+    resolved = shortage_records("Brussel", "Drug A", [("Supplier", 4, 12.5), ("Gent", 2, 40.0)], 0)
+    short = shortage_records("Gent", "Drug B", [("Supplier", 1, 30.0)], 5)
+    nothing = shortage_records("Leuven", "Drug A", [], 3)
+
+    assert [(record.source, record.units, record.resolved) for record in resolved] == \
+        [("Supplier", 4, True), ("Gent", 2, True)]
+    assert [(record.source, record.units, record.resolved) for record in short] == \
+        [("Supplier", 1, False), (None, 5, False)]
+    assert [(record.source, record.units, record.distance_km) for record in nothing] == [(None, 3, None)]
+
+
+def test_solution_lines():
+    records = (shortage_records("Brussel", "Drug A", [("Supplier", 4, 12.5)], 0)
+               + shortage_records("Gent", "Drug B", [("Supplier", 1, 30.0)], 5))
+
+    assert solution_lines(records) == [
+        "✅ Brussel shortage of Drug A resolved!",
+        "  - Supplier supplied 4 units at 12.50 km",
+        "⚠️ Gent still has a shortage of 5 units of Drug B!",
+    ]
+    assert repr(Allocation("Gent", "Drug B", None, 5, None, False)) == "Allocation('Gent', 'Drug B', None, 5, None, False)"
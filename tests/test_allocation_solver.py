@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+import simulation_core
+from allocation_solver import solve_transportation
+from network_state import Hospital, Supplier
+from simulation_core import resolve_shortages, resolve_shortages_optimal
+
+
+def reference_plan(supply, demand, cost):
+    """(units shipped, total cost) of the lowest-cost plan among those shipping the most units, with scipy."""
+    linprog = pytest.importorskip("scipy.optimize").linprog
+    m, n = cost.shape
+    allowed = np.isfinite(cost).ravel()
+    rows = np.kron(np.eye(m), np.ones(n))
+    columns = np.kron(np.ones(m), np.eye(n))
+    constraints = np.vstack([rows, columns])
+    limits = np.concatenate([supply, demand])
+    bounds = [(0, None) if ok else (0, 0) for ok in allowed]
+
+    most = linprog(-np.ones(m * n), A_ub=constraints, b_ub=limits, bounds=bounds, method="highs")
+    shipped = round(-most.fun)
+    cheapest = linprog(np.where(allowed, cost.ravel(), 0), A_ub=constraints, b_ub=limits,
+                       A_eq=np.ones((1, m * n)), b_eq=[shipped], bounds=bounds, method="highs")
+    return shipped, cheapest.fun
+
+
+def check_plan(flow, supply, demand, cost):
+    assert flow.dtype == np.int64
+    assert (flow >= 0).all()
+    assert (flow.sum(axis=1) <= supply).all()
+    assert (flow.sum(axis=0) <= demand).all()
+    assert not flow[~np.isfinite(cost)].any()
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_a_reference_solver(seed):
+    rng = np.random.default_rng(seed)
+    m, n = rng.integers(1, 6, size=2)
+    # Few distinct costs and round amounts, so ties and degenerate bases are common
+    cost = rng.integers(1, 4, size=(m, n)).astype(np.float64)
+    cost[rng.random((m, n)) < 0.2] = np.inf
+    supply = rng.integers(0, 4, size=m) * 5
+    demand = rng.integers(0, 4, size=n) * 5
+
+    flow = solve_transportation(supply, demand, cost)
+
+    check_plan(flow, supply, demand, cost)
+    shipped, total_cost = reference_plan(supply, demand, cost)
+    assert flow.sum() == shipped
+    assert (flow * np.where(flow > 0, cost, 0)).sum() == pytest.approx(total_cost)
+
+
+def test_masked_cells_are_never_used():
+    cost = np.array([[np.inf, 1.0], [5.0, np.inf]])
+    flow = solve_transportation([10, 3], [10, 10], cost)
+
+    assert flow.tolist() == [[0, 10], [3, 0]]
+
+
+def test_unmet_demand_when_only_a_masked_source_has_stock():
+    flow = solve_transportation([10], [4], np.array([[np.inf]]))
+
+    assert flow.tolist() == [[0]]
+
+
+def test_optimal_resolver_never_lets_a_hospital_supply_itself():
+    # Under the resolver's minimums the short hospital has stock to spare, at distance 0 from itself
+    short = Hospital("Short", {"Drug A": 5}, {"Drug A": 15}, (50.85, 4.35))
+    other = Hospital("Other", {"Drug A": 30}, {"Drug A": 10}, (51.05, 3.72))
+    supplier = Supplier("Far", {"Drug A": 0}, {"Drug A": 0}, (49.68, 5.82))
+    min_inventory_levels = {"Short": {"Drug A": 0}, "Other": {"Drug A": 10}}
+    records = []
+
+    resolve_shortages_optimal([(short, [("Drug A", 10)])], [short, other], [supplier], min_inventory_levels,
+                              records=records)
+
+    assert [(record.source, record.units) for record in records] == [("Other", 10)]
+    assert short.inventory["Drug A"] == 15
+    assert other.inventory["Drug A"] == 20
+
+
+def test_optimal_falls_back_to_greedy_on_large_networks(monkeypatch, capsys):
+    short = Hospital("Short", {"Drug A": 0}, {"Drug A": 10}, (50.85, 4.35))
+    other = Hospital("Other", {"Drug A": 30}, {"Drug A": 10}, (51.05, 3.72))
+    hospitals = [short, other]
+    monkeypatch.setattr(simulation_core, "OPTIMAL_MAX_CELLS", 1)
+    records = []
+
+    resolve_shortages([(short, [("Drug A", 10)])], hospitals, [], {h.name: h.min_inventory for h in hospitals},
+                      mode="optimal", records=records)
+
+    assert "using greedy" in capsys.readouterr().out
+    assert [(record.source, record.units) for record in records] == [("Other", 10)]
@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+
+import batch_run
+from incremental_resolver import IncrementalResolver
+from network_generator import write_network
+from result_export import read_allocations
+
+
+@pytest.fixture
+def network(tmp_path):
+    """(hospitals CSV, suppliers CSV, edited hospitals CSV): the edit empties the first hospital's Drug A."""
+    hospitals_csv, suppliers_csv = write_network(str(tmp_path / "network"), 300, seed=1)
+    data = pd.read_csv(hospitals_csv)
+    data.loc[0, "stock_A"] = 0
+    data.loc[0, "min_stock_A"] = max(int(data.loc[0, "min_stock_A"]), 10)
+    edited_csv = tmp_path / "edited.csv"
+    data.to_csv(edited_csv, index=False)
+    return hospitals_csv, suppliers_csv, str(edited_csv), data.loc[0, "name"]
+
+
+def test_incremental_run_only_resolves_the_edit(tmp_path, network):
+    hospitals_csv, suppliers_csv, edited_csv, edited_hospital = network
+    resolver = IncrementalResolver()
+
+    batch_run.run_batch(str(tmp_path / "base_results.csv"), hospitals_csv, suppliers_csv, mode="incremental",
+                        resolver=resolver)
+    full = resolver.last_resolved
+    batch_run.run_batch(str(tmp_path / "edited_results.csv"), edited_csv, suppliers_csv, mode="incremental",
+                        resolver=resolver)
+
+    assert 0 < resolver.last_resolved < full
+    edited = pd.concat(read_allocations(str(tmp_path / "edited_results.csv"), recipient=edited_hospital,
+                                        product="Drug A"))
+    assert edited["units"].sum() >= 10
+
+
+def test_cli_runs_scenarios_with_one_incremental_resolver(tmp_path, network, capsys):
+    hospitals_csv, suppliers_csv, edited_csv, _ = network
+    output = tmp_path / "results.jsonl"
+
+    status = batch_run.main(["--hospitals", hospitals_csv, "--suppliers", suppliers_csv, "--mode", "incremental",
+                             "--scenarios", edited_csv, "--output", str(output)])
+
+    assert status == 0
+    assert output.exists()
+    assert (tmp_path / "results.edited.jsonl").exists()
+    base_line, scenario_line = [line for line in capsys.readouterr().out.splitlines() if line.startswith("Wrote")]
+    full = int(base_line.rsplit("(", 1)[1].split()[0])
+    resolved = int(scenario_line.rsplit("(", 1)[1].split()[0])
+    assert 0 < resolved < full
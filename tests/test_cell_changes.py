@@ -0,0 +1,67 @@
+import os
+
+import pandas as pd
+import pytest
+
+from cell_changes import ChangeSet, CsvJournal, fold_journal
+from network_generator import write_network
+from network_store import load_store_state
+from snapshot_cache import load_network_state
+
+
+@pytest.fixture
+def hospitals_csv(tmp_path):
+    return write_network(str(tmp_path), 30, seed=2)[0]
+
+
+def test_change_set_coerces_and_drops_unchanged_values():
+    data = pd.DataFrame({"name": ["Brussel", "Gent"], "stock_A": [5, 6], "open": [True, False]})
+    changes = ChangeSet(data)
+
+    assert changes.set(0, 1, " 12.0 ") == 12
+    assert changes.set(1, 2, "yes") is True
+    changes.set(1, 1, "6")
+    with pytest.raises(ValueError):
+        changes.set(0, 1, "12.5")
+
+    assert sorted(changes.by_column_name()) == [(0, "stock_A", 12), (1, "open", True)]
+    changes.apply()
+    assert data["stock_A"].tolist() == [12, 6] and data["open"].tolist() == [True, True]
+
+
+def test_journal_replays_and_compacts(hospitals_csv):
+    journal = CsvJournal(hospitals_csv)
+
+    assert journal.append([(0, "stock_A", 111)]) == 1
+    assert CsvJournal(hospitals_csv).append([(1, "stock_A", 222), (0, "stock_A", 333)]) == 3
+    data = pd.read_csv(hospitals_csv)
+    assert journal.replay(data) == 3
+    assert data.loc[:1, "stock_A"].tolist() == [333, 222]
+
+    journal.compact(data)
+    assert not os.path.exists(journal.path)
+    assert pd.read_csv(hospitals_csv).loc[:1, "stock_A"].tolist() == [333, 222]
+
+
+def test_readers_fold_the_journal_in_first(hospitals_csv, tmp_path):
+    store_path = str(tmp_path / "network.db")
+    cached = load_network_state(hospitals_csv, "hospital")  # Leaves a snapshot of the CSV as it was
+    load_store_state("hospital", store_path, hospitals_csv)
+    hospital = cached.names[0]
+
+    CsvJournal(hospitals_csv).append([(0, "stock_A", 4321)])
+
+    for state in (load_network_state(hospitals_csv, "hospital"), load_store_state("hospital", store_path, hospitals_csv)):
+        assert state.stock[state.row(hospital), state.product_index["Drug A"]] == 4321
+    assert not os.path.exists(hospitals_csv + ".journal")
+
+
+def test_a_stale_journal_is_not_folded_in(hospitals_csv, capsys):
+    journal = CsvJournal(hospitals_csv)
+    journal.append([(0, "stock_A", 4321)])
+    with open(hospitals_csv, "a", encoding="utf-8") as csv:
+        csv.write("\n")  # Changed behind the journal's back
+
+    assert fold_journal(hospitals_csv) == 0
+    assert os.path.exists(journal.path)
+    assert "does not belong to the current" in capsys.readouterr().out
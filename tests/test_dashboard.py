@@ -0,0 +1,43 @@
+import numpy as np
+
+from dashboard import RATIO_CLIP, NetworkDashboard, binned_ratios, sample_points, shortage_severity, stock_ratios
+from network_generator import generate_network
+from network_state import NetworkState
+
+
+def test_ratios_and_severity():
+    state = NetworkState(["Brussel", "Gent"], ["Drug A", "Drug B"], np.array([[5, 30], [0, 4]]),
+                         min_stock=np.array([[10, 10], [0, 4]]))
+
+    np.testing.assert_allclose(stock_ratios(state), [[0.5, RATIO_CLIP], [RATIO_CLIP, 1]])
+    np.testing.assert_allclose(shortage_severity(state), [0.25, 0])
+
+
+def test_large_networks_are_binned_and_sampled():
+    ratios = np.random.default_rng(0).random((1000, 3))
+
+    rows, order, per_row = binned_ratios(ratios, max_rows=100)
+
+    assert rows.shape == (100, 3) and per_row == 10
+    assert order[0] == np.argmin(ratios.min(axis=1))
+    np.testing.assert_allclose(rows[0], ratios[order[:10]].mean(axis=0))
+
+    severity = np.zeros(10_000)
+    severity[::100] = 1
+    shown = sample_points(severity, max_points=500)
+    assert len(shown) <= 500 and set(np.flatnonzero(severity)) <= set(shown.tolist())
+    assert (np.diff(shown) > 0).all()
+
+
+def test_render_png_reuses_the_figure(tmp_path):
+    hospitals, suppliers = generate_network(300, seed=5)
+    dashboard = NetworkDashboard()
+
+    dashboard.render_png(str(tmp_path / "first.png"), hospitals, suppliers)
+    image, points = dashboard.image, dashboard.hospital_points
+    hospitals.stock[:] = 0
+    dashboard.render_png(str(tmp_path / "second.png"), hospitals, suppliers)
+
+    assert dashboard.image is image and dashboard.hospital_points is points
+    assert dashboard.map_ax.get_title().startswith(f"{len(hospitals)} hospitals, {len(hospitals)} short")
+    assert (tmp_path / "second.png").stat().st_size > 0
@@ -0,0 +1,50 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from grafs import InventoryChart
+from network_state import Hospital, NetworkState
+
+STIJN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "stijn")
+
+
+def hospital(stock=10):
+    state = NetworkState(["Brussel"], ["Drug A", "Drug B"], np.array([[stock, 3]]), min_stock=np.array([[5, 5]]),
+                         coordinates=np.array([[50.85, 4.35]]))
+    return Hospital.view(state, 0)
+
+
+def test_png_is_reused_until_the_stock_or_the_look_changes(tmp_path):
+    chart = InventoryChart()
+    first = chart.render_png(hospital(), str(tmp_path))
+
+    assert chart.render_png(hospital(), str(tmp_path)) == first
+    assert chart.render_png(hospital(stock=11), str(tmp_path)) != first
+    assert InventoryChart(figsize=(8, 8)).render_png(hospital(), str(tmp_path)) != first
+    assert InventoryChart(min_color="red").render_png(hospital(), str(tmp_path)) != first
+    assert len(list(tmp_path.glob("*.png"))) == 4
+
+
+def test_bars_are_updated_in_place():
+    chart = InventoryChart()
+    chart.update(hospital())
+    bars = chart.stock_bars
+
+    chart.update(hospital(stock=42))
+
+    assert chart.stock_bars is bars
+    assert [bar.get_height() for bar in bars] == [42, 3]
+    assert chart.ax.get_title() == "Inventory of Brussel"
+
+
+def test_headless_save_does_not_import_tkinter(tmp_path):
+    script = ("import sys, numpy as np; from grafs import GraphGenerator; from network_state import Hospital, "
+              "NetworkState; state = NetworkState(['Gent'], ['Drug A'], np.array([[1]]), min_stock=np.array([[2]])); "
+              f"GraphGenerator(Hospital.view(state, 0)).save_graph({str(tmp_path)!r}); "
+              "print('tkinter' in sys.modules)")
+    output = subprocess.run([sys.executable, "-c", script], cwd=STIJN, capture_output=True, text=True, check=True)
+
+    assert output.stdout.strip() == "False"
+    assert len(list(tmp_path.glob("*.png"))) == 1
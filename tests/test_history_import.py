@@ -0,0 +1,71 @@
+import gzip
+import json
+import shutil
+import sqlite3
+
+import history_import
+from csv_loader import SUPPLY_DB
+from history_import import import_history
+from supply_history import HISTORY_TABLE
+
+HEADER = "hospital_name,date,product,current_stock,min_stock,supplier_stock,orders_placed,restock_time_days," \
+         "demand_forecast\n"
+
+
+def write_csv(path, rows):
+    path.write_text(HEADER + "".join(f"Hospital {row},2024-01-0{row % 9 + 1},Drug A,10,5,0,{row},3,7\n"
+                                     for row in range(rows)))
+    return str(path)
+
+
+def tables(path):
+    connection = sqlite3.connect(path)
+    try:
+        names = {name for name, in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        indexes = {name for name, in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        journal_mode = connection.execute("PRAGMA journal_mode").fetchone()[0]
+    finally:
+        connection.close()
+    return names, indexes, journal_mode
+
+
+def test_chunks_are_appended_with_missing_columns_as_null(tmp_path):
+    connection = sqlite3.connect(":memory:")
+    connection.execute(HISTORY_TABLE)
+    jsonl = tmp_path / "history.jsonl.gz"
+    with gzip.open(jsonl, "wt") as file:
+        file.write(json.dumps({"hospital_name": "Hospital X", "date": "2024-02-01", "product": "Drug B",
+                               "orders_placed": 4}) + "\n")
+
+    reports = [import_history(write_csv(tmp_path / "history.csv", 25), connection, chunk_rows=10, report=None),
+               import_history(str(jsonl), connection, report=None)]
+
+    assert [report.rows for report in reports] == [25, 1]
+    assert connection.execute("SELECT COUNT(*), SUM(orders_placed) FROM supply_data").fetchone() == (26, 300 + 4)
+    assert connection.execute("SELECT current_stock, restock_time_days FROM supply_data "
+                              "WHERE hospital_name = 'Hospital X'").fetchone() == (None, None)
+
+
+def test_cli_creates_only_the_history_table(tmp_path, capsys):
+    db = str(tmp_path / "history.db")
+
+    history_import.main([write_csv(tmp_path / "history.csv", 5), "--db", db])
+
+    names, indexes, journal_mode = tables(db)
+    assert names == {"supply_data", "sqlite_sequence"}
+    assert indexes == {"supply_data_date_history"}
+    assert journal_mode != "wal"
+    assert "5 rows" in capsys.readouterr().out
+
+
+def test_cli_leaves_the_network_store_out_of_supply_chain_db(tmp_path):
+    db = tmp_path / "supply_chain.db"
+    shutil.copy(SUPPLY_DB, db)
+    before = tables(str(db))
+
+    history_import.main([write_csv(tmp_path / "history.csv", 5), "--db", str(db)])
+
+    names, indexes, journal_mode = tables(str(db))
+    assert names == before[0]
+    assert indexes == before[1] | {"supply_data_date_history"}
+    assert journal_mode == before[2]
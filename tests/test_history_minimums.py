@@ -0,0 +1,70 @@
+import shutil
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import batch_run
+from csv_loader import SUPPLY_DB
+from network_generator import write_network
+from result_export import read_allocations
+from supply_history import HISTORY_TABLE, load_history_minimums
+
+
+@pytest.fixture
+def network(tmp_path):
+    """(hospitals CSV, suppliers CSV, history database) where the history raises one hospital's Drug A minimum."""
+    hospitals_csv, suppliers_csv = write_network(str(tmp_path / "network"), 200, seed=2)
+    data = pd.read_csv(hospitals_csv)
+    covered = data[data["stock_A"] >= data["min_stock_A"]].iloc[0]
+
+    history_db = str(tmp_path / "history.db")
+    connection = sqlite3.connect(history_db)
+    with connection:
+        connection.execute(HISTORY_TABLE)
+        # 100 units a day for 30 days, restocking takes up to 10 days: a minimum of 1000 over a 30-day window
+        connection.executemany(
+            "INSERT INTO supply_data (hospital_name, date, product, current_stock, min_stock, supplier_stock, "
+            "orders_placed, restock_time_days, demand_forecast) VALUES (?, ?, 'Drug A', 0, 0, 0, 100, 10, 0)",
+            [(covered["name"], f"2024-01-{day:02d}") for day in range(1, 31)])
+    connection.close()
+    return hospitals_csv, suppliers_csv, history_db, covered["name"], int(covered["stock_A"])
+
+
+def history_options(history_db):
+    return ["--history-minimums", "--history-days", "30", "--history-db", history_db]
+
+
+def test_history_minimums_create_shortages(tmp_path, network):
+    hospitals_csv, suppliers_csv, history_db, hospital, stock = network
+    static = tmp_path / "static.csv"
+    dynamic = tmp_path / "dynamic.csv"
+
+    assert batch_run.main(["--hospitals", hospitals_csv, "--suppliers", suppliers_csv, "--mode", "greedy",
+                           "--output", str(static)]) == 0
+    assert batch_run.main(["--hospitals", hospitals_csv, "--suppliers", suppliers_csv, "--mode", "greedy",
+                           *history_options(history_db), "--output", str(dynamic)]) == 0
+
+    assert not list(read_allocations(str(static), recipient=hospital, product="Drug A"))
+    records = pd.concat(read_allocations(str(dynamic), recipient=hospital, product="Drug A"))
+    assert records["units"].sum() == 1000 - stock
+
+
+def test_history_minimums_in_incremental_mode(tmp_path, network):
+    hospitals_csv, suppliers_csv, history_db, hospital, stock = network
+    output = tmp_path / "incremental.csv"
+
+    assert batch_run.main(["--hospitals", hospitals_csv, "--suppliers", suppliers_csv, "--mode", "incremental",
+                           *history_options(history_db), "--output", str(output)]) == 0
+
+    records = pd.concat(read_allocations(str(output), recipient=hospital, product="Drug A"))
+    assert records["units"].sum() == 1000 - stock
+
+
+def test_history_database_is_only_read(tmp_path):
+    history_db = tmp_path / "supply_chain.db"
+    shutil.copy(SUPPLY_DB, history_db)
+    before = history_db.read_bytes()
+
+    assert load_history_minimums(path=str(history_db)) is not None
+    assert history_db.read_bytes() == before
@@ -0,0 +1,34 @@
+from instrumentation import INSTRUMENTATION_ENV, Instrumentation
+
+
+def test_off_by_default(monkeypatch, tmp_path):
+    monkeypatch.delenv(INSTRUMENTATION_ENV, raising=False)
+    instrumentation = Instrumentation()
+    instrumentation.configure_from_env()
+
+    with instrumentation.run("simulation"), instrumentation.timer("resolve"):
+        instrumentation.count("plan_cache.hits")
+
+    assert instrumentation.timer("resolve") is instrumentation.timer("other")
+    assert instrumentation.timers == {} and instrumentation.counters == {}
+    assert instrumentation.write_report(str(tmp_path / "report.txt")) is None
+
+
+def test_timers_counters_and_profile_in_the_report(monkeypatch, tmp_path):
+    monkeypatch.setenv(INSTRUMENTATION_ENV, "profile, memory")
+    instrumentation = Instrumentation()
+    instrumentation.configure_from_env()
+
+    with instrumentation.run("simulation"):
+        for _ in range(3):
+            with instrumentation.timer("resolve.greedy"):
+                sorted(range(1000), reverse=True)
+        instrumentation.count("plan_cache.misses", 2)
+
+    assert instrumentation.timers["resolve.greedy"][0] == 3
+    assert instrumentation.counters == {"plan_cache.misses": 2}
+    path = instrumentation.write_report(str(tmp_path / "report.txt"))
+    report = open(path, encoding="utf-8").read()
+    for section in ("resolve.greedy", "simulation", "plan_cache.misses", "Memory: peak", "Profile (cumulative):"):
+        assert section in report
+    assert instrumentation.timers == {}  # Starts over after a report
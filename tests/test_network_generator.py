@@ -0,0 +1,55 @@
+import json
+
+import numpy as np
+
+from benchmarks import run_benchmarks
+from csv_loader import read_network_csv
+from network_generator import generate_network, write_network
+
+
+def test_same_seed_same_network():
+    first, second = generate_network(200, seed=9), generate_network(200, seed=9)
+
+    for a, b in zip(first, second):
+        assert a.names == b.names
+        np.testing.assert_array_equal(a.stock, b.stock)
+        np.testing.assert_array_equal(a.coordinates, b.coordinates)
+    assert generate_network(200, seed=10)[0].names != first[0].names
+
+
+def test_network_shape_and_shortages():
+    hospitals, suppliers = generate_network(1000, seed=0)
+
+    assert len(hospitals) + len(suppliers) == 1000
+    assert len(suppliers) == 150
+    assert len(set(hospitals.names + suppliers.names)) == 1000
+    # About a fifth of the hospital cells start below their minimum
+    assert 0.1 < (hospitals.stock < hospitals.min_stock).mean() < 0.3
+    assert (suppliers.production >= 0).all() and not suppliers.min_stock.any()
+
+
+def test_written_csvs_load_back(tmp_path):
+    hospitals, suppliers = generate_network(50, seed=1)
+    hospitals_csv, suppliers_csv = write_network(str(tmp_path), 50, seed=1)
+
+    for state, path, kind in ((hospitals, hospitals_csv, "hospital"), (suppliers, suppliers_csv, "supplier")):
+        loaded = read_network_csv(path, kind)
+        assert loaded.names == state.names
+        assert loaded.products == state.products
+        np.testing.assert_array_equal(loaded.stock, state.stock)
+        np.testing.assert_array_equal(loaded.min_stock, state.min_stock)
+        np.testing.assert_array_equal(loaded.production, state.production)
+        np.testing.assert_allclose(loaded.coordinates, state.coordinates, atol=1e-4)
+
+
+def test_benchmarks_append_to_the_given_results_file(tmp_path, capsys):
+    results_file = tmp_path / "results" / "benchmarks.jsonl"
+
+    run_benchmarks(sizes=(30,), results_file=str(results_file))
+    run_benchmarks(sizes=(30,), results_file=str(results_file))
+
+    lines = [json.loads(line) for line in results_file.read_text().splitlines()]
+    assert [line["entities"] for line in lines] == [30, 30]
+    assert {"load_hospitals_cold", "check_hospitals_stock", "resolve_shortages_with_minimum_distance"} \
+        <= set(lines[0]["seconds"])
+    assert "30 entities" in capsys.readouterr().out
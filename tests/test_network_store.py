@@ -0,0 +1,88 @@
+import os
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from network_generator import write_network
+from network_store import NetworkStore, load_store_state
+
+
+@pytest.fixture
+def network(tmp_path):
+    """(store path, hospitals CSV, name of its first hospital)."""
+    hospitals_csv, _ = write_network(str(tmp_path / "network"), 30, seed=6)
+    return str(tmp_path / "network.db"), hospitals_csv, pd.read_csv(hospitals_csv).loc[0, "name"]
+
+
+def fingerprint(path):
+    """Size and mtime of the store and its WAL, to see whether a load wrote anything."""
+    return [(suffix, os.stat(path + suffix).st_mtime_ns, os.stat(path + suffix).st_size)
+            for suffix in ("", "-wal") if os.path.exists(path + suffix)]
+
+
+def touch_later(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9 * 3600))
+
+
+def test_only_network_tables(network):
+    store_path, hospitals_csv, _ = network
+    load_store_state("hospital", store_path, hospitals_csv)
+
+    connection = sqlite3.connect(store_path)
+    names = {name for name, in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    connection.close()
+    assert names == {"network_products", "network_entities", "network_stock", "network_sources"}
+
+
+def test_unchanged_csv_is_not_imported_again(network, capsys):
+    store_path, hospitals_csv, _ = network
+    first = load_store_state("hospital", store_path, hospitals_csv)
+    before = fingerprint(store_path)
+
+    again = load_store_state("hospital", store_path, hospitals_csv)
+
+    assert fingerprint(store_path) == before
+    assert again.names == first.names
+    assert "re-importing" not in capsys.readouterr().out
+
+
+def test_touched_csv_keeps_the_edits(network, capsys):
+    store_path, hospitals_csv, hospital = network
+    load_store_state("hospital", store_path, hospitals_csv)
+    with NetworkStore(store_path) as store:
+        store.update_cells("hospital", [(hospital, "stock_A", 12345)])
+
+    touch_later(hospitals_csv)  # Newer than the edit, but the same contents
+    state = load_store_state("hospital", store_path, hospitals_csv)
+
+    assert state.stock[state.row(hospital), state.product_index["Drug A"]] == 12345
+    assert "re-importing" not in capsys.readouterr().out
+
+
+def test_changed_csv_is_imported_again(network, capsys):
+    store_path, hospitals_csv, hospital = network
+    load_store_state("hospital", store_path, hospitals_csv)
+    data = pd.read_csv(hospitals_csv)
+    data.loc[0, "stock_A"] = 777
+    data.to_csv(hospitals_csv, index=False)
+    touch_later(hospitals_csv)
+
+    state = load_store_state("hospital", store_path, hospitals_csv)
+
+    assert state.stock[state.row(hospital), state.product_index["Drug A"]] == 777
+    assert "re-importing" in capsys.readouterr().out
+
+
+def test_stores_without_a_csv_hash_are_migrated(network):
+    store_path, hospitals_csv, _ = network
+    connection = sqlite3.connect(store_path)
+    connection.execute("CREATE TABLE network_sources (kind TEXT PRIMARY KEY, csv_path TEXT NOT NULL, "
+                       "csv_size INTEGER NOT NULL, csv_mtime_ns INTEGER NOT NULL, edited_ns INTEGER) WITHOUT ROWID")
+    connection.close()
+
+    load_store_state("hospital", store_path, hospitals_csv)
+
+    with NetworkStore(store_path) as store:
+        assert store.source("hospital")[4] is not None
@@ -0,0 +1,56 @@
+import numpy as np
+
+from network_generator import generate_network
+from network_state import Hospital, Supplier
+from plan_cache import PlanCache, plan_fingerprint
+from simulation_core import check_hospitals_stock, minimum_levels, resolve_shortages
+
+
+def network():
+    hospitals, suppliers = generate_network(120, seed=7)
+    return hospitals.entities(Hospital), suppliers.entities(Supplier)
+
+
+def solve(cache, mode="greedy"):
+    hospitals, suppliers = network()
+    records = []
+    lines = resolve_shortages(check_hospitals_stock(hospitals), hospitals, suppliers, minimum_levels(hospitals),
+                              mode=mode, records=records, cache=cache)
+    return hospitals, suppliers, records, lines
+
+
+def test_fingerprint_follows_stock_and_mode():
+    hospitals, suppliers = network()
+    shortages = check_hospitals_stock(hospitals)
+    key = plan_fingerprint(shortages, hospitals, suppliers, "greedy")
+
+    assert plan_fingerprint(shortages, *network(), "greedy") == key
+    assert plan_fingerprint(shortages, hospitals, suppliers, "optimal") != key
+    suppliers[0].inventory["Drug A"] += 1
+    assert plan_fingerprint(shortages, hospitals, suppliers, "greedy") != key
+
+
+def test_a_cached_plan_moves_the_same_stock(tmp_path):
+    cache = PlanCache(directory=str(tmp_path))
+    solved = solve(cache)
+    cached = solve(cache)
+    from_disk = solve(PlanCache(directory=str(tmp_path)))
+    assert solved[2]
+
+    for hospitals, suppliers, records, lines in (cached, from_disk):
+        np.testing.assert_array_equal(hospitals[0].state.stock, solved[0][0].state.stock)
+        np.testing.assert_array_equal(suppliers[0].state.stock, solved[1][0].state.stock)
+        assert [repr(record) for record in records] == [repr(record) for record in solved[2]]
+        assert lines == solved[3]
+    assert cache.stats() == {"entries": 1, "hits": 1, "disk_hits": 0, "misses": 1}
+    assert len(list(tmp_path.glob("*.plan.npz"))) == 1
+
+
+def test_least_recently_used_plans_are_dropped():
+    cache = PlanCache(max_entries=2)
+    for key in ("a", "b"):
+        cache.put(key, [])
+    cache.get("a")
+    cache.put("c", [])
+
+    assert cache.get("b") is None and cache.get("a") == [] and len(cache) == 2
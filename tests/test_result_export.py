@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+from allocation_records import shortage_records
+from result_export import AllocationWriter, export_allocations, export_format, read_allocations
+
+
+def records():
+    return (shortage_records("Brussel", "Drug A", [("Supplier", 4, 12.5), ("Gent", 2, 40.0)], 0)
+            + shortage_records("Gent", "Drug B", [("Supplier", 1, 30.0)], 5))
+
+
+def test_export_format_from_the_extension():
+    assert export_format("plan.CSV") == "csv"
+    assert export_format("plan.ndjson") == "jsonl"
+    assert export_format("plan.pq") == "parquet"
+    with pytest.raises(ValueError):
+        export_format("plan.xlsx")
+
+
+@pytest.mark.parametrize("extension", ["csv", "jsonl", "parquet"])
+def test_exports_read_back_in_chunks(tmp_path, extension):
+    if extension == "parquet":
+        pytest.importorskip("pyarrow")
+    path = str(tmp_path / f"allocations.{extension}")
+
+    assert export_allocations(records(), path) == 4
+
+    everything = pd.concat(read_allocations(path, chunk_rows=2))
+    assert everything["units"].tolist() == [4, 2, 1, 5]
+    assert everything["resolved"].tolist() == [True, True, False, False]
+    assert pd.isna(everything["source"].iloc[3])
+    gent = pd.concat(read_allocations(path, recipient="Gent", chunk_rows=2))
+    assert gent["units"].tolist() == [1, 5]
+    assert list(read_allocations(path, product="Drug C")) == []
+
+
+def test_writer_is_an_on_solution_callback(tmp_path):
+    path = tmp_path / "allocations.csv"
+    with AllocationWriter(str(path)) as writer:
+        writer.write(records()[:2])
+        writer.write(records()[2:])
+
+    assert writer.rows == 4
+    assert path.read_text(encoding="utf-8").splitlines()[:2] == [
+        "recipient,product,source,units,distance_km,resolved", "Brussel,Drug A,Supplier,4,12.5,True"]
+
+
+def test_parquet_without_pyarrow(tmp_path):
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        with pytest.raises(ImportError, match="pip install pyarrow"):
+            AllocationWriter(str(tmp_path / "allocations.parquet"))
+        assert not (tmp_path / "allocations.parquet").exists()
+    else:
+        pytest.skip("pyarrow is installed")
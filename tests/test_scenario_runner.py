@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+import scenario_runner
+from network_generator import generate_network, write_network
+from network_state import NetworkState
+from scenario_runner import Disruption, run_scenarios
+from simulation_core import resolve_network_state
+
+
+# Harsh enough that some shortages cannot be covered
+DISRUPTION = Disruption(supplier_outage=0.5, demand_spike=0.3, spike_factor=2.0)
+
+
+@pytest.fixture(scope="module")
+def network():
+    return generate_network(80, seed=4)
+
+
+@pytest.mark.parametrize("mode", ["greedy", "incremental"])
+def test_results_do_not_depend_on_the_worker_count(network, mode):
+    hospitals, suppliers = network
+
+    one = run_scenarios(hospitals, suppliers, scenarios=12, disruption=DISRUPTION, workers=1, seed=7, mode=mode)
+    three = run_scenarios(hospitals, suppliers, scenarios=12, disruption=DISRUPTION, workers=3, seed=7, mode=mode)
+
+    assert one.short_counts.any()
+    np.testing.assert_array_equal(one.short_counts, three.short_counts)
+    np.testing.assert_array_equal(one.unresolved_units, three.unresolved_units)
+
+
+def test_each_scenario_is_resolved_with_the_chosen_solver(network):
+    hospitals, suppliers = network
+    disruption = DISRUPTION
+
+    results = run_scenarios(hospitals, suppliers, scenarios=3, disruption=disruption, workers=2, seed=1)
+
+    # The same three scenarios, replayed one by one with the greedy resolver
+    state = NetworkState.concatenate(hospitals, suppliers)
+    expected = np.zeros_like(results.unresolved_units)
+    for seed in np.random.SeedSequence(1).spawn(3):
+        scenario = state.copy()
+        disruption.apply(scenario.stock, scenario.min_stock, len(hospitals), np.random.default_rng(seed))
+        expected += resolve_network_state(scenario, len(hospitals), "greedy")
+    assert expected.any()
+    np.testing.assert_array_equal(results.unresolved_units, expected)
+
+
+def test_unknown_mode_is_rejected(network):
+    with pytest.raises(ValueError):
+        run_scenarios(*network, scenarios=1, mode="nearest")
+
+
+def test_cli_lists_the_cells_most_at_risk(tmp_path, capsys):
+    hospitals_csv, suppliers_csv = write_network(str(tmp_path), 60, seed=5)
+
+    assert scenario_runner.main(["--hospitals", hospitals_csv, "--suppliers", suppliers_csv, "--scenarios", "4",
+                                 "--workers", "1", "--demand-spike", "0.5", "--spike-factor", "3", "--top", "3"]) == 0
+
+    output = capsys.readouterr().out.splitlines()
+    assert output[-4] == "4 scenarios, solver greedy; most at risk:"
+    assert all("short" in line for line in output[-3:])
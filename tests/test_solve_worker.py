@@ -0,0 +1,112 @@
+import time
+
+import numpy as np
+import pytest
+
+from incremental_resolver import IncrementalResolver
+from network_generator import generate_network
+from network_state import Hospital, Supplier, copy_entities
+from plan_cache import PlanCache
+from simulation_core import check_hospitals_stock, minimum_levels, resolve_shortages
+from solve_worker import SolveCancelled, SolveWorker
+from supply_chain_simulation import SupplyChainSimulation
+
+
+def network(seed=4):
+    hospitals, suppliers = generate_network(80, seed=seed)
+    return hospitals.entities(Hospital), suppliers.entities(Supplier)
+
+
+def run(solve):
+    """Start a SolveWorker and collect its messages until it finished."""
+    worker = SolveWorker(solve).start()
+    messages, deadline = [], time.monotonic() + 30
+    while worker.running and time.monotonic() < deadline:
+        messages += worker.poll()
+        time.sleep(0.01)
+    assert not worker.running
+    return messages
+
+
+def simulation(mode):
+    """The simulation screen's solve state, without its window."""
+    screen = SupplyChainSimulation.__new__(SupplyChainSimulation)
+    screen.hospitals, screen.suppliers = network()
+    screen.solver_mode = mode
+    screen.use_history_minimums = False
+    screen.incremental_resolver = IncrementalResolver()
+    screen.plan_cache = PlanCache()
+    screen.solution_records = []
+    screen.solutions_list = None
+    return screen
+
+
+def test_worker_ends_with_done_cancelled_or_error():
+    def cancelled(worker):
+        worker.cancel()
+        worker.check_cancelled()
+
+    def failing(worker):
+        raise RuntimeError("broken")
+
+    assert run(lambda worker: worker.report("solutions", [1]) or 7) == [("solutions", [1]), ("done", 7)]
+    assert run(cancelled) == [("cancelled", None)]
+    (kind, error), = run(failing)
+    assert kind == "error" and str(error) == "broken"
+
+
+def test_copy_entities_leaves_the_originals_alone():
+    hospitals, _ = network()
+    copies = copy_entities(hospitals)
+
+    copies[0].inventory["Drug A"] += 100
+
+    assert [copy.name for copy in copies] == [hospital.name for hospital in hospitals]
+    assert len({id(copy.state) for copy in copies}) == 1 and copies[0].state is not hospitals[0].state
+    assert copies[0].inventory["Drug A"] == hospitals[0].inventory["Drug A"] + 100
+
+
+@pytest.mark.parametrize("mode", ["greedy", "optimal", "incremental"])
+def test_stock_only_moves_on_the_tk_side(mode):
+    screen = simulation(mode)
+    before = screen.hospitals[0].state.stock.copy(), screen.suppliers[0].state.stock.copy()
+
+    messages = run(screen.solve)
+
+    # The worker solved on copies
+    np.testing.assert_array_equal(screen.hospitals[0].state.stock, before[0])
+    np.testing.assert_array_equal(screen.suppliers[0].state.stock, before[1])
+    streamed = [record for kind, payload in messages if kind == "solutions" for record in payload]
+    assert messages[-1] == ("done", streamed) and streamed
+
+    # Applying what was streamed gives the stock of a solve in place
+    screen.add_solutions(streamed)
+    hospitals, suppliers = network()
+    if mode == "incremental":
+        IncrementalResolver().resolve(hospitals, suppliers)
+    else:
+        resolve_shortages(check_hospitals_stock(hospitals), hospitals, suppliers, minimum_levels(hospitals), mode=mode)
+    np.testing.assert_array_equal(screen.hospitals[0].state.stock, hospitals[0].state.stock)
+    np.testing.assert_array_equal(screen.suppliers[0].state.stock, suppliers[0].state.stock)
+
+
+def test_incremental_solve_can_be_cancelled():
+    hospitals, suppliers = network()
+    before = hospitals[0].state.stock.copy()
+    resolver = IncrementalResolver()
+
+    def cancel():
+        raise SolveCancelled()
+
+    solutions = []
+    with pytest.raises(SolveCancelled):
+        resolver.resolve(hospitals, suppliers, on_solution=solutions.append, check_cancelled=cancel)
+    np.testing.assert_array_equal(hospitals[0].state.stock, before)
+    assert solutions == []
+
+    # The next solve starts over and streams one list per short hospital
+    records = []
+    resolver.resolve(hospitals, suppliers, records=records, on_solution=solutions.append)
+    assert [record for solution in solutions for record in solution] == records
+    assert len({solution[0].recipient for solution in solutions}) == len(solutions)
+    assert resolver.last_resolved > 0
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+import supplier_impact
+from network_state import NetworkState
+from supplier_impact import network_impact
+
+
+def network():
+    """Brussel is 6 short of Drug A; the nearby supplier has 4, the far one 10."""
+    hospitals = NetworkState(["Brussel", "Gent"], ["Drug A"], np.array([[4], [10]]), min_stock=np.array([[10], [10]]),
+                             coordinates=np.array([[50.85, 4.35], [51.05, 3.72]]))
+    suppliers = NetworkState(["Near", "Far"], ["Drug A"], np.array([[4], [10]]),
+                             coordinates=np.array([[50.84, 4.36], [49.60, 6.10]]))
+    return hospitals, suppliers
+
+
+@pytest.mark.parametrize("mode", ["greedy", "optimal", "incremental"])
+def test_only_shortages_caused_by_the_excluded_suppliers(mode):
+    hospitals, suppliers = network()
+
+    assert network_impact(["Near"], hospitals, suppliers, mode) == []
+    assert network_impact(["Near", "Far"], hospitals, suppliers, mode) == [("Brussel", "Drug A", 6)]
+    # The inputs are left as they were
+    assert hospitals.stock[:, 0].tolist() == [4, 10]
+    assert suppliers.stock[:, 0].tolist() == [4, 10]
+
+
+def test_nothing_is_resolved_without_known_suppliers(monkeypatch):
+    def resolve(*args):
+        raise AssertionError("resolved without any excluded supplier")
+
+    monkeypatch.setattr(supplier_impact, "resolve_network_state", resolve)
+    hospitals, suppliers = network()
+
+    assert network_impact(["Unknown", "Brussel"], hospitals, suppliers) == []
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        network_impact(["Near"], *network(), mode="fastest")
@@ -0,0 +1,106 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+import batch_run
+from network_generator import write_network
+from supply_history import FORECAST_HORIZON_DAYS, HISTORY_INDEX, HISTORY_TABLE, SupplyHistory, history_mismatch, \
+    load_history_minimums
+
+
+def insert(connection, rows):
+    """rows of (hospital, date, product, orders_placed, restock_time_days, demand_forecast)."""
+    with connection:
+        connection.executemany(
+            "INSERT INTO supply_data (hospital_name, date, product, current_stock, min_stock, supplier_stock, "
+            "orders_placed, restock_time_days, demand_forecast) VALUES (?, ?, ?, 0, 0, 0, ?, ?, ?)", rows)
+
+
+@pytest.fixture
+def history_db(tmp_path):
+    path = str(tmp_path / "history.db")
+    connection = sqlite3.connect(path)
+    connection.execute(HISTORY_TABLE)
+    # Hospital A orders 10 a day in January and 40 a day in February; Hospital B only has one row
+    insert(connection, [("Hospital A", f"2024-01-{day:02d}", "Drug A", 10, 2 + day % 3, 14) for day in range(1, 32)])
+    insert(connection, [("Hospital A", f"2024-02-{day:02d}", "Drug A", 40, 5, 14) for day in range(1, 30)])
+    insert(connection, [("Hospital B", "2024-01-15", "Drug B", 70, 1, 700)])
+    connection.close()
+    return path
+
+
+def test_profile_aggregates_per_hospital_and_product(history_db):
+    history = SupplyHistory(sqlite3.connect(history_db))
+
+    profile = history.profile("2024-01-01", "2024-01-31")
+
+    assert list(zip(profile.hospitals, profile.products)) == [("Hospital A", "Drug A"), ("Hospital B", "Drug B")]
+    np.testing.assert_allclose(profile.demand_per_day, [10, 70 / 31])
+    np.testing.assert_allclose(profile.forecast_per_day, [14 / FORECAST_HORIZON_DAYS, 700 / FORECAST_HORIZON_DAYS])
+    np.testing.assert_allclose(profile.max_lead_time_days, [4, 1])
+    assert profile.records.tolist() == [31, 1]
+    # The higher of history and forecast rate, over the longest lead time
+    assert profile.dynamic_minimum.tolist() == [40, 100]
+
+
+def test_window_rolls_with_the_end_date(history_db):
+    history = SupplyHistory(sqlite3.connect(history_db))
+
+    january = history.recent_profile(10, "2024-01-31")
+    february = history.recent_profile(10, "2024-02-29")
+    latest = history.recent_profile(10)
+
+    assert january.demand_per_day.tolist() == [10]
+    assert february.demand_per_day.tolist() == [40]
+    assert latest.records.tolist() == february.records.tolist() == [10]
+
+
+def test_profiles_are_cached_until_the_history_changes(history_db):
+    history = SupplyHistory(sqlite3.connect(history_db))
+    first = history.profile("2024-01-01", "2024-01-31")
+    assert history.profile("2024-01-01", "2024-01-31") is first
+
+    other = sqlite3.connect(history_db)
+    insert(other, [("Hospital C", "2024-01-20", "Drug A", 1, 1, 1)])
+    other.close()
+
+    assert "Hospital C" in history.profile("2024-01-01", "2024-01-31").hospitals
+
+
+def test_aggregate_uses_the_covering_index(history_db):
+    connection = sqlite3.connect(history_db)
+    connection.execute(HISTORY_INDEX)
+    history = SupplyHistory(connection)
+
+    plan = " ".join(str(row) for row in connection.execute("EXPLAIN QUERY PLAN " + history._query, ("a", "b")))
+
+    assert "COVERING INDEX supply_data_date_history" in plan
+
+
+def test_apply_and_matches(history_db):
+    profile = SupplyHistory(sqlite3.connect(history_db)).profile("2024-01-01", "2024-01-31")
+    names, products = ["Hospital B", "Hospital A"], ["Drug A", "Drug C"]
+
+    minimums = profile.apply(names, products, [[1, 2], [3, 4]])
+
+    assert minimums.tolist() == [[1, 2], [40, 4]]
+    assert profile.matches(names, products) == 1
+    assert history_mismatch(profile, names, products) is None
+    assert "matches none" in history_mismatch(profile, ["Hospital Z"], products)
+
+
+def test_load_history_minimums_without_history(tmp_path):
+    assert load_history_minimums(path=str(tmp_path / "missing.db")) is None
+    sqlite3.connect(str(tmp_path / "empty.db")).close()
+    assert load_history_minimums(path=str(tmp_path / "empty.db")) is None
+
+
+def test_batch_warns_when_no_hospital_matches(tmp_path, history_db, capsys):
+    hospitals_csv, suppliers_csv = write_network(str(tmp_path / "network"), 40, seed=8)
+
+    assert batch_run.main(["--hospitals", hospitals_csv, "--suppliers", suppliers_csv, "--history-minimums",
+                           "--history-db", history_db, "--history-end", "2024-01-31",
+                           "--output", str(tmp_path / "results.csv")]) == 0
+
+    assert "Warning: The supply_data history matches none of the" in capsys.readouterr().out
@@ -0,0 +1,94 @@
+import sqlite3
+
+import numpy as np
+
+import time_simulation
+from network_generator import write_network
+from network_state import NetworkState
+from supply_history import HISTORY_TABLE, SupplyHistory
+from time_simulation import TimeSteppedSimulation
+
+
+def tiny_network():
+    """Two hospitals and one supplier of one product; only Brussel consumes, 3 units a day."""
+    hospitals = NetworkState(["Brussel", "Gent"], ["Drug A"], np.array([[10], [50]]), min_stock=np.array([[10], [10]]),
+                             coordinates=np.array([[50.85, 4.35], [51.05, 3.72]]))
+    suppliers = NetworkState(["Supplier"], ["Drug A"], np.array([[0]]), production=np.array([[5]]),
+                             coordinates=np.array([[50.50, 4.40]]))
+    return hospitals, suppliers
+
+
+def test_production_consumption_and_transfers_per_day():
+    hospitals, suppliers = tiny_network()
+    simulation = TimeSteppedSimulation(hospitals, suppliers, consumption=[[3], [0]], production_interval_days=2)
+
+    days = [simulation.step() for _ in range(3)]
+    stock = simulation.state.stock[:, 0]
+
+    # Day 1: produces 5 and covers Brussel's 3. Day 2: no production, the supplier's last 2 and 1 from Gent.
+    # Day 3: produces 5 and covers 3 again.
+    assert [day.shortage_units for day in days] == [3, 3, 3]
+    assert [day.transferred_units for day in days] == [3, 3, 3]
+    assert [day.unresolved_units for day in days] == [0, 0, 0]
+    assert [day.stockout_units for day in days] == [0, 0, 0]
+    assert stock.tolist() == [10, 49, 2]
+    assert all(day.transport_km > 0 for day in days)
+    assert stock.sum() == 60 + 2 * 5 - 3 * 3
+
+
+def test_stockouts_and_unresolved_shortages_are_counted():
+    hospitals = NetworkState(["Brussel"], ["Drug A"], np.array([[1]]), min_stock=np.array([[10]]),
+                             coordinates=np.array([[50.85, 4.35]]))
+    suppliers = NetworkState(["Supplier"], ["Drug A"], np.array([[0]]), production=np.array([[0]]),
+                             coordinates=np.array([[50.50, 4.40]]))
+
+    history = TimeSteppedSimulation(hospitals, suppliers, consumption=[[3]]).run(2)
+
+    assert history.stockout_units.tolist() == [2, 3]
+    assert history.unresolved_units.tolist() == [10, 10]
+    assert history.days_short.tolist() == [[2]]
+    assert history.summary()["transferred_units"] == 0
+
+
+def test_optimal_mode_moves_the_same_units():
+    for mode in ("nearest", "optimal"):
+        hospitals, suppliers = tiny_network()
+        simulation = TimeSteppedSimulation(hospitals, suppliers, consumption=[[3], [0]], mode=mode)
+        history = simulation.run(4)
+        assert history.summary()["transferred_units"] == 12
+        assert simulation.state.stock[:, 0].tolist() == [10, 50, 8]
+
+
+def test_cli_prints_a_day_per_line(tmp_path, capsys):
+    hospitals_csv, suppliers_csv = write_network(str(tmp_path), 60, seed=3)
+
+    assert time_simulation.main(["--hospitals", hospitals_csv, "--suppliers", suppliers_csv, "--days", "5"]) == 0
+
+    output = capsys.readouterr().out.splitlines()
+    assert [line.split()[0] for line in output[1:6]] == ["1", "2", "3", "4", "5"]
+    assert output[6] == "days: 5"
+
+
+def test_history_minimums_roll_with_the_simulated_date(tmp_path):
+    connection = sqlite3.connect(str(tmp_path / "history.db"))
+    connection.execute(HISTORY_TABLE)
+    # Brussel orders 10 a day in January and 40 a day in February, restocking takes a day
+    connection.executemany(
+        "INSERT INTO supply_data (hospital_name, date, product, orders_placed, restock_time_days, demand_forecast) "
+        "VALUES ('Brussel', ?, 'Drug A', ?, 1, 0)",
+        [(str(np.datetime64("2024-01-01") + day), 10 if day < 31 else 40) for day in range(60)])
+    connection.commit()
+    hospitals, suppliers = tiny_network()
+    simulation = TimeSteppedSimulation(hospitals, suppliers, consumption=[[0], [0]], history=SupplyHistory(connection),
+                                       start_date="2024-02-01", history_days=10)
+
+    minimums = []
+    for _ in range(12):
+        simulation.step()
+        minimums.append(simulation.state.min_stock[:2, 0].tolist())
+    connection.close()
+
+    assert minimums[0] == [10, 10]  # January 22-31
+    assert minimums[5] == [25, 10]  # January 27 - February 5
+    assert minimums[10] == [40, 10]  # February 1-10
+    assert simulation.date() == np.datetime64("2024-02-13")
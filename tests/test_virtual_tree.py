@@ -0,0 +1,54 @@
+import tkinter as tk
+
+import pandas as pd
+import pytest
+
+from lazy_table import LazyTable
+from result_list import ResultList
+
+
+@pytest.fixture
+def root():
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("needs a display")
+    root.withdraw()
+    yield root
+    root.destroy()
+
+
+def shown(view):
+    return [tuple(str(value) for value in view.tree.item(item, "values")) for item in view.tree.get_children()]
+
+
+def test_result_list_holds_only_the_rows_in_view(root):
+    results = ResultList(root, ("Hospital", "Units"), filter_columns=("Hospital",), height=5)
+    results.set_records([(f"Hospital {index}", index) for index in range(1000)])
+
+    assert len(results.tree.get_children()) == 5
+    results.scroll(2, "pages")
+    assert shown(results)[0] == ("Hospital 10", "10")
+    results.yview("moveto", "1.0")
+    assert shown(results)[-1] == ("Hospital 999", "999")
+    assert results.scrollbar.get() == pytest.approx((0.995, 1.0))
+
+    results._filter_vars[0].set("hospital 99")
+    results.apply_filters()
+    assert results.row_count() == 11 and results.offset == 0
+    assert results.count_label.cget("text") == "11 of 1000 rows"
+
+
+def test_lazy_table_shows_edits_over_the_data(root):
+    data = pd.DataFrame({"name": [f"Hospital {index}" for index in range(500)], "stock": range(500)})
+    table = LazyTable(root, data, rows=range(100, 500), height=4)
+
+    assert shown(table) == [(f"Hospital {index}", str(index)) for index in range(100, 104)]
+    table.scroll(1, "units")
+    table.set_value(101, 1, 7)
+    assert shown(table)[0] == ("Hospital 101", "7")
+    table.yview("scroll", 1, "pages")
+    assert shown(table)[0] == ("Hospital 105", "105") and table.row_count() == 400
+
+    table.commit_edits()
+    assert data.loc[101, "stock"] == 7